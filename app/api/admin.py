@@ -0,0 +1,87 @@
+"""
+Admin API: runtime profiling switches, the recorded request profiles, the
+error table and the internal counters under `/stats`.
+
+Every endpoint requires the `admin_token` setting in an `X-Admin-Token`
+header; without a configured token the endpoints answer 404.
+"""
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+
+from ..core.config import config
+from ..core.errors import get_error_table
+from ..core.profiling import get_profiler
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not config.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, config.admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(prefix='/admin', dependencies=[Depends(require_admin)])
+
+# Per-worker counters of the caches and the compression, which reveal traffic and cache keys; the routes are added
+# by the modules they belong to, and the router is included by `routes.py` after them
+stats_router = APIRouter(prefix='/stats', dependencies=[Depends(require_admin)])
+
+
+class ProfilingSettings(BaseModel):
+    sample_rate: Optional[float] = Field(None, ge=0, le=1, description="Share of requests profiled")
+    header_enabled: Optional[bool] = Field(None, description="Profile requests with the admin token in X-Profile")
+    interval_ms: Optional[float] = Field(None, gt=0, description="Milliseconds between two stack samples")
+    max_profiles: Optional[int] = Field(None, ge=1, le=1000, description="Number of recent profiles kept")
+
+
+@router.get('/profiling')
+async def profiling_settings():
+    """Current profiling settings."""
+    return get_profiler().settings()
+
+
+@router.post('/profiling')
+async def configure_profiling(settings: ProfilingSettings):
+    """Switch profiling on or off and tune it; omitted fields keep their value."""
+    profiler = get_profiler()
+    profiler.configure(
+        sample_rate=settings.sample_rate,
+        header_enabled=settings.header_enabled,
+        interval=settings.interval_ms / 1000 if settings.interval_ms else None,
+        max_profiles=settings.max_profiles,
+    )
+    return profiler.settings()
+
+
+@router.get('/profiles')
+async def list_profiles():
+    """Summaries of the recent profiles, newest first."""
+    return [profile.summary() for profile in reversed(get_profiler().profiles)]
+
+
+@router.get('/profiles/{profile_id}')
+async def get_profile(profile_id: int, format: str = Query('collapsed', pattern='^(collapsed|json)$')):
+    """A profile as collapsed stacks (flamegraph.pl, speedscope) or as a JSON tree (d3-flame-graph)."""
+    profile = get_profiler().get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    if format == 'json':
+        return {**profile.summary(), 'tree': profile.tree()}
+    return PlainTextResponse(profile.collapsed())
+
+
+@router.get('/errors')
+async def list_errors(sort: str = Query('count', pattern='^(count|last_seen)$'), limit: int = Query(100, ge=1)):
+    """Error fingerprints with their counts, first/last seen times and latest sample."""
+    return get_error_table().snapshot(sort=sort, limit=limit)
+
+
+@router.delete('/errors')
+async def clear_errors():
+    """Empty the error table."""
+    get_error_table().clear()
+    return {'cleared': True}
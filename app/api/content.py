@@ -0,0 +1,296 @@
+"""
+Read-only JSON API over the portfolio content, plus publication feeds.
+
+Every response gets a strong ETag derived from the version of the content it
+is built from and the normalized query, so `If-None-Match` is answered with
+304 before anything is looked up or serialized. Serialized bodies are cached
+per ETag, which means a body is built once per content version and query.
+"""
+import base64
+import hashlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response
+
+from ..core.config import config
+from .admin import stats_router
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard library encoder is slower but equivalent
+    orjson = None
+    import json
+
+router = APIRouter()
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+# Record fields that can be selected with `fields=`
+FIELDS = {
+    'projects': ('title', 'description', 'technologies', 'image', 'github_url', 'demo_url', 'paper_url'),
+    'publications': ('title', 'authors', 'conference', 'year', 'url'),
+    'experience': ('title', 'company', 'location', 'start_date', 'end_date', 'description'),
+    'education': ('degree', 'institution', 'location', 'start_year', 'end_year', 'description'),
+}
+
+
+def dumps(value: Any) -> bytes:
+    """Serialize a value to compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+class BodyCache:
+    """Serialized response bodies by ETag, least recently used first out."""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._bodies: 'OrderedDict[str, bytes]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._bodies)
+
+    def get_or_build(self, etag: str, build: Callable[[], bytes]) -> bytes:
+        body = self._bodies.get(etag)
+        if body is not None:
+            self._bodies.move_to_end(etag)
+            self.hits += 1
+            return body
+        self.misses += 1
+        body = self._bodies[etag] = build()
+        if len(self._bodies) > self.max_entries:
+            self._bodies.popitem(last=False)
+        return body
+
+
+_cache = BodyCache()
+
+
+def cached_response(request: Request,
+                    collections: Tuple[str, ...],
+                    key: Iterable[Any],
+                    build: Callable[[], bytes],
+                    media_type: str = 'application/json') -> Response:
+    """Answer a request from the body cache, or with 304 if the client's copy is current.
+
+    :param collections: content collections the body is built from
+    :param key: normalized request parameters (together with the content version they identify the body)
+    :param build: function producing the body
+    """
+    from ..core.content import content_version
+
+    fingerprint = '|'.join(map(str, (request.url.path, content_version(collections), *key)))
+    etag = f'"{hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:20]}"'
+    headers = {'ETag': etag, 'Cache-Control': f'public, max-age={config.api_cache_max_age}'}
+    if etag in request.headers.get('if-none-match', ''):
+        return Response(status_code=304, headers=headers)
+    return Response(_cache.get_or_build(etag, build), media_type=media_type, headers=headers)
+
+
+def _encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(f'o:{offset}'.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        kind, _, offset = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode().partition(':')
+        if kind == 'o' and int(offset) >= 0:
+            return int(offset)
+    except ValueError:
+        pass
+    raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _select_fields(collection: str, fields: Optional[str]) -> Tuple[str, ...]:
+    if not fields:
+        return FIELDS[collection]
+    selected = tuple(dict.fromkeys(field.strip() for field in fields.split(',') if field.strip()))
+    unknown = [field for field in selected if field not in FIELDS[collection]]
+    if unknown or not selected:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields {', '.join(unknown) or '(none given)'}; available: {', '.join(FIELDS[collection])}",
+        )
+    return selected
+
+
+def _page(records: Sequence[Any], offset: int, limit: int, fields: Tuple[str, ...]) -> bytes:
+    items = [{field: getattr(record, field) for field in fields} for record in records[offset:offset + limit]]
+    end = offset + limit
+    return dumps({
+        'items': items,
+        'total': len(records),
+        'next_cursor': _encode_cursor(end) if end < len(records) else None,
+    })
+
+
+def _list(request: Request,
+          collection: str,
+          select: Callable[[], Sequence[Any]],
+          cursor: Optional[str],
+          limit: int,
+          fields: Optional[str],
+          *filters: Any) -> Response:
+    offset = _decode_cursor(cursor)
+    selected = _select_fields(collection, fields)
+    return cached_response(
+        request, (collection,), (offset, limit, ','.join(selected), *filters),
+        lambda: _page(select(), offset, limit, selected),
+    )
+
+
+def _content():
+    from ..core.content import get_content
+    return get_content()
+
+
+@router.get('/projects')
+async def list_projects(request: Request,
+                        cursor: Optional[str] = None,
+                        limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+                        fields: Optional[str] = Query(None, description="Comma-separated fields to include"),
+                        technology: Optional[str] = Query(None, description="Only projects using this technology")):
+    """Projects, optionally filtered by technology."""
+    def select():
+        projects = _content().projects
+        if technology is None:
+            return projects
+        from ..services.tag_index import get_tag_index
+        return [projects[position] for position in get_tag_index().projects_with(technology)]
+    return _list(request, 'projects', select, cursor, limit, fields, (technology or '').casefold())
+
+
+@router.get('/publications')
+async def list_publications(request: Request,
+                            cursor: Optional[str] = None,
+                            limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+                            fields: Optional[str] = Query(None, description="Comma-separated fields to include"),
+                            year: Optional[int] = Query(None, description="Only publications of this year")):
+    """Publications, optionally filtered by year."""
+    def select():
+        publications = _content().publications
+        return publications if year is None else [p for p in publications if p.year == year]
+    return _list(request, 'publications', select, cursor, limit, fields, year)
+
+
+@router.get('/experience')
+async def list_experience(request: Request,
+                          cursor: Optional[str] = None,
+                          limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+                          fields: Optional[str] = Query(None, description="Comma-separated fields to include"),
+                          year: Optional[int] = Query(None, description="Only positions held during this year")):
+    """Work experience, optionally limited to positions held during a year."""
+    def select():
+        experience = _content().experience
+        if year is None:
+            return experience
+        return [e for e in experience if int(e.start_date[:4]) <= year <= int((e.end_date or '9999')[:4])]
+    return _list(request, 'experience', select, cursor, limit, fields, year)
+
+
+@router.get('/education')
+async def list_education(request: Request,
+                         cursor: Optional[str] = None,
+                         limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+                         fields: Optional[str] = Query(None, description="Comma-separated fields to include"),
+                         year: Optional[int] = Query(None, description="Only education during this year")):
+    """Education, optionally limited to a year."""
+    def select():
+        education = _content().education
+        if year is None:
+            return education
+        return [e for e in education if e.start_year <= year <= (e.end_year or year)]
+    return _list(request, 'education', select, cursor, limit, fields, year)
+
+
+@router.get('/skills')
+async def list_skills(request: Request):
+    """Skills by category."""
+    return cached_response(request, ('skills',), (), lambda: dumps({'items': dict(_content().skills)}))
+
+
+def _feed_items() -> List[Dict[str, Any]]:
+    items = []
+    for publication in _content().publications:
+        items.append({
+            'id': publication.url or f'{publication.year}:{publication.title}',
+            'url': publication.url,
+            'title': publication.title,
+            'summary': f'{publication.authors}. {publication.conference}, {publication.year}.',
+            'date': f'{publication.year}-01-01T00:00:00Z',
+            'authors': publication.authors,
+        })
+    items.sort(key=lambda item: item['date'], reverse=True)
+    return items
+
+
+def _json_feed(base_url: str) -> bytes:
+    return dumps({
+        'version': 'https://jsonfeed.org/version/1.1',
+        'title': f'{config.developer_name} - Publications',
+        'home_page_url': f'{base_url}/publications',
+        'feed_url': f'{base_url}/api/publications/feed.json',
+        'authors': [{'name': config.developer_name}],
+        'items': [
+            {
+                'id': item['id'],
+                **({'url': item['url']} if item['url'] else {}),
+                'title': item['title'],
+                'content_text': item['summary'],
+                'date_published': item['date'],
+                'authors': [{'name': item['authors']}],
+            }
+            for item in _feed_items()
+        ],
+    })
+
+
+def _atom_feed(base_url: str) -> bytes:
+    items = _feed_items()
+    entries = ''.join(
+        f'<entry><id>{escape(item["id"])}</id><title>{escape(item["title"])}</title>'
+        f'<updated>{item["date"]}</updated><author><name>{escape(item["authors"])}</name></author>'
+        + (f'<link href={quoteattr(item["url"])}/>' if item['url'] else '')
+        + f'<summary>{escape(item["summary"])}</summary></entry>'
+        for item in items
+    )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>'
+        '<feed xmlns="http://www.w3.org/2005/Atom">'
+        f'<id>{escape(base_url)}/api/publications/atom.xml</id>'
+        f'<title>{escape(config.developer_name)} - Publications</title>'
+        f'<updated>{items[0]["date"] if items else "1970-01-01T00:00:00Z"}</updated>'
+        f'<link rel="self" href={quoteattr(base_url + "/api/publications/atom.xml")}/>'
+        f'{entries}</feed>'
+    ).encode('utf-8')
+
+
+@router.get('/publications/feed.json')
+async def publications_json_feed(request: Request):
+    """Publications as a JSON Feed."""
+    base_url = str(request.base_url).rstrip('/')
+    return cached_response(request, ('publications',), (base_url,), lambda: _json_feed(base_url),
+                           media_type='application/feed+json')
+
+
+@router.get('/publications/atom.xml')
+async def publications_atom_feed(request: Request):
+    """Publications as an Atom feed."""
+    base_url = str(request.base_url).rstrip('/')
+    return cached_response(request, ('publications',), (base_url,), lambda: _atom_feed(base_url),
+                           media_type='application/atom+xml')
+
+
+@stats_router.get('/cache')
+async def cache_stats():
+    """Body cache counters."""
+    return {'entries': len(_cache), 'hits': _cache.hits, 'misses': _cache.misses}
@@ -1,19 +1,36 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 from datetime import datetime
 import os
 
+from ..core.probes import get_probes
+
 router = APIRouter()
 
 @router.get("/health")
 async def health_check():
-    """Health check endpoint for monitoring and auto-scaling.
+    """Health check endpoint with version information.
     
-    This endpoint is used by fly.io to determine if the application is healthy
-    and to make decisions about auto-scaling and machine shutdown.
+    Only says the process is up; fly.io checks `/health/ready`, which also fails
+    when the machine is overloaded.
     """
     return {
         "status": "ok",
         "timestamp": datetime.now().isoformat(),
         "environment": os.getenv("APP_ENV", "development"),
         "version": os.getenv("APP_VERSION", "1.0.0")
-    }
\ No newline at end of file
+    }
+
+@router.get("/health/live")
+async def liveness():
+    """Liveness probe: the process handles requests."""
+    return {"status": "ok"}
+
+@router.get("/health/ready")
+async def readiness():
+    """Readiness probe: event loop lag, requests in flight, memory and clients are within their limits.
+    
+    Answers 503 while any limit is exceeded, so the platform routes traffic elsewhere.
+    """
+    report = get_probes().readiness()
+    return JSONResponse(report, status_code=200 if report["status"] == "ready" else 503)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 
 # Create router
 router = APIRouter()
@@ -7,9 +7,41 @@ router = APIRouter()
 from .health import router as health_router
 router.include_router(health_router, tags=["health"])
 
+# Admin API (profiling), disabled unless an admin token is configured
+from .admin import router as admin_router, stats_router
+router.include_router(admin_router, tags=["admin"])
+
+# Read-only content API and publication feeds
+from .content import router as content_router
+router.include_router(content_router, tags=["content"])
+
 @router.get('/ping')
 async def ping_pong():
     """A simple ping endpoint."""
     return {"message": "pong!"}
 
+@router.get('/search')
+def search(q: str = Query(..., min_length=1, max_length=200), limit: int = Query(10, ge=1, le=50)):
+    """Full-text search over projects, publications, experience and education."""
+    # Imported on first use to keep the search and content modules off the cold-start path. A plain function, so it
+    # runs in the threadpool and may wait for an index update without blocking the event loop.
+    from ..services.search import get_search_index
+    results = get_search_index().search(q, limit=limit)
+    return {"query": q, "results": [result._asdict() for result in results]}
+
+@stats_router.get('/response-cache')
+async def response_cache_stats():
+    """Response cache counters of this worker."""
+    from ..core.response_cache import get_response_cache
+    return get_response_cache().stats()
+
+@stats_router.get('/compression')
+async def compression_stats():
+    """Compressed bytes and CPU time per encoding of this worker."""
+    from ..core.compression import stats
+    return stats()
+
 # Add additional API routes here using the @router decorator
+
+# Internal counters, behind the admin token; included last, once all modules added their routes
+router.include_router(stats_router, tags=["admin"])
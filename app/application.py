@@ -0,0 +1,154 @@
+"""
+The FastAPI application (`uvicorn app:app`).
+
+Subsystems that most requests never touch are loaded on first use: the Jinja2
+templates are created by the first page render and the search index is built
+in the background after startup, so a cold start only pays for what the first
+request needs.
+
+With `serve_portfolio` (the default) the NiceGUI portfolio is mounted at `/`
+behind all other routes, so one process and one event loop serve the API, the
+Jinja pages (under `/site/`) and the portfolio, with one middleware stack.
+Unknown paths under `/api` still get the API's JSON 404.
+"""
+import asyncio
+import os
+from functools import lru_cache
+from fastapi import FastAPI
+from fastapi.responses import RedirectResponse
+from fastapi.staticfiles import StaticFiles
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Import core components
+from .core.config import config
+from .core.assets import URL_PREFIX as ASSETS_URL_PREFIX, asset_url, get_asset_manifest
+from .core.logging_config import RequestIdMiddleware, get_logger
+from .core.error_handling import register_exception_handlers
+from .core.compression import CompressionMiddleware
+from .core.metrics import MetricsMiddleware, metrics_response, register_process_gauges
+from .core.probes import InFlightMiddleware, get_probes
+from .core.profiling import ProfilingMiddleware
+from .core.response_cache import CacheRule, ResponseCacheMiddleware
+from .core.startup import StartupTimer
+
+# Initialize main application logger
+logger = get_logger(__name__)
+
+app = FastAPI(
+    title=config.app_name, # Use setting for title
+    description="Enterprise-ready FastAPI application base.",
+    version="1.0.0",
+    debug=config.debug, # Use setting for debug mode
+    # Add other FastAPI parameters if needed, e.g., lifespan context managers for DB connections
+)
+
+# Mount static files directory
+static_dir = os.path.join(os.path.dirname(__file__), 'static')
+if os.path.exists(static_dir) and os.path.isdir(static_dir):
+    app.mount("/static", StaticFiles(directory=static_dir), name="static")
+    logger.info(f"Using static directory at {static_dir}")
+else:
+    logger.warning(f"Static directory not found at {static_dir}. Create it if you need to serve static files.")
+
+# Fingerprinted, precompressed assets (long-lived caching)
+app.mount(ASSETS_URL_PREFIX, get_asset_manifest(), name="assets")
+
+# Jinja2 templates, created on first use
+templates_dir = os.path.join(os.path.dirname(__file__), 'templates')
+
+@lru_cache(maxsize=None)
+def get_templates():
+    """Return the Jinja2 templates, or None if the templates directory is missing."""
+    if not (os.path.exists(templates_dir) and os.path.isdir(templates_dir)):
+        logger.warning(f"Templates directory not found at {templates_dir}. Create it if you need to use Jinja2 templates.")
+        return None
+    from fastapi.templating import Jinja2Templates
+    from .core.templating import create_environment
+    templates = Jinja2Templates(env=create_environment(templates_dir))
+    templates.env.globals["asset_url"] = asset_url
+    logger.info(f"Using templates directory at {templates_dir}")
+    return templates
+
+# Import and include routers after app creation
+from .api import routes as api_routes
+from .frontend import routes as frontend_routes
+
+# Include routers; the portfolio owns `/` when it is served, the Jinja pages then live under /site/
+FRONTEND_PREFIX = "/site" if config.serve_portfolio else ""
+app.include_router(api_routes.router, prefix="/api", tags=["api"])
+app.include_router(frontend_routes.router, prefix=FRONTEND_PREFIX, tags=["frontend"])
+if FRONTEND_PREFIX:
+    app.add_api_route(FRONTEND_PREFIX, lambda: RedirectResponse(f"{FRONTEND_PREFIX}/"), include_in_schema=False)
+
+# Note: The application is designed to be extensible.
+# When AI-generated code is added, it can be placed in the 'generated' directory
+# and imported here with its own router.
+
+# Register custom exception handlers
+register_exception_handlers(app)
+
+# Compress dynamic responses; inside the response cache, so cached pages are stored compressed
+app.add_middleware(CompressionMiddleware)
+
+# Serve the index page and the health check from the response cache
+app.add_middleware(ResponseCacheMiddleware, rules=[
+    CacheRule(f"{FRONTEND_PREFIX}/", ttl=config.response_cache_ttl, stale_while_revalidate=config.response_cache_stale),
+    CacheRule("/api/health", ttl=1.0, vary_headers=()),
+])
+
+# Count requests in flight for the readiness probe
+app.add_middleware(InFlightMiddleware)
+
+# Request count, latency and response size per route, exposed at /metrics
+app.add_middleware(MetricsMiddleware, router=app.router)
+register_process_gauges()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return metrics_response()
+
+# Sampled request profiles, switched on at runtime through the admin API
+app.add_middleware(ProfilingMiddleware)
+
+# Request IDs for the log records of every request
+app.add_middleware(RequestIdMiddleware)
+
+# Log the time to the first response against the startup budget
+app.add_middleware(StartupTimer)
+
+# Root of the API (the site itself is served at /)
+@app.get("/api")
+async def read_root():
+    logger.debug("Root endpoint accessed.")
+    return {"message": "Welcome to the FastAPI application!"}
+
+# --- Startup and Shutdown Events ---
+@app.on_event("startup")
+async def startup_event():
+    logger.info(f"Starting {config.app_name} v{config.app_version} ({config.app_env})")
+    get_probes().start()
+    # Build the search index in the background so neither startup nor the first query pays for it
+    # (the portfolio, when served, warms it up itself)
+    if not config.serve_portfolio:
+        asyncio.get_running_loop().run_in_executor(None, _warm_up_search)
+    # Add any startup tasks here (database connections, etc.)
+
+def _warm_up_search():
+    from .services.search import get_search_index
+    get_search_index()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    logger.info(f"Shutting down {config.app_name}")
+    # Add any cleanup tasks here
+
+# The NiceGUI portfolio, mounted last so that it only receives the requests no route above matched
+if config.serve_portfolio:
+    from .core.server import StickySessionMiddleware
+    from .frontend.portfolio_app import mount_portfolio
+    # Keep a browser on the machine holding its page state when several machines run
+    app.add_middleware(StickySessionMiddleware)
+    portfolio = mount_portfolio(app)
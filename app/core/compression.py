@@ -0,0 +1,254 @@
+"""
+Dynamic response compression.
+
+`CompressionMiddleware` compresses text responses (HTML, JSON, JavaScript,
+CSS, XML, SVG) with the best encoding the client accepts: brotli, zstd (if
+the `zstandard` package is installed) or gzip. Bodies below
+`compression_min_size` and responses that already have a `Content-Encoding`
+(such as the precompressed assets) are passed through unchanged.
+
+Streamed responses are compressed chunk by chunk and flushed after every
+chunk, so the client receives each part as soon as the application sends it.
+Single-chunk responses with an ETag are compressed once per ETag and encoding
+and then served from a byte-bounded LRU cache. The ETag of a compressed
+response gets the encoding as suffix (`"abc-br"`), and the suffix is removed
+from `If-None-Match` before the application sees it, so revalidation still
+yields 304.
+
+CPU time spent compressing is counted per encoding (see `stats()`) to tune the
+levels for the available CPU.
+"""
+import re
+import time
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+from cachetools import LRUCache
+from starlette.datastructures import Headers, MutableHeaders
+
+from .assets import _accepted_encodings
+from .config import config
+from .logging_config import get_logger
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; clients then get zstd or gzip
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional
+    zstandard = None
+
+logger = get_logger(__name__)
+
+# Media types worth compressing; everything else (images, fonts, archives) is already compressed
+COMPRESSIBLE_TYPES = re.compile(
+    r'^(text/|application/(json|(.+\+)(json|xml)|javascript|xml|x-ndjson)|image/svg\+xml)'
+)
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Supported encodings in order of preference."""
+    encodings = []
+    if brotli is not None:
+        encodings.append('br')
+    if zstandard is not None:
+        encodings.append('zstd')
+    encodings.append('gzip')
+    return tuple(encodings)
+
+
+class _Compressor:
+    """Streaming compressor for one response."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._brotli = brotli.Compressor(quality=config.compression_brotli_quality)
+        elif encoding == 'zstd':
+            self._zstd = zstandard.ZstdCompressor(level=config.compression_zstd_level).compressobj()
+        else:
+            self._zlib = zlib.compressobj(config.compression_gzip_level, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == 'br':
+            return self._brotli.process(data) + (self._brotli.finish() if final else self._brotli.flush())
+        if self.encoding == 'zstd':
+            flush = zstandard.COMPRESSOBJ_FLUSH_FINISH if final else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+            return self._zstd.compress(data) + self._zstd.flush(flush)
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionStats:
+    """Per-encoding counters of compressed responses."""
+
+    def __init__(self):
+        self.encodings: Dict[str, Dict[str, float]] = {}
+        self.skipped: Dict[str, int] = {}
+        self.cache_hits = 0
+
+    def add(self, encoding: str, bytes_in: int, bytes_out: int, cpu_seconds: float, responses: int = 0):
+        counters = self.encodings.setdefault(
+            encoding, {'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'cpu_seconds': 0.0}
+        )
+        counters['responses'] += responses
+        counters['bytes_in'] += bytes_in
+        counters['bytes_out'] += bytes_out
+        counters['cpu_seconds'] += cpu_seconds
+
+    def skip(self, reason: str):
+        self.skipped[reason] = self.skipped.get(reason, 0) + 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        encodings = {}
+        for encoding, counters in self.encodings.items():
+            encodings[encoding] = {
+                **counters,
+                'ratio': round(counters['bytes_out'] / counters['bytes_in'], 3) if counters['bytes_in'] else None,
+                'cpu_ms_per_response': round(counters['cpu_seconds'] * 1000 / counters['responses'], 3)
+                if counters['responses'] else None,
+            }
+        return {'encodings': encodings, 'skipped': dict(self.skipped), 'cache_hits': self.cache_hits}
+
+
+_stats = CompressionStats()
+# (suffixed ETag, length) -> compressed body, bounded in bytes
+_cache = LRUCache(maxsize=config.compression_cache_bytes, getsizeof=len)
+
+
+def stats() -> Dict[str, Any]:
+    """Compression counters of this worker."""
+    return {**_stats.as_dict(), 'cache_entries': len(_cache), 'cache_bytes': _cache.currsize}
+
+
+def _strip_etag_suffixes(value: str) -> str:
+    return re.sub(r'-(?:br|zstd|gzip)"', '"', value)
+
+
+class _Responder:
+    """Compresses one response while it is sent."""
+
+    def __init__(self, send, encoding: str, minimum_size: int, revalidating_encoded: bool):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.revalidating_encoded = revalidating_encoded  # If-None-Match named a compressed variant
+        self.start: Optional[Dict[str, Any]] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def __call__(self, message):
+        if message['type'] == 'http.response.start':
+            self.start = message
+            headers = Headers(raw=message.get('headers', []))
+            if 'content-encoding' in headers:
+                self._pass('encoded')
+            elif message['status'] < 200 or message['status'] in (204, 304):
+                self._pass('no body')
+                if message['status'] == 304 and self.revalidating_encoded:
+                    self._suffix_etag(MutableHeaders(scope=message))
+            elif not COMPRESSIBLE_TYPES.match(headers.get('content-type', '')):
+                self._pass('type')
+            else:
+                return  # held back until the first body chunk shows whether the response is worth compressing
+            await self.send(message)
+            return
+
+        if message['type'] != 'http.response.body' or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+        if self.compressor is None:
+            headers = MutableHeaders(scope=self.start)
+            if not more_body and len(body) < self.minimum_size:
+                self._pass('small')
+                await self.send(self.start)
+                await self.send(message)
+                return
+            self._vary(headers)
+            headers['Content-Encoding'] = self.encoding
+            etag = self._suffix_etag(headers)
+            if not more_body:
+                compressed = self._cached_or_compress(etag, headers, body)
+                headers['Content-Length'] = str(len(compressed))
+                await self.send(self.start)
+                await self.send({'type': 'http.response.body', 'body': compressed})
+                return
+            del headers['Content-Length']
+            self.compressor = _Compressor(self.encoding)
+            await self.send(self.start)
+
+        started = time.thread_time()
+        compressed = self.compressor.compress(body, final=not more_body)
+        self._count(len(body), len(compressed), time.thread_time() - started, final=not more_body)
+        if compressed or not more_body:
+            await self.send({'type': 'http.response.body', 'body': compressed, 'more_body': more_body})
+
+    def _pass(self, reason: str):
+        self.passthrough = True
+        _stats.skip(reason)
+
+    def _vary(self, headers: MutableHeaders):
+        vary = headers.get('vary', '')
+        if 'accept-encoding' not in vary.lower():
+            headers['Vary'] = f'{vary}, Accept-Encoding' if vary else 'Accept-Encoding'
+
+    def _suffix_etag(self, headers: MutableHeaders) -> Optional[str]:
+        etag = headers.get('etag')
+        if etag and etag.endswith('"'):
+            etag = headers['ETag'] = f'{etag[:-1]}-{self.encoding}"'
+        return etag
+
+    def _count(self, bytes_in: int, bytes_out: int, cpu_seconds: float, final: bool):
+        _stats.add(self.encoding, bytes_in, bytes_out, cpu_seconds, responses=1 if final else 0)
+
+    def _cached_or_compress(self, etag: Optional[str], headers: MutableHeaders, body: bytes) -> bytes:
+        cacheable = etag is not None and 'no-store' not in headers.get('cache-control', '')
+        key = (etag, len(body))
+        if cacheable:
+            compressed = _cache.get(key)
+            if compressed is not None:
+                _stats.cache_hits += 1
+                return compressed
+        started = time.thread_time()
+        compressed = _Compressor(self.encoding).compress(body, final=True)
+        cpu_seconds = time.thread_time() - started
+        self._count(len(body), len(compressed), cpu_seconds, final=True)
+        headers['Server-Timing'] = f'compress;dur={cpu_seconds * 1000:.2f}'
+        if cacheable and len(compressed) <= _cache.maxsize // 8:
+            _cache[key] = compressed
+        return compressed
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing text responses with brotli, zstd or gzip."""
+
+    def __init__(self, app, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = config.compression_min_size if minimum_size is None else minimum_size
+        self.encodings = available_encodings()
+
+    def _negotiate(self, accept_encoding: str) -> Optional[str]:
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding in self.encodings:
+            if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+                return encoding
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] == 'HEAD':
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        encoding = self._negotiate(headers.get('accept-encoding', ''))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        if_none_match = headers.get('if-none-match', '')
+        if if_none_match:
+            MutableHeaders(scope=scope)['If-None-Match'] = _strip_etag_suffixes(if_none_match)
+        revalidating_encoded = f'-{encoding}"' in if_none_match
+        await self.app(scope, receive, _Responder(send, encoding, self.minimum_size, revalidating_encoded))
@@ -31,139 +31,154 @@ class AppConfig(BaseSettings):
     secondary_color: str = Field(default="#818CF8", description="Secondary theme color")
     dark_mode: bool = Field(default=True, description="Enable dark mode by default")
     
-    # ML Projects
-    projects: List[Dict[str, Any]] = Field(
-        default=[
-            {
-                "title": "Computer Vision for Medical Imaging",
-                "description": "Developed a deep learning model to detect abnormalities in X-ray images with 94% accuracy.",
-                "technologies": ["PyTorch", "TensorFlow", "OpenCV", "MONAI"],
-                "image": "medical_imaging.jpg",
-                "github_url": "https://github.com/janedoe/medical-imaging",
-                "demo_url": None,
-                "paper_url": "https://arxiv.org/abs/xxxx.xxxxx",
-            },
-            {
-                "title": "NLP for Customer Support Automation",
-                "description": "Built an intent classification system that reduced customer support response time by 45%.",
-                "technologies": ["BERT", "Hugging Face", "spaCy", "FastAPI"],
-                "image": "nlp_customer_support.jpg",
-                "github_url": "https://github.com/janedoe/nlp-customer-support",
-                "demo_url": "https://demo-nlp-support.example.com",
-                "paper_url": None,
-            },
-            {
-                "title": "Time Series Forecasting for Energy Consumption",
-                "description": "Implemented a transformer-based model for predicting energy usage patterns with 30% lower error than traditional methods.",
-                "technologies": ["PyTorch", "Prophet", "Pandas", "Darts"],
-                "image": "time_series.jpg",
-                "github_url": "https://github.com/janedoe/energy-forecasting",
-                "demo_url": None,
-                "paper_url": None,
-            },
-        ],
-        description="List of ML projects"
-    )
-    
-    # Skills
-    skills: Dict[str, List[str]] = Field(
+    # Project filters shown on the projects page, mapping a filter name to technologies
+    project_filters: Dict[str, List[str]] = Field(
         default={
-            "Machine Learning": ["Supervised Learning", "Unsupervised Learning", "Reinforcement Learning", "Deep Learning", "MLOps"],
-            "Frameworks & Libraries": ["TensorFlow", "PyTorch", "scikit-learn", "Hugging Face", "OpenCV", "spaCy"],
-            "Languages": ["Python", "SQL", "R", "C++"],
-            "Tools & Platforms": ["Docker", "Kubernetes", "AWS", "GCP", "MLflow", "DVC", "Weights & Biases"],
-            "Data Processing": ["Pandas", "NumPy", "PySpark", "Dask", "SQL"],
+            "Computer Vision": ["OpenCV", "MONAI"],
+            "NLP": ["BERT", "Hugging Face", "spaCy"],
+            "Time Series": ["Prophet", "Darts"],
         },
-        description="Skills categorized by domain"
+        description="Project filters by technology"
     )
     
-    # Publications
-    publications: List[Dict[str, Any]] = Field(
-        default=[
-            {
-                "title": "Advances in Medical Image Classification Using Attention Mechanisms",
-                "authors": "Doe, J., Smith, A., Johnson, B.",
-                "conference": "Conference on Computer Vision and Pattern Recognition (CVPR)",
-                "year": 2022,
-                "url": "https://example.com/paper1",
-            },
-            {
-                "title": "Efficient Transformer Models for Resource-Constrained Environments",
-                "authors": "Smith, A., Doe, J., Williams, C.",
-                "conference": "Neural Information Processing Systems (NeurIPS)",
-                "year": 2021,
-                "url": "https://example.com/paper2",
-            },
-        ],
-        description="Academic publications"
+    # Content (projects, publications, experience, education and skills) lives in files, see app/core/content.py
+    content_dir: Optional[str] = Field(default=None, description="Directory with the content files (default: ./content)")
+    content_reload_interval: float = Field(
+        default=2.0,
+        description="Seconds between checks for changed content files (0 disables hot reload)"
     )
     
-    # Experience
-    experience: List[Dict[str, Any]] = Field(
-        default=[
-            {
-                "title": "Senior Machine Learning Engineer",
-                "company": "AI Solutions Inc.",
-                "location": "San Francisco, CA",
-                "start_date": "2021-01",
-                "end_date": None,  # None for current positions
-                "description": "Leading a team of ML engineers to develop and deploy computer vision solutions for healthcare applications. Reduced model inference time by 40% and improved accuracy by 15%.",
-            },
-            {
-                "title": "Machine Learning Engineer",
-                "company": "Tech Innovations",
-                "location": "Boston, MA",
-                "start_date": "2018-06",
-                "end_date": "2020-12",
-                "description": "Developed NLP models for sentiment analysis and intent classification. Implemented MLOps practices that reduced deployment time from weeks to days.",
-            },
-            {
-                "title": "Data Scientist",
-                "company": "DataCorp",
-                "location": "Seattle, WA",
-                "start_date": "2016-08",
-                "end_date": "2018-05",
-                "description": "Built predictive models for customer churn and product recommendations. Created data pipelines that processed over 1TB of data daily.",
-            },
-        ],
-        description="Work experience"
+    # Application Settings
+    app_name: str = Field(default="ML Engineer Portfolio", description="Application name")
+    app_version: str = Field(default="1.0.0", description="Application version")
+    app_env: str = Field(default="development", description="Deployment environment")
+    admin_token: Optional[str] = Field(
+        default=None,
+        description="Token required by the admin API (X-Admin-Token header); the admin API is disabled if unset"
+    )
+    serve_portfolio: bool = Field(
+        default=True,
+        description="Serve the NiceGUI portfolio pages from the FastAPI app (the Jinja pages then move to /site/)"
     )
     
-    # Education
-    education: List[Dict[str, Any]] = Field(
-        default=[
-            {
-                "degree": "Ph.D. in Computer Science",
-                "institution": "Stanford University",
-                "location": "Stanford, CA",
-                "start_year": 2013,
-                "end_year": 2016,
-                "description": "Focused on deep learning for computer vision. Thesis: 'Attention Mechanisms in Medical Image Analysis'",
-            },
-            {
-                "degree": "M.S. in Machine Learning",
-                "institution": "Carnegie Mellon University",
-                "location": "Pittsburgh, PA",
-                "start_year": 2011,
-                "end_year": 2013,
-                "description": "Specialized in statistical machine learning and natural language processing.",
-            },
-            {
-                "degree": "B.S. in Computer Science",
-                "institution": "University of California, Berkeley",
-                "location": "Berkeley, CA",
-                "start_year": 2007,
-                "end_year": 2011,
-                "description": "Minor in Mathematics. Graduated with honors.",
-            },
-        ],
-        description="Educational background"
+    # Performance Settings
+    prerender_pages: bool = Field(
+        default=True,
+        description="Serve pre-rendered HTML for portfolio pages and only start a live client on interaction"
+    )
+    list_page_size: int = Field(default=10, description="Projects/publications built per page of a list")
+    list_max_pages: int = Field(default=3, description="Pages of a list kept alive per client")
+    client_idle_timeout: float = Field(
+        default=600.0,
+        description="Seconds without interaction after which a live client is evicted (0 disables)"
+    )
+    client_max_count: int = Field(
+        default=200,
+        description="Maximum number of live clients; the least recently used are evicted beyond it (0 disables)"
+    )
+    client_sweep_interval: float = Field(default=30.0, description="Seconds between client eviction sweeps")
+    chart_max_points: int = Field(default=800, description="Points per line sent to a chart, about its width in pixels")
+    chart_push_interval: float = Field(default=0.25, description="Seconds between two pushes of new chart points")
+    state_backend_url: Optional[str] = Field(
+        default=None,
+        description="Redis URL for state shared between workers (e.g. the demo counter); in-memory if unset"
+    )
+    
+    api_cache_max_age: int = Field(default=60, description="Seconds clients may reuse content API responses without revalidating")
+    startup_budget_ms: float = Field(
+        default=4000.0,
+        description="Target time from process start to the first response (0 disables the check)"
+    )
+    response_cache_backend: str = Field(
+        default="memory",
+        description="Where cached responses are kept: 'memory' (per worker) or 'disk' (shared by all workers)"
+    )
+    response_cache_dir: Optional[str] = Field(
+        default=None,
+        description="Directory of the disk response cache (default: under /dev/shm, or the temporary directory)"
+    )
+    template_bytecode_dir: Optional[str] = Field(
+        default=None,
+        description="Directory of compiled templates shared by all workers (default: app/templates/__jinjacache__)"
+    )
+    template_fragment_cache_size: int = Field(
+        default=256,
+        description="Rendered template fragments ({% cache %} blocks) kept per worker (0 disables)"
+    )
+    template_streaming: bool = Field(default=True, description="Stream the pages of routes that ask for streaming")
+    template_stream_chunk_size: int = Field(
+        default=16384,
+        description="Bytes of rendered output collected before a chunk of a streamed page is sent"
+    )
+    response_cache_max_entries: int = Field(default=1024, description="Maximum number of cached responses")
+    response_cache_ttl: float = Field(default=30.0, description="Seconds a cached page is served without re-rendering it")
+    response_cache_stale: float = Field(
+        default=300.0,
+        description="Further seconds a stale cached page is served while it is re-rendered in the background"
+    )
+    compression_min_size: int = Field(default=500, description="Responses smaller than this many bytes are not compressed")
+    compression_gzip_level: int = Field(default=6, description="gzip level (1-9) of dynamic responses")
+    compression_brotli_quality: int = Field(default=4, description="Brotli quality (0-11) of dynamic responses")
+    compression_zstd_level: int = Field(default=3, description="zstd level of dynamic responses")
+    compression_cache_bytes: int = Field(
+        default=8 << 20,
+        description="Memory for compressed bodies of responses with an ETag, reused until the ETag changes"
+    )
+    loop_lag_interval: float = Field(default=0.5, description="Seconds between two event loop lag samples")
+    loop_lag_window: float = Field(default=10.0, description="Seconds over which the maximum loop lag is reported")
+    ready_max_loop_lag_ms: float = Field(default=500.0, description="Readiness fails above this event loop lag (0 disables)")
+    ready_max_in_flight: int = Field(default=100, description="Readiness fails above this many requests in flight (0 disables)")
+    ready_max_memory_mb: float = Field(default=450.0, description="Readiness fails above this resident memory (0 disables)")
+    ready_max_clients: int = Field(
+        default=300,
+        description="Readiness fails above this many connected NiceGUI clients (0 disables)"
+    )
+    profile_sample_rate: float = Field(default=0.0, description="Share of requests profiled (0 disables random profiling)")
+    profile_on_header: bool = Field(
+        default=False,
+        description="Profile requests whose X-Profile header holds the admin token"
+    )
+    profile_interval_ms: float = Field(default=5.0, description="Milliseconds between two stack samples of a profile")
+    profile_max_count: int = Field(default=50, description="Number of recent request profiles kept")
+    error_table_size: int = Field(default=500, description="Error fingerprints kept in the error table")
+    error_body_capture_bytes: int = Field(
+        default=1024,
+        description="Bytes of a request body kept for error records (0 disables)"
+    )
+    
+    # Logging Settings
+    log_level: str = Field(default="INFO", description="Level of the app loggers")
+    log_json: bool = Field(default=False, description="Write log records as JSON lines")
+    log_file: Optional[str] = Field(default="logs/app.log", description="Rotating log file (console only if empty)")
+    log_queue_size: int = Field(default=10000, description="Records buffered for the log writer; more are dropped and counted")
+    log_batch_size: int = Field(default=500, description="Records the log writer writes at once")
+    log_flush_interval: float = Field(default=1.0, description="Seconds between flushes of the log outputs (errors flush immediately)")
+    log_sample_rates: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Share of records kept per call site, by 'logger:line', 'logger:function' or logger name"
+    )
+    log_rate_limits: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Records per second allowed per call site, by 'logger:line', 'logger:function' or logger name"
+    )
+    log_rate_limit: float = Field(default=0.0, description="Records per second allowed from any one call site (0 disables)")
+    log_dedup_interval: float = Field(
+        default=10.0,
+        description="Seconds within which a repeated message is logged once and then summarized (0 disables)"
     )
     
     # Server Settings
     debug: bool = Field(default=False, description="Debug mode")
     host: str = Field(default="0.0.0.0", description="Server host")
     port: int = Field(default=8000, description="Server port")
+    workers: int = Field(default=0, description="Worker processes (0: one per CPU, as far as the memory allows)")
+    worker_memory_mb: float = Field(default=150.0, description="Memory budgeted per worker when sizing the worker pool")
+    worker_max_requests: int = Field(default=0, description="Requests after which a worker is replaced (0 disables)")
+    server_loop: str = Field(default="auto", description="Event loop of the workers: 'auto' (uvloop if installed), 'uvloop' or 'asyncio'")
+    server_http: str = Field(default="auto", description="HTTP parser of the workers: 'auto' (httptools if installed), 'httptools' or 'h11'")
+    keep_alive: int = Field(default=5, description="Seconds an idle keep-alive connection is kept open")
+    backlog: int = Field(default=2048, description="Pending connections the listening socket queues")
+    graceful_timeout: int = Field(default=30, description="Seconds workers get to finish their requests on restart or shutdown")
     
     class Config:
         env_file = ".env"
@@ -171,4 +186,5 @@ class AppConfig(BaseSettings):
         case_sensitive = False
 
 # Global configuration instance
-config = AppConfig()
\ No newline at end of file
+config = AppConfig()
+
@@ -0,0 +1,316 @@
+"""
+File-backed portfolio content.
+
+Projects, publications, experience, education and skills are loaded from YAML
+or JSON files in the content directory, validated and turned into immutable
+`__slots__` records. The files are checked by mtime at most every
+`content_reload_interval` seconds; only changed files are re-read and
+re-validated, and the new content replaces the old one in a single step.
+
+Every collection has a version derived from the bytes of its file (a
+truncated SHA-1), so every worker, and a worker started later, gives the same
+content the same version. Caches and validators key on `content_version()` so
+they change exactly when the content they depend on changed.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+import yaml
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+
+from .config import config
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+CONTENT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'content')
+EXTENSIONS = ('.yaml', '.yml', '.json')
+
+# Content collections, each loaded from one file named after it
+COLLECTIONS = ('projects', 'publications', 'experience', 'education', 'skills')
+
+# Fields that make up the content shown on the pages: config fields and content collections
+CONTENT_FIELDS = (
+    "developer_name", "developer_title", "developer_email", "developer_location", "developer_bio",
+    "github_url", "linkedin_url", "twitter_url", "kaggle_url", "google_scholar_url",
+    "theme_color", "secondary_color", "dark_mode", "project_filters",
+) + COLLECTIONS
+
+
+class Record:
+    """Immutable record with slot-based attributes."""
+
+    __slots__ = ()
+
+    def __init__(self, **values: Any):
+        for name in self.__slots__:
+            object.__setattr__(self, name, values[name])
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"{type(self).__name__} records are immutable")
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f"{type(self).__name__} records are immutable")
+
+    def __repr__(self) -> str:
+        values = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({values})'
+
+    def asdict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Project(Record):
+    __slots__ = ('title', 'description', 'technologies', 'image', 'github_url', 'demo_url', 'paper_url')
+
+
+class Publication(Record):
+    __slots__ = ('title', 'authors', 'conference', 'year', 'url')
+
+
+class Experience(Record):
+    __slots__ = ('title', 'company', 'location', 'start_date', 'end_date', 'description')
+
+
+class Education(Record):
+    __slots__ = ('degree', 'institution', 'location', 'start_year', 'end_year', 'description')
+
+
+# Validation schemas of the content files
+
+class _ProjectModel(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+    title: str
+    description: str
+    technologies: List[str] = []
+    image: Optional[str] = None
+    github_url: Optional[str] = None
+    demo_url: Optional[str] = None
+    paper_url: Optional[str] = None
+
+
+class _PublicationModel(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+    title: str
+    authors: str
+    conference: str
+    year: int
+    url: Optional[str] = None
+
+
+# `YYYY` or `YYYY-MM`; the content API filters experience by the year of these dates
+_DATE_PATTERN = r'^\d{4}(-(0[1-9]|1[0-2]))?$'
+
+
+class _ExperienceModel(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+    title: str
+    company: str
+    location: str
+    start_date: str = Field(pattern=_DATE_PATTERN)
+    end_date: Optional[str] = Field(None, pattern=_DATE_PATTERN)  # None for current positions
+    description: str
+
+    @field_validator('end_date', mode='before')
+    @classmethod
+    def _current(cls, value: Any) -> Any:
+        return None if isinstance(value, str) and value.strip().lower() == 'present' else value
+
+
+class _EducationModel(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+    degree: str
+    institution: str
+    location: str
+    start_year: int
+    end_year: Optional[int] = None
+    description: str
+
+
+def _record_list(model: type, record: type) -> Callable[[Any], Tuple[Record, ...]]:
+    def parse(data: Any) -> Tuple[Record, ...]:
+        if not isinstance(data, list):
+            raise ValueError("expected a list of entries")
+        records = []
+        for entry in data:
+            values = model.model_validate(entry).model_dump()
+            if 'technologies' in values:
+                values['technologies'] = tuple(values['technologies'])
+            records.append(record(**values))
+        return tuple(records)
+    return parse
+
+
+def _skills(data: Any) -> Mapping[str, Tuple[str, ...]]:
+    if not isinstance(data, dict) or not all(
+        isinstance(skills, list) and all(isinstance(skill, str) for skill in skills) for skills in data.values()
+    ):
+        raise ValueError("expected a mapping from skill category to a list of skills")
+    return MappingProxyType({str(category): tuple(skills) for category, skills in data.items()})
+
+
+_PARSERS: Dict[str, Callable[[Any], Any]] = {
+    'projects': _record_list(_ProjectModel, Project),
+    'publications': _record_list(_PublicationModel, Publication),
+    'experience': _record_list(_ExperienceModel, Experience),
+    'education': _record_list(_EducationModel, Education),
+    'skills': _skills,
+}
+
+_EMPTY: Dict[str, Any] = {'skills': MappingProxyType({})}
+
+
+class Content:
+    """Immutable snapshot of all content collections."""
+
+    __slots__ = ('projects', 'publications', 'experience', 'education', 'skills', 'version', 'versions')
+
+    projects: Tuple[Project, ...]
+    publications: Tuple[Publication, ...]
+    experience: Tuple[Experience, ...]
+    education: Tuple[Education, ...]
+    skills: Mapping[str, Tuple[str, ...]]
+    version: str  # changes whenever any collection changes
+    versions: Mapping[str, str]  # per collection, a hash of its file
+
+    def __init__(self, collections: Dict[str, Any], version: str, versions: Dict[str, str]):
+        for name in COLLECTIONS:
+            object.__setattr__(self, name, collections[name])
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'versions', MappingProxyType(dict(versions)))
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("Content snapshots are immutable")
+
+
+class ContentStore:
+    """Loads content files and reloads the ones that changed."""
+
+    def __init__(self, directory: str, reload_interval: float):
+        """
+        :param directory: directory containing the content files
+        :param reload_interval: minimum seconds between two checks for changed files (0 disables reloading)
+        """
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self._stamps: Dict[str, Optional[Tuple[str, int, int]]] = {}  # collection -> (path, mtime, size)
+        self._collections: Dict[str, Any] = {}
+        self._versions: Dict[str, str] = {}
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.refresh(force=True, strict=True)
+
+    def _find(self, name: str) -> Optional[str]:
+        for extension in EXTENSIONS:
+            path = os.path.join(self.directory, name + extension)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def _stamp(self, name: str) -> Optional[Tuple[str, int, int]]:
+        path = self._find(name)
+        if path is None:
+            return None
+        stat = os.stat(path)
+        return path, stat.st_mtime_ns, stat.st_size
+
+    def _load(self, name: str, path: Optional[str]) -> Tuple[Any, str]:
+        """The parsed collection and its version, a hash of the file."""
+        if path is None:
+            logger.warning(f"No content file for '{name}' in {self.directory}")
+            return _EMPTY.get(name, ()), '0'
+        with open(path, 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw) if path.endswith('.json') else yaml.safe_load(raw)
+        return _PARSERS[name](data), hashlib.sha1(raw).hexdigest()[:12]
+
+    def refresh(self, force: bool = False, strict: bool = False) -> bool:
+        """Reload the content files that changed since the last check; returns whether content changed.
+
+        :param force: check the files even if the reload interval has not passed yet
+        :param strict: raise on invalid files instead of keeping their previous content
+        """
+        now = time.monotonic()
+        if not force and (self.reload_interval <= 0 or now - self._checked < self.reload_interval):
+            return False
+        if not self._lock.acquire(blocking=force):
+            return False  # another thread is already checking
+        try:
+            self._checked = now
+            collections = dict(self._collections)
+            versions = dict(self._versions)
+            changed = []
+            for name in COLLECTIONS:
+                stamp = self._stamp(name)
+                if name in self._collections and stamp == self._stamps.get(name):
+                    continue
+                try:
+                    collections[name], versions[name] = self._load(name, stamp[0] if stamp else None)
+                except (OSError, ValueError, ValidationError, yaml.YAMLError) as e:
+                    if strict:
+                        raise
+                    logger.error(f"Keeping previous '{name}' content, {stamp[0] if stamp else name} is invalid: {e}")
+                    continue
+                finally:
+                    self._stamps[name] = stamp
+                if versions[name] != self._versions.get(name):  # not only touched
+                    changed.append(name)
+            if not changed:
+                return False
+            reloaded = bool(self._collections)
+            version = hashlib.sha1(':'.join(versions[name] for name in COLLECTIONS).encode()).hexdigest()[:12]
+            self._collections = collections
+            self._versions = versions
+            self._content = Content(collections, version, versions)
+            if reloaded:
+                logger.info(f"Reloaded content: {', '.join(changed)} (version {version})")
+            return True
+        finally:
+            self._lock.release()
+
+    @property
+    def content(self) -> Content:
+        """The current content, checking for changed files first (at most once per reload interval)."""
+        self.refresh()
+        return self._content
+
+
+_store: Optional[ContentStore] = None
+
+
+def get_content_store() -> ContentStore:
+    """Return the process-wide content store, loading the content on first use."""
+    global _store
+    if _store is None:
+        _store = ContentStore(config.content_dir or CONTENT_DIR, config.content_reload_interval)
+    return _store
+
+
+def get_content() -> Content:
+    """Return the current portfolio content."""
+    return get_content_store().content
+
+
+@lru_cache(maxsize=None)
+def _config_version(fields: Tuple[str, ...]) -> str:
+    # Config fields are fixed for the lifetime of the process
+    payload = config.model_dump_json(include=set(fields))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def content_version(fields: Tuple[str, ...] = CONTENT_FIELDS) -> str:
+    """Return a key identifying the current state of the given content fields.
+
+    The key combines a hash of the config fields with the versions (file hashes) of the content collections,
+    so it changes as soon as one of the fields changes, and is the same in every process serving the same content.
+    """
+    content = get_content()
+    config_fields = tuple(field for field in fields if field not in COLLECTIONS)
+    versions = '.'.join(content.versions[field] for field in fields if field in COLLECTIONS)
+    return f"{_config_version(config_fields) if config_fields else ''}:{versions}"
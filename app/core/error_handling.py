@@ -1,15 +1,72 @@
+"""
+Exception handlers.
+
+Every handled error is counted in the error table (see `errors.py`) and only
+the first occurrence of an error fingerprint and then every power of ten are
+logged, with the occurrence count. Request bodies are never read for logging:
+`BodyCaptureMiddleware` keeps the first `error_body_capture_bytes` of a body
+while the application streams it, and that prefix is what error records show.
+"""
+import logging
+from typing import Optional
+
 from fastapi import Request, status
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from pydantic import ValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
+from .config import config
+from .errors import get_error_table, should_log
 from .logging_config import get_logger
 
 logger = get_logger(__name__)
 
+BODY_PREFIX_KEY = 'app.body_prefix'
+_BODY_METHODS = frozenset(('POST', 'PUT', 'PATCH', 'DELETE'))
+
+
+class BodyCaptureMiddleware:
+    """ASGI middleware keeping the first bytes of a request body as the application receives it."""
+
+    def __init__(self, app, limit: Optional[int] = None):
+        self.app = app
+        self.limit = config.error_body_capture_bytes if limit is None else limit
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] not in _BODY_METHODS or self.limit <= 0:
+            await self.app(scope, receive, send)
+            return
+        prefix = scope[BODY_PREFIX_KEY] = bytearray()
+        limit = self.limit
+
+        async def capturing_receive():
+            message = await receive()
+            if message['type'] == 'http.request' and len(prefix) < limit:
+                prefix.extend(message.get('body', b'')[:limit - len(prefix)])
+            return message
+
+        await self.app(scope, capturing_receive, send)
+
+
+def body_prefix(request: Request) -> Optional[bytes]:
+    """The captured start of the request body (None if it was not captured)."""
+    prefix = request.scope.get(BODY_PREFIX_KEY)
+    return bytes(prefix) if prefix is not None else None
+
+
+def _record(request: Request, exc: BaseException, status_code: int, message: str):
+    entry = get_error_table().record(request.scope, exc, status_code, message, body_prefix(request))
+    if entry.count > 1:
+        message = f"{message} ({entry.count} times since {entry.first_seen:.0f}, fingerprint {entry.fingerprint})"
+    return entry, message
+
+
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
-    logger.error(f"HTTPException: {exc.status_code} {exc.detail} for {request.method} {request.url.path}")
+    entry, message = _record(request, exc, exc.status_code,
+                             f"HTTPException: {exc.status_code} {exc.detail} for {request.method} {request.url.path}")
+    if should_log(entry):
+        logger.log(logging.ERROR if exc.status_code >= 500 else logging.WARNING, message)
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail},
@@ -21,22 +78,32 @@ async def request_validation_exception_handler(request: Request, exc: RequestVal
         field = ".".join(str(loc) for loc in error["loc"])
         message = error["msg"]
         error_messages.append(f"Field '{field}': {message}")
-    
-    logger.warning(f"RequestValidationError: {error_messages} for {request.method} {request.url.path} - Body: {await request.body()}")
+
+    entry, message = _record(request, exc, status.HTTP_422_UNPROCESSABLE_ENTITY,
+                             f"RequestValidationError: {error_messages} for {request.method} {request.url.path}")
+    if should_log(entry):
+        logger.warning(f"{message} - Body: {entry.body!r}" if entry.body else message)
     return JSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={"detail": "Validation Error", "errors": exc.errors()},
     )
 
 async def pydantic_validation_exception_handler(request: Request, exc: ValidationError):
-    logger.warning(f"Pydantic ValidationError: {exc.errors()} for {request.method} {request.url.path}")
+    entry, message = _record(request, exc, status.HTTP_422_UNPROCESSABLE_ENTITY,
+                             f"Pydantic ValidationError: {exc.errors()} for {request.method} {request.url.path}")
+    if should_log(entry):
+        logger.warning(message)
     return JSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={"detail": "Pydantic Validation Error", "errors": exc.errors()},
     )
 
 async def unhandled_exception_handler(request: Request, exc: Exception):
-    logger.critical(f"Unhandled exception: {exc} for {request.method} {request.url.path}", exc_info=True)
+    entry, message = _record(request, exc, status.HTTP_500_INTERNAL_SERVER_ERROR,
+                             f"Unhandled exception: {exc} for {request.method} {request.url.path}")
+    if should_log(entry):
+        # The traceback is the same for every occurrence of a fingerprint; log it once
+        logger.critical(message, exc_info=entry.count == 1)
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={"detail": "An unexpected internal server error occurred."},
@@ -47,6 +114,7 @@ def register_exception_handlers(app):
     app.add_exception_handler(RequestValidationError, request_validation_exception_handler)
     app.add_exception_handler(ValidationError, pydantic_validation_exception_handler)
     app.add_exception_handler(Exception, unhandled_exception_handler)
+    app.add_middleware(BodyCaptureMiddleware)
     logger.info("Custom exception handlers registered.")
 
-# The registration function should be called in the main application setup (app/__init__.py)
\ No newline at end of file
+# The registration function should be called in the main application setup (app/__init__.py)
@@ -0,0 +1,146 @@
+"""
+Aggregated request errors.
+
+Every error answered by the exception handlers is recorded under a
+fingerprint of route template, exception type and location (the innermost
+frame of the application's own code, or the status code for errors raised by
+the framework). The table keeps a count, the first and last time seen and the
+latest sample (message and request body prefix) per fingerprint, and is bounded:
+when it is full, the least recently seen fingerprint is evicted.
+
+Recording is a dictionary update, so an error storm costs little more than the
+error responses themselves. The exception handlers only log the first
+occurrence of a fingerprint and then every power of ten, and the table is
+served from the admin API.
+"""
+import hashlib
+import os
+import time
+import traceback
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from .config import config
+from .logging_config import get_logger
+from .metrics import UNMATCHED, route_templates
+
+logger = get_logger(__name__)
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+_ROUTING_FILES = (os.path.join('starlette', 'routing.py'), os.path.join('fastapi', 'routing.py'))
+
+
+class ErrorEntry:
+    """Count and latest sample of one error fingerprint."""
+
+    __slots__ = ('fingerprint', 'route', 'error', 'location', 'status', 'count', 'first_seen', 'last_seen',
+                 'message', 'body')
+
+    def __init__(self, fingerprint: str, route: str, error: str, location: str, status: int):
+        self.fingerprint = fingerprint
+        self.route = route
+        self.error = error
+        self.location = location
+        self.status = status
+        self.count = 0
+        self.first_seen = self.last_seen = time.time()
+        self.message = ''
+        self.body: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'fingerprint': self.fingerprint,
+            'route': self.route,
+            'error': self.error,
+            'location': self.location,
+            'status': self.status,
+            'count': self.count,
+            'first_seen': self.first_seen,
+            'last_seen': self.last_seen,
+            'message': self.message,
+            'body': self.body,
+        }
+
+
+class ErrorTable:
+    """Bounded table of error fingerprints, least recently seen evicted first."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: 'OrderedDict[tuple, ErrorEntry]' = OrderedDict()
+        self.total = 0
+        self.evicted = 0
+
+    def record(self, scope, exc: BaseException, status: int, message: str,
+               body: Optional[bytes] = None) -> ErrorEntry:
+        """Count an error of a request and return its entry (`count` is 1 for a new fingerprint)."""
+        # The route template of the request metrics; unknown paths share one fingerprint per error type
+        router = getattr(scope.get('app'), 'router', None)
+        route = f"{scope.get('method', '')} {route_templates(router).template(scope) if router else UNMATCHED}"
+        error = type(exc).__name__
+        location = _location(exc) or str(status)
+        key = (route, error, location)
+        entry = self.entries.get(key)
+        if entry is None:
+            fingerprint = hashlib.blake2b('|'.join(key).encode(), digest_size=6).hexdigest()
+            entry = self.entries[key] = ErrorEntry(fingerprint, route, error, location, status)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evicted += 1
+        else:
+            self.entries.move_to_end(key)
+            entry.last_seen = time.time()
+        entry.count += 1
+        entry.status = status
+        entry.message = message[:500]
+        if body is not None:
+            entry.body = body.decode('utf-8', 'replace')
+        self.total += 1
+        return entry
+
+    def snapshot(self, sort: str = 'count', limit: Optional[int] = None) -> Dict[str, Any]:
+        """The entries sorted by count or last seen (descending) and the table counters."""
+        entries: List[ErrorEntry] = list(self.entries.values())
+        entries.sort(key=(lambda e: e.count) if sort == 'count' else (lambda e: e.last_seen), reverse=True)
+        return {
+            'total': self.total,
+            'fingerprints': len(entries),
+            'max_entries': self.max_entries,
+            'evicted': self.evicted,
+            'errors': [entry.as_dict() for entry in entries[:limit]],
+        }
+
+    def clear(self):
+        self.entries.clear()
+        self.total = self.evicted = 0
+
+
+def _location(exc: BaseException) -> Optional[str]:
+    """`file:line function` of the innermost frame of the application's code below the router, if any."""
+    location = None
+    for frame, lineno in traceback.walk_tb(exc.__traceback__):
+        filename = frame.f_code.co_filename
+        if filename.startswith(_APP_DIR):
+            location = f'{os.path.relpath(filename, _APP_DIR)}:{lineno} {frame.f_code.co_name}'
+        elif filename.endswith(_ROUTING_FILES):
+            location = None  # frames above the router are middleware, the same for every error
+    return location
+
+
+def should_log(entry: ErrorEntry) -> bool:
+    """Log the first occurrence of a fingerprint and then every power of ten (10, 100, ...)."""
+    count = entry.count
+    while count % 10 == 0:
+        count //= 10
+    return count == 1
+
+
+_table: Optional[ErrorTable] = None
+
+
+def get_error_table() -> ErrorTable:
+    """Return the process-wide error table."""
+    global _table
+    if _table is None:
+        _table = ErrorTable(config.error_table_size)
+    return _table
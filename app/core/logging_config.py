@@ -1,33 +1,390 @@
+"""
+Logging for the `app` loggers.
+
+Log calls only put the record on a bounded queue; a background thread writes
+the queued records to the console and the rotating log file in batches and
+flushes at most every `log_flush_interval` seconds (immediately for errors).
+When the queue is full, records are dropped and counted instead of blocking
+the event loop, and the number of dropped records is logged once there is
+room again.
+
+Before records are queued, `LogThrottle` applies per-call-site sampling rates
+and rate limits and collapses repeated messages into periodic summaries.
+
+With `log_json` the records are written as JSON lines. Records logged while
+handling a request carry its ID (`X-Request-ID`, generated if the client sent
+none; see `RequestIdMiddleware`).
+"""
+import atexit
+import contextvars
+import json
 import logging
+import os
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+import threading
+import time
+import uuid
+from logging.handlers import QueueHandler, RotatingFileHandler
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import config
 
 # Define log format
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(module)s:%(funcName)s:%(lineno)d - %(message)s"
 DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
+# ID of the request being handled, attached to every record logged while handling it
+request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('request_id', default=None)
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            'time': self.formatTime(record, DATE_FORMAT),
+            'level': record.levelname,
+            'logger': record.name,
+            'location': f'{record.module}:{record.funcName}:{record.lineno}',
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'request_id', None):
+            entry['request_id'] = record.request_id
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id.get()
+        return True
+
+
+class _Site:
+    """Sampling and rate limit state of one call site (logger, function, line)."""
+
+    __slots__ = ('name', 'sample_rate', 'credit', 'rate', 'tokens', 'refilled', 'suppressed', 'record')
+
+    def __init__(self, name: str, sample_rate: float, rate: float):
+        self.name = name
+        self.sample_rate = sample_rate
+        self.credit = 1.0  # the first record is always kept
+        self.rate = rate
+        self.tokens = max(rate, 1.0)  # burst of one second
+        self.refilled = time.monotonic()
+        self.suppressed = 0
+        self.record: Optional[logging.LogRecord] = None  # last suppressed record, template of the summary
+
+
+class LogThrottle(logging.Filter):
+    """Per-call-site sampling and token-bucket rate limits, and collapsing of repeated messages.
+
+    Sampling rates and rate limits are looked up by `logger:line`, `logger:function`, the logger name and
+    then its parents, e.g. `{"app.frontend.routes:index": 0.01}`. A message repeated at the same call site
+    within `dedup_interval` seconds is logged once; the repetitions and any sampled-out or rate-limited
+    records are reported as summaries when the interval ends. Errors and records with exceptions are never
+    sampled or rate limited, and their repetitions are still counted in the summaries.
+    """
+
+    def __init__(self, sample_rates: Dict[str, float], rate_limits: Dict[str, float],
+                 default_rate_limit: float, dedup_interval: float, max_messages: int = 1000):
+        super().__init__()
+        self.sample_rates = sample_rates
+        self.rate_limits = rate_limits
+        self.default_rate_limit = default_rate_limit
+        self.dedup_interval = dedup_interval
+        self.max_messages = max_messages
+        self._sites: Dict[Tuple[str, str, int], _Site] = {}
+        self._messages: Dict[Tuple[str, str, int, str], List[Any]] = {}  # -> [first seen, repetitions, record]
+        self._window_start = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _setting(self, settings: Dict[str, float], name: str, function: str, line: int) -> Optional[float]:
+        for key in (f'{name}:{line}', f'{name}:{function}'):
+            if key in settings:
+                return settings[key]
+        while name:
+            if name in settings:
+                return settings[name]
+            name = name.rpartition('.')[0]
+        return None
+
+    def _site(self, key: Tuple[str, str, int]) -> _Site:
+        site = self._sites.get(key)
+        if site is None:
+            name, function, line = key
+            sample_rate = self._setting(self.sample_rates, name, function, line)
+            rate = self._setting(self.rate_limits, name, function, line)
+            site = self._sites[key] = _Site(
+                f'{name}:{function}:{line}',
+                1.0 if sample_rate is None else sample_rate,
+                self.default_rate_limit if rate is None else rate,
+            )
+        return site
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.name, record.funcName, record.lineno)
+        message = record.getMessage()
+        record.msg, record.args = message, None
+        important = record.levelno >= logging.ERROR or record.exc_info is not None
+        with self._lock:
+            if self.dedup_interval > 0:
+                seen = self._messages.get(key + (message,))
+                if seen is not None:
+                    seen[1] += 1
+                    seen[2] = record
+                    return False
+                if len(self._messages) < self.max_messages:
+                    self._messages[key + (message,)] = [time.monotonic(), 0, None]
+            if important:
+                return True
+            site = self._site(key)
+            if site.sample_rate < 1.0:
+                site.credit += site.sample_rate
+                if site.credit < 1.0:
+                    return self._suppress(site, record)
+                site.credit -= 1.0
+            if site.rate > 0:
+                now = time.monotonic()
+                site.tokens = min(site.tokens + (now - site.refilled) * site.rate, max(site.rate, 1.0))
+                site.refilled = now
+                if site.tokens < 1.0:
+                    return self._suppress(site, record)
+                site.tokens -= 1.0
+            return True
+
+    def after_fork(self):
+        """Replace the lock in a forked child, where a thread of the parent may have held it during the fork."""
+        self._lock = threading.Lock()
+
+    def _suppress(self, site: _Site, record: logging.LogRecord) -> bool:
+        site.suppressed += 1
+        site.record = record
+        return False
+
+    def summaries(self) -> List[logging.LogRecord]:
+        """Summary records of the repetitions and suppressed records whose interval ended."""
+        now = time.monotonic()
+        records = []
+        with self._lock:
+            for key, (first_seen, repetitions, record) in list(self._messages.items()):
+                if now - first_seen < self.dedup_interval:
+                    continue
+                del self._messages[key]
+                if repetitions:
+                    records.append(_summary(record, f"{record.msg} ({repetitions} more occurrences "
+                                                    f"in the last {now - first_seen:.0f} s)"))
+            interval = max(self.dedup_interval, 1.0)
+            if now - self._window_start >= interval:
+                for site in self._sites.values():
+                    if site.suppressed:
+                        records.append(_summary(site.record, f"{site.suppressed} records from {site.name} "
+                                                             f"suppressed in the last {now - self._window_start:.0f} s "
+                                                             f"(sampling or rate limit), last: {site.record.msg}"))
+                        site.suppressed, site.record = 0, None
+                self._window_start = now
+        return records
+
+
+def _summary(record: logging.LogRecord, message: str) -> logging.LogRecord:
+    summary = logging.makeLogRecord(record.__dict__)
+    summary.msg, summary.args = message, None
+    summary.exc_info = summary.exc_text = None  # the traceback was logged with the first occurrence
+    summary.created = time.time()
+    return summary
+
+
+class LogPipeline:
+    """Bounded queue of records drained in batches by a background writer thread."""
+
+    def __init__(self, handlers: List[logging.Handler], capacity: int, batch_size: int, flush_interval: float,
+                 throttle: Optional[LogThrottle] = None):
+        self.handlers = handlers
+        self.throttle = throttle
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: 'queue.Queue[Optional[logging.LogRecord]]' = queue.Queue(capacity)
+        self.dropped = 0
+        self.written = 0
+        self._reported_dropped = 0
+        self._thread = threading.Thread(target=self._run, name='log writer', daemon=True)
+        self._thread.start()
+
+    def restart(self):
+        """Start a new writer thread (in a forked child, which inherits the queue but not the thread)."""
+        self.queue = queue.Queue(self.queue.maxsize)
+        if self.throttle is not None:
+            self.throttle.after_fork()
+        self._thread = threading.Thread(target=self._run, name='log writer', daemon=True)
+        self._thread.start()
+
+    def put(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        """Write the queued records and stop the writer thread."""
+        if self._thread.is_alive():
+            self.queue.put(None)
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                records = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                records = []
+            while records and len(records) < self.batch_size:
+                try:
+                    records.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = None in records
+            records = [record for record in records if record is not None]
+            due = stopping or time.monotonic() - last_flush >= self.flush_interval
+            if due and self.dropped != self._reported_dropped:
+                records.append(self._dropped_record())
+            if due and self.throttle is not None:
+                records.extend(self.throttle.summaries())
+            if records:
+                self._write(records)
+            if due or any(record.levelno >= logging.ERROR for record in records):
+                for handler in self.handlers:
+                    handler.flush()
+                last_flush = time.monotonic()
+            if stopping:
+                return
+
+    def _dropped_record(self) -> logging.LogRecord:
+        dropped = self.dropped - self._reported_dropped
+        self._reported_dropped = self.dropped
+        return logging.LogRecord('app.core.logging_config', logging.WARNING, __file__, 0,
+                                 f"Log queue full, dropped {dropped} records", None, None, func='put')
+
+    def _write(self, records: List[logging.LogRecord]):
+        self.written += len(records)
+        for handler in self.handlers:
+            stream = getattr(handler, 'stream', None)
+            if stream is None and not isinstance(handler, logging.StreamHandler):
+                for record in records:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+                continue
+            try:
+                text = ''.join(handler.format(record) + '\n' for record in records
+                               if record.levelno >= handler.level and handler.filter(record))
+                if not text:
+                    continue
+                with handler.lock:
+                    if isinstance(handler, RotatingFileHandler):
+                        if handler.stream is None:
+                            handler.stream = handler._open()
+                        if handler.maxBytes and handler.stream.tell() + len(text) >= handler.maxBytes:
+                            handler.doRollover()
+                    handler.stream.write(text)
+            except Exception:
+                handler.handleError(records[-1])
+
+
+class _PipelineHandler(QueueHandler):
+    """Formats the message in the calling thread and hands the record to the pipeline."""
+
+    def __init__(self, pipeline: LogPipeline):
+        super().__init__(pipeline.queue)
+        self.pipeline = pipeline
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # The queue is thread-safe, so unlike Handler.handle this takes no handler lock
+        if not self.filter(record):
+            return False
+        self.pipeline.put(self.prepare(record))
+        return True
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Like QueueHandler.prepare, but keeps the traceback apart from the message for the JSON formatter
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_traceback_formatter = logging.Formatter()
+
+
+def _create_pipeline() -> LogPipeline:
+    formatter = JsonFormatter() if config.log_json else logging.Formatter(LOG_FORMAT, datefmt=DATE_FORMAT)
+
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(formatter)
+    handlers: List[logging.Handler] = [console_handler]
+
+    # File handler (optional, but good for production)
+    if config.log_file:
+        directory = os.path.dirname(config.log_file)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        file_handler = RotatingFileHandler(config.log_file, maxBytes=1024*1024*5, backupCount=5, encoding='utf-8') # 5MB per file, 5 backup files
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+
+    throttle = LogThrottle(config.log_sample_rates, config.log_rate_limits, config.log_rate_limit,
+                           config.log_dedup_interval)
+    return LogPipeline(handlers, config.log_queue_size, config.log_batch_size, config.log_flush_interval, throttle)
+
+
 # Create a custom logger
 logger = logging.getLogger("app")
-logger.setLevel(logging.INFO) # Default level, can be overridden by config
+logger.setLevel(config.log_level.upper())
 
-# Create handlers
-console_handler = logging.StreamHandler(sys.stdout)
-console_handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=DATE_FORMAT))
+pipeline = _create_pipeline()
+_handler = _PipelineHandler(pipeline)
+_handler.addFilter(pipeline.throttle)
+_handler.addFilter(_RequestIdFilter())
+logger.addHandler(_handler)
+atexit.register(pipeline.stop)
+os.register_at_fork(after_in_child=pipeline.restart)
 
-# File handler (optional, but good for production)
-# Creates a logs directory if it doesn't exist
-import os
-if not os.path.exists('logs'):
-    os.makedirs('logs')
-file_handler = RotatingFileHandler('logs/app.log', maxBytes=1024*1024*5, backupCount=5, encoding='utf-8') # 5MB per file, 5 backup files
-file_handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=DATE_FORMAT))
 
-# Add handlers to the logger
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+class RequestIdMiddleware:
+    """ASGI middleware giving every request an ID for its log records and the `X-Request-ID` response header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        value = None
+        for name, header in scope['headers']:
+            if name == b'x-request-id':
+                value = header.decode('latin-1')[:64]
+                break
+        value = value or uuid.uuid4().hex[:16]
+        token = request_id.set(value)
+
+        async def send_with_id(message):
+            if message['type'] == 'http.response.start':
+                message = dict(message, headers=[*message.get('headers', []), (b'x-request-id', value.encode('latin-1'))])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id.reset(token)
+
 
 def get_logger(name: str) -> logging.Logger:
     """Returns a logger instance with the specified name, inheriting base config."""
     return logging.getLogger(name)
 
-# End of logging configuration
\ No newline at end of file
+# End of logging configuration
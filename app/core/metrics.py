@@ -0,0 +1,370 @@
+"""
+Request metrics in the Prometheus text format.
+
+`MetricsMiddleware` records, per route template and method, the request count
+by status code, a latency histogram and a response size histogram. Other
+modules record into the metric families defined here (page build times,
+websocket messages) or register gauges read at scrape time.
+
+Metrics are updated from the event loop thread only, so recording takes no
+locks: a label set is resolved to its child once and cached, and observing a
+value is a bisect into fixed bucket bounds plus two increments. Everything is
+formatted when `/metrics` is scraped.
+"""
+from bisect import bisect_left
+from functools import wraps
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from starlette.responses import Response
+from starlette.routing import Match, Mount
+
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4'
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Route label of requests no route matched, so unknown paths cannot blow up the label count
+UNMATCHED = '<unmatched>'
+METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _CounterChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ('bounds', 'counts', 'sum')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # the last bucket is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class _Family:
+    type = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Return the child for a label set (cache it on hot paths)."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        lines.extend(self._samples())
+        return '\n'.join(lines)
+
+
+class Counter(_Family):
+    type = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        """Increment the counter of a family without labels."""
+        self.labels().inc(amount)
+
+    def _samples(self) -> List[str]:
+        return [f'{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}'
+                for values, child in list(self._children.items())]
+
+
+class Histogram(_Family):
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _samples(self) -> List[str]:
+        samples = []
+        for values, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), child.counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, values, f'le="{_format_value(bound)}"')
+                samples.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, values)
+            samples.append(f'{self.name}_sum{labels} {_format_value(child.sum)}')
+            samples.append(f'{self.name}_count{labels} {cumulative}')
+        return samples
+
+
+class Gauge(_Family):
+    """Gauge read at scrape time from a callback returning a value or {label values: value}."""
+
+    type = 'gauge'
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], Any], labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.read = read
+
+    def _samples(self) -> List[str]:
+        value = self.read()
+        values = value if isinstance(value, dict) else {(): value}
+        return [f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(v)}'
+                for labels, v in values.items() if v is not None]
+
+
+class Registry:
+    """Metric families in the order they are exposed."""
+
+    def __init__(self):
+        self._families: Dict[str, _Family] = {}
+
+    def register(self, family: _Family) -> _Family:
+        """Add a family (a family with the same name is replaced, so modules can be reloaded)."""
+        self._families[family.name] = family
+        return family
+
+    def render(self) -> str:
+        """All families in the Prometheus text format."""
+        blocks = []
+        for family in list(self._families.values()):
+            try:
+                blocks.append(family.render())
+            except Exception as e:
+                logger.warning(f"Could not collect metric {family.name}: {e}")
+        return '\n'.join(blocks) + '\n'
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    'http_requests_total', 'HTTP requests by route template, method and status code.',
+    ('route', 'method', 'status'),
+))
+HTTP_DURATION = REGISTRY.register(Histogram(
+    'http_request_duration_seconds', 'Time until the response was sent completely.',
+    ('route', 'method'), LATENCY_BUCKETS,
+))
+HTTP_RESPONSE_SIZE = REGISTRY.register(Histogram(
+    'http_response_size_bytes', 'Response body bytes as sent (after compression).',
+    ('route', 'method'), SIZE_BUCKETS,
+))
+PAGE_BUILD_DURATION = REGISTRY.register(Histogram(
+    'page_build_duration_seconds', 'Time to build the element tree of a page.',
+    ('page',), LATENCY_BUCKETS,
+))
+WEBSOCKET_MESSAGES = REGISTRY.register(Counter(
+    'websocket_messages_total', 'Socket.IO messages by direction (in: from browsers, out: to browsers).',
+    ('direction',),
+))
+
+
+def timed(histogram: Histogram, *labels: str):
+    """Decorator observing the duration of every call of a function in a histogram."""
+    child = histogram.labels(*labels)
+
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                child.observe(perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def metrics_response() -> Response:
+    """The current metrics as a `/metrics` response."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+class _RouteSeries:
+    """Cached children of one route template and method."""
+
+    __slots__ = ('route', 'method', 'duration', 'size', 'statuses')
+
+    def __init__(self, route: str, method: str):
+        self.route = route
+        self.method = method
+        self.duration = HTTP_DURATION.labels(route, method)
+        self.size = HTTP_RESPONSE_SIZE.labels(route, method)
+        self.statuses: Dict[int, _CounterChild] = {}
+
+    def record(self, status: int, elapsed: float, size: int):
+        child = self.statuses.get(status)
+        if child is None:
+            child = self.statuses[status] = HTTP_REQUESTS.labels(self.route, self.method, str(status))
+        child.value += 1
+        duration, sizes = self.duration, self.size
+        duration.counts[bisect_left(duration.bounds, elapsed)] += 1
+        duration.sum += elapsed
+        sizes.counts[bisect_left(sizes.bounds, size)] += 1
+        sizes.sum += size
+
+
+class _ResponseRecorder:
+    __slots__ = ('send', 'status', 'size')
+
+    def __init__(self, send):
+        self.send = send
+        self.status = 500  # if the application fails before sending a response
+        self.size = 0
+
+    async def __call__(self, message):
+        if message['type'] == 'http.response.body':
+            self.size += len(message.get('body', b''))
+        elif message['type'] == 'http.response.start':
+            self.status = message['status']
+        await self.send(message)
+
+
+class RouteTemplates:
+    """Maps requests to the template of their route, e.g. `/api/projects/{slug}`."""
+
+    def __init__(self, router):
+        self.router = router
+        self._templates: Dict[Any, str] = {}  # endpoint -> route template
+        self.mounted: Dict[Any, str] = {}  # mounted application with routes (e.g. NiceGUI) -> mount path
+
+    def _index_routes(self, routes=None, prefix: str = ''):
+        for route in self.router.routes if routes is None else routes:
+            if isinstance(route, Mount):
+                mounted = getattr(route.app, 'routes', None)
+                if mounted is not None:
+                    self.mounted[route.app] = prefix + route.path
+                    self._index_routes(mounted, prefix + route.path)
+                self._templates.setdefault(route.app, prefix + route.path + '/{path:path}')
+            elif hasattr(route, 'endpoint'):
+                self._templates.setdefault(route.endpoint, prefix + route.path)
+
+    def template(self, scope) -> str:
+        """The route template of a request, or `UNMATCHED` if no route matches it."""
+        endpoint = scope.get('endpoint')
+        if endpoint is not None and endpoint not in self.mounted:
+            template = self._templates.get(endpoint)
+            if template is None:
+                self._index_routes()  # routes added after the first request
+                if endpoint not in self.mounted:
+                    template = self._templates.setdefault(endpoint, UNMATCHED)
+            if template is not None:
+                return template
+        # Answered by a middleware before routing (e.g. a pre-rendered page): find the route it stands in for
+        routes, prefix = (endpoint.routes, self.mounted[endpoint]) if endpoint is not None else (self.router.routes, '')
+        for route in routes:
+            if route.matches(scope)[0] is Match.FULL:
+                return prefix + getattr(route, 'path', UNMATCHED)
+        return UNMATCHED
+
+
+_route_templates: Dict[int, RouteTemplates] = {}  # id of the router -> its templates (routers are not hashable)
+
+
+def route_templates(router) -> RouteTemplates:
+    """The route templates of a router, shared by the metrics and the error table so their labels agree."""
+    templates = _route_templates.get(id(router))
+    if templates is None or templates.router is not router:
+        templates = _route_templates[id(router)] = RouteTemplates(router)
+    return templates
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request count, latency and response size per route template."""
+
+    def __init__(self, app, router):
+        """
+        :param router: the application's router, used to map requests to route templates
+        """
+        self.app = app
+        self.routes = route_templates(router)
+        self._by_template: Dict[str, Dict[str, _RouteSeries]] = {}  # route template -> method -> series
+        self._by_endpoint: Dict[Any, Dict[str, _RouteSeries]] = {}  # shortcut for routed requests
+
+    def _series(self, scope) -> _RouteSeries:
+        endpoint = scope.get('endpoint')
+        methods = self._by_endpoint.get(endpoint) if endpoint is not None else None
+        if methods is None:
+            template = self.routes.template(scope)
+            methods = self._by_template.setdefault(template, {})
+            if endpoint is not None and endpoint not in self.routes.mounted:
+                self._by_endpoint[endpoint] = methods
+        series = methods.get(scope['method'])
+        if series is None:
+            method = scope['method'] if scope['method'] in METHODS else 'OTHER'
+            series = methods.get(method)
+            if series is None:
+                series = methods[method] = _RouteSeries(self.routes.template(scope), method)
+        return series
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        started = perf_counter()
+        recorder = _ResponseRecorder(send)
+        try:
+            await self.app(scope, receive, recorder)
+        finally:
+            self._series(scope).record(recorder.status, perf_counter() - started, recorder.size)
+
+
+def register_process_gauges():
+    """Expose the readiness measurements (loop lag, requests in flight, memory) and dropped log records as gauges."""
+    from .logging_config import pipeline as log_pipeline
+    from .probes import get_probes, memory_rss_mb
+
+    probes = get_probes()
+    REGISTRY.register(Gauge('http_requests_in_flight', 'HTTP requests being handled.', lambda: probes.in_flight))
+    REGISTRY.register(Gauge('event_loop_lag_seconds', 'Maximum event loop lag over the sampling window.',
+                            lambda: (probes.sampler.lag()['max_ms'] or 0) / 1000))
+    REGISTRY.register(Gauge('process_resident_memory_bytes', 'Resident memory of the process.',
+                            lambda: int(memory_rss_mb() * (1 << 20))))
+    REGISTRY.register(Gauge('log_records_dropped', 'Log records dropped because the log queue was full.',
+                            lambda: log_pipeline.dropped))
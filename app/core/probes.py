@@ -0,0 +1,144 @@
+"""
+Liveness and readiness.
+
+Liveness only says the process answers HTTP. Readiness compares load
+measurements with the `ready_*` thresholds and fails (503) while any of them is
+exceeded, so the platform stops routing traffic to an overloaded machine:
+
+- event loop lag: how late a background sampler wakes up from a short sleep,
+  taken as the maximum over the last `loop_lag_window` seconds so a single
+  slow tick neither fails nor clears readiness
+- requests in flight, counted by `InFlightMiddleware`
+- resident memory of the process
+- further gauges registered with `Probes.add_gauge`, such as connected
+  NiceGUI clients
+"""
+import asyncio
+import os
+import resource
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from .config import config
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class LoopLagSampler:
+    """Measures how late the event loop runs a task scheduled after a fixed sleep."""
+
+    def __init__(self, interval: float, window: float):
+        """
+        :param interval: seconds between two samples
+        :param window: seconds of samples the reported maximum covers
+        """
+        self.interval = interval
+        self._samples: Deque[Tuple[float, float]] = deque(maxlen=max(1, int(window / interval)))  # (time, lag)
+        self._last_wakeup: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start sampling on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run(), name='loop lag sampler')
+
+    async def _run(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._samples.append((now, max(now - expected, 0.0)))
+            self._last_wakeup = now
+
+    def lag(self) -> Dict[str, Optional[float]]:
+        """Last and maximum lag of the window in milliseconds (None before the first sample)."""
+        if not self._samples:
+            return {'last_ms': None, 'max_ms': None}
+        last = self._samples[-1][1]
+        # A sampler that is overdue is itself being delayed; count the delay so far
+        overdue = time.monotonic() - self._last_wakeup - self.interval
+        return {
+            'last_ms': round(last * 1000, 2),
+            'max_ms': round(max(max(lag for _, lag in self._samples), overdue) * 1000, 2),
+        }
+
+
+def memory_rss_mb() -> float:
+    """Resident set size of this process in MiB (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1 << 20)
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Probes:
+    """Load measurements and the readiness verdict derived from them."""
+
+    def __init__(self):
+        self.sampler = LoopLagSampler(config.loop_lag_interval, config.loop_lag_window)
+        self.in_flight = 0
+        self._gauges: Dict[str, Tuple[Callable[[], float], float]] = {}
+        self._ready: Optional[bool] = None
+
+    def start(self):
+        """Start the loop lag sampler (call on app startup)."""
+        self.sampler.start()
+
+    def add_gauge(self, name: str, read: Callable[[], float], limit: float):
+        """Add a measurement to the readiness check; a limit of 0 only reports it."""
+        self._gauges[name] = (read, limit)
+
+    def readiness(self) -> Dict[str, Any]:
+        """Every measurement with its limit, and whether all are within their limits."""
+        measurements = {
+            'loop_lag_ms': (self.sampler.lag()['max_ms'], config.ready_max_loop_lag_ms),
+            'in_flight_requests': (self.in_flight, config.ready_max_in_flight),
+            'memory_mb': (round(memory_rss_mb(), 1), config.ready_max_memory_mb),
+        }
+        for name, (read, limit) in self._gauges.items():
+            measurements[name] = (read(), limit)
+        checks = {
+            name: {'value': value, 'limit': limit or None, 'ok': not limit or value is None or value <= limit}
+            for name, (value, limit) in measurements.items()
+        }
+        ready = all(check['ok'] for check in checks.values())
+        if ready != self._ready:
+            if not ready:
+                failing = ', '.join(f"{name}={check['value']}" for name, check in checks.items() if not check['ok'])
+                logger.warning(f"Not ready: {failing}")
+            elif self._ready is not None:
+                logger.info("Ready again")
+            self._ready = ready
+        return {'status': 'ready' if ready else 'overloaded', 'checks': checks}
+
+
+class InFlightMiddleware:
+    """ASGI middleware counting the HTTP requests being handled."""
+
+    def __init__(self, app, probes: Optional[Probes] = None):
+        self.app = app
+        self.probes = probes or get_probes()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        self.probes.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.probes.in_flight -= 1
+
+
+_probes: Optional[Probes] = None
+
+
+def get_probes() -> Probes:
+    """Return the process-wide probes."""
+    global _probes
+    if _probes is None:
+        _probes = Probes()
+    return _probes
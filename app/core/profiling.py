@@ -0,0 +1,248 @@
+"""
+On-demand sampling profiler for requests.
+
+Profiling is off by default and then costs one attribute check per request.
+It is switched on, at startup through the settings or at runtime through the
+admin API, for a random share of requests (`profile_sample_rate`) and/or for
+single requests carrying the admin token in an `X-Profile` header
+(`profile_on_header`).
+
+While at least one profiled request is in flight, a background thread samples
+the Python stacks of all threads every `interval` seconds and adds them to
+each running profile, skipping threads that are idle (waiting in a selector,
+lock or queue). Samples are therefore of the whole process during the
+request: with concurrent traffic, profiles include other work that ran at the
+same time. Finished profiles are kept in a ring buffer of the most recent
+`max_profiles` and can be fetched as collapsed stacks (the input format of
+flamegraph.pl, speedscope and most flame graph viewers) or as a JSON tree for
+d3-flame-graph.
+"""
+import hmac
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from starlette.datastructures import Headers
+
+from .config import config
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+PROFILE_HEADER = 'x-profile'
+
+# Frames in these files at the top of a stack mean the thread is waiting, not working
+_IDLE_FILES = frozenset(('selectors.py', 'threading.py', 'queue.py'))
+
+
+class Profile:
+    """Sampled stacks of one request."""
+
+    __slots__ = ('id', 'method', 'path', 'started', 'duration_ms', 'status', 'samples', 'stacks')
+
+    def __init__(self, profile_id: int, method: str, path: str):
+        self.id = profile_id
+        self.method = method
+        self.path = path
+        self.started = time.time()
+        self.duration_ms: Optional[float] = None
+        self.status: Optional[int] = None
+        self.samples = 0
+        self.stacks: Dict[str, int] = {}  # collapsed stack -> samples
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'method': self.method,
+            'path': self.path,
+            'started': self.started,
+            'duration_ms': self.duration_ms,
+            'status': self.status,
+            'samples': self.samples,
+        }
+
+    def collapsed(self) -> str:
+        """One `frame;frame;frame count` line per distinct stack, root first."""
+        return ''.join(f'{stack} {count}\n' for stack, count in sorted(self.stacks.items()))
+
+    def tree(self) -> Dict[str, Any]:
+        """The stacks as nested {name, value, children} nodes."""
+        root: Dict[str, Any] = {'name': f'{self.method} {self.path}', 'value': 0, 'children': {}}
+        for stack, count in self.stacks.items():
+            node = root
+            node['value'] += count
+            for frame in stack.split(';'):
+                node = node['children'].setdefault(frame, {'name': frame, 'value': 0, 'children': {}})
+                node['value'] += count
+
+        def listify(node):
+            return {**node, 'children': [listify(child) for child in node['children'].values()]}
+        return listify(root)
+
+
+class RequestProfiler:
+    """Decides which requests to profile, samples stacks while they run and keeps the recent profiles."""
+
+    def __init__(self, sample_rate: float, header_enabled: bool, interval: float, max_profiles: int):
+        """
+        :param sample_rate: share of requests profiled (0 turns random profiling off)
+        :param header_enabled: profile requests whose `X-Profile` header holds the admin token
+        :param interval: seconds between two stack samples
+        :param max_profiles: number of finished profiles kept
+        """
+        self.sample_rate = sample_rate
+        self.header_enabled = header_enabled
+        self.interval = interval
+        self.profiles: Deque[Profile] = deque(maxlen=max_profiles)
+        self._active: Dict[int, Profile] = {}
+        self._ids = itertools.count(1)
+        self._labels: Dict[Any, str] = {}  # code object -> frame label
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any request can be profiled (randomly or on request)."""
+        return self.sample_rate > 0 or self.header_enabled
+
+    def configure(self, sample_rate: Optional[float] = None, header_enabled: Optional[bool] = None,
+                  interval: Optional[float] = None, max_profiles: Optional[int] = None):
+        """Change the profiling settings at runtime."""
+        if sample_rate is not None:
+            self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        if header_enabled is not None:
+            self.header_enabled = header_enabled
+        if interval is not None:
+            self.interval = max(interval, 0.0005)
+        if max_profiles is not None and max_profiles != self.profiles.maxlen:
+            self.profiles = deque(self.profiles, maxlen=max(max_profiles, 1))
+        logger.info(f"Profiling: sample rate {self.sample_rate}, header {'on' if self.header_enabled else 'off'}, "
+                    f"interval {self.interval * 1000:.1f} ms, keeping {self.profiles.maxlen} profiles")
+
+    def settings(self) -> Dict[str, Any]:
+        return {
+            'sample_rate': self.sample_rate,
+            'interval_ms': self.interval * 1000,
+            'max_profiles': self.profiles.maxlen,
+            'header_enabled': self.header_enabled,
+            'active': len(self._active),
+        }
+
+    def wants(self, scope) -> bool:
+        """Whether a request should be profiled."""
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return True
+        if not self.header_enabled:
+            return False
+        token = Headers(scope=scope).get(PROFILE_HEADER)
+        return bool(token and config.admin_token and hmac.compare_digest(token, config.admin_token))
+
+    def start(self, method: str, path: str) -> Profile:
+        profile = Profile(next(self._ids), method, path)
+        with self._lock:
+            self._active[profile.id] = profile
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sample, name='request profiler', daemon=True)
+                self._thread.start()
+        return profile
+
+    def finish(self, profile: Profile, duration: float, status: Optional[int]):
+        with self._lock:
+            self._active.pop(profile.id, None)
+        profile.duration_ms = round(duration * 1000, 3)
+        profile.status = status
+        self.profiles.append(profile)
+
+    def get(self, profile_id: int) -> Optional[Profile]:
+        for profile in self.profiles:
+            if profile.id == profile_id:
+                return profile
+        return None
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = (
+                f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'.replace(';', ':')
+            )
+        return label
+
+    def _collapse(self, frame) -> Optional[str]:
+        if os.path.basename(frame.f_code.co_filename) in _IDLE_FILES:
+            return None
+        labels: List[str] = []
+        while frame is not None:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        labels.reverse()
+        return ';'.join(labels)
+
+    def _sample(self):
+        own = threading.get_ident()
+        names = {}
+        while True:
+            if len(names) != threading.active_count():
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = []
+            for ident, frame in sys._current_frames().items():
+                stack = self._collapse(frame) if ident != own else None
+                if stack is not None:
+                    stacks.append(f'{names.get(ident, ident)};{stack}')
+            frame = None
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                for profile in self._active.values():
+                    for stack in stacks:
+                        profile.stacks[stack] = profile.stacks.get(stack, 0) + 1
+                    profile.samples += 1
+            time.sleep(self.interval)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling the requests selected by the profiler."""
+
+    def __init__(self, app, profiler: Optional[RequestProfiler] = None):
+        self.app = app
+        self.profiler = profiler or get_profiler()
+
+    async def __call__(self, scope, receive, send):
+        profiler = self.profiler
+        if scope['type'] != 'http' or not profiler.enabled or not profiler.wants(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = profiler.start(scope['method'], scope['path'])
+        status = None
+        started = time.perf_counter()
+
+        async def send_with_id(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                message = dict(message, headers=[*message.get('headers', []),
+                                                 (b'x-profile-id', str(profile.id).encode())])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.finish(profile, time.perf_counter() - started, status)
+
+
+_profiler: Optional[RequestProfiler] = None
+
+
+def get_profiler() -> RequestProfiler:
+    """Return the process-wide request profiler."""
+    global _profiler
+    if _profiler is None:
+        _profiler = RequestProfiler(config.profile_sample_rate, config.profile_on_header,
+                                    config.profile_interval_ms / 1000, config.profile_max_count)
+    return _profiler
@@ -0,0 +1,421 @@
+"""
+Server-side response cache.
+
+`ResponseCacheMiddleware` caches complete GET responses of selected routes.
+Each `CacheRule` names a path, how long a response is fresh (`ttl`) and how
+long after that a stale copy may still be served while it is refreshed in the
+background (`stale_while_revalidate`). The cache key is made of the path, the
+query string and selected request headers (`Accept-Encoding` by default).
+
+Concurrent misses for the same key are coalesced: one request renders the
+response and the others wait for it instead of rendering it again, and a stale
+entry is refreshed by at most one background request at a time.
+
+Entries are kept either in process memory (`MemoryBackend`, an LRU cache) or
+as files in a directory that several workers share (`DiskBackend`; under
+/dev/shm the files live in shared memory). Both are bounded by entry count and
+evict the least recently used entries first.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from cachetools import LRUCache
+from starlette.datastructures import Headers
+
+from .config import config
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+RawHeaders = List[Tuple[bytes, bytes]]
+
+
+class Entry:
+    """A cached response."""
+
+    __slots__ = ('key', 'status', 'headers', 'body', 'created', 'expires')
+
+    def __init__(self, key: str, status: int, headers: RawHeaders, body: bytes, created: float, expires: float):
+        self.key = key
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.created = created  # time.time() when the response was rendered
+        self.expires = expires  # end of the stale-while-revalidate window
+
+    def encode(self) -> bytes:
+        meta = json.dumps({
+            'key': self.key,
+            'status': self.status,
+            'headers': [[name.decode('latin-1'), value.decode('latin-1')] for name, value in self.headers],
+            'created': self.created,
+            'expires': self.expires,
+        }).encode('utf-8')
+        return struct.pack('>I', len(meta)) + meta + self.body
+
+    @classmethod
+    def decode(cls, data: bytes) -> 'Entry':
+        (length,) = struct.unpack_from('>I', data)
+        meta = json.loads(data[4:4 + length])
+        headers = [(name.encode('latin-1'), value.encode('latin-1')) for name, value in meta['headers']]
+        return cls(meta['key'], meta['status'], headers, data[4 + length:], meta['created'], meta['expires'])
+
+
+class _CountingLRUCache(LRUCache):
+    """LRU cache counting the entries it evicts."""
+
+    def __init__(self, maxsize: int):
+        super().__init__(maxsize)
+        self.evictions = 0
+
+    def popitem(self):
+        item = super().popitem()
+        self.evictions += 1
+        return item
+
+
+class MemoryBackend:
+    """Entries in process memory, least recently used evicted first."""
+
+    name = 'memory'
+
+    def __init__(self, max_entries: int):
+        self._entries = _CountingLRUCache(max_entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def evictions(self) -> int:
+        return self._entries.evictions
+
+    def get(self, key: str) -> Optional[Entry]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires <= time.time():
+            del self._entries[key]
+            return None
+        return entry
+
+    def set(self, entry: Entry):
+        self._entries[entry.key] = entry
+
+    def clear(self):
+        self._entries.clear()
+
+
+class DiskBackend:
+    """Entries as files in a directory shared by all workers.
+
+    Files are replaced atomically, so readers never see partial entries. A hit
+    touches the file, which makes the modification time a last-used time;
+    once the directory holds more than `max_entries` files, the least recently
+    used are removed. Eviction counts are per process.
+    """
+
+    name = 'disk'
+
+    def __init__(self, directory: str, max_entries: int):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._writes = 0
+        self._check_every = max(1, max_entries // 16)
+        os.makedirs(directory, exist_ok=True)
+
+    def __len__(self) -> int:
+        return sum(1 for entry in os.scandir(self.directory) if not entry.name.endswith('.tmp'))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    def get(self, key: str) -> Optional[Entry]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = Entry.decode(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, struct.error) as e:
+            logger.warning(f"Dropping unreadable response cache file {path}: {e}")
+            self._remove(path)
+            return None
+        if entry.key != key:
+            return None
+        if entry.expires <= time.time():
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def set(self, entry: Entry):
+        path = self._path(entry.key)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(temporary, 'wb') as f:
+                f.write(entry.encode())
+            os.replace(temporary, path)
+        except OSError as e:
+            logger.warning(f"Could not write response cache file {path}: {e}")
+            self._remove(temporary)
+            return
+        self._writes += 1
+        if self._writes % self._check_every == 0:
+            self._evict()
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            self._remove(entry.path)
+
+    def _remove(self, path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def _evict(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.tmp'):
+                continue
+            try:
+                files.append((entry.stat().st_mtime, entry.path))
+            except OSError:
+                continue
+        if len(files) <= self.max_entries:
+            return
+        files.sort()
+        for _, path in files[:len(files) - self.max_entries]:
+            if self._remove(path):
+                self.evictions += 1
+
+
+class CacheRule:
+    """How responses of one path are cached."""
+
+    def __init__(self,
+                 path: str,
+                 ttl: float,
+                 stale_while_revalidate: float = 0.0,
+                 vary_query: bool = True,
+                 vary_headers: Iterable[str] = ('accept-encoding',)):
+        """
+        :param path: exact request path
+        :param ttl: seconds a response is served without being rendered again
+        :param stale_while_revalidate: further seconds a response is served while a fresh one is rendered
+        :param vary_query: whether the query string is part of the cache key
+        :param vary_headers: request headers that are part of the cache key
+        """
+        self.path = path
+        self.ttl = ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self.vary_query = vary_query
+        self.vary_headers = tuple(header.lower() for header in vary_headers)
+
+    def key(self, scope: Dict[str, Any]) -> str:
+        headers = Headers(scope=scope)
+        parts = [scope['path']]
+        if self.vary_query:
+            parts.append(scope.get('query_string', b'').decode('latin-1'))
+        for header in self.vary_headers:
+            parts.append(f"{header}={headers.get(header, '').replace(' ', '').lower()}")
+        return '|'.join(parts)
+
+
+class _Recorder:
+    """Forwards a response to the client (if any) while keeping a copy of it."""
+
+    def __init__(self, send, max_body_bytes: int):
+        self.send = send
+        self.max_body_bytes = max_body_bytes
+        self.status = 0
+        self.headers: RawHeaders = []
+        self.chunks: List[bytes] = []
+        self.size = 0
+        self.complete = False
+
+    async def __call__(self, message):
+        if message['type'] == 'http.response.start':
+            self.status = message['status']
+            self.headers = list(message.get('headers', []))
+        elif message['type'] == 'http.response.body':
+            body = message.get('body', b'')
+            self.size += len(body)
+            if self.size <= self.max_body_bytes:
+                self.chunks.append(body)
+            self.complete = not message.get('more_body', False)
+        if self.send is not None:
+            await self.send(message)
+
+    def cacheable(self) -> bool:
+        if not self.complete or self.status != 200 or self.size > self.max_body_bytes:
+            return False
+        for name, value in self.headers:
+            if name.lower() == b'set-cookie':
+                return False
+            if name.lower() == b'cache-control' and any(
+                directive in value.lower() for directive in (b'no-store', b'private', b'no-cache')
+            ):
+                return False
+        return True
+
+
+class ResponseCache:
+    """Cache lookups, coalesced refills and counters shared by all cached routes."""
+
+    def __init__(self, backend, max_body_bytes: int = 1 << 20):
+        self.backend = backend
+        self.max_body_bytes = max_body_bytes
+        self._fills: Dict[str, asyncio.Future] = {}
+        self._refreshing: set = set()
+        self._tasks: set = set()  # running refreshes; the event loop only keeps weak references to tasks
+        self.counters = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'coalesced': 0,
+                         'refreshes': 0, 'stores': 0, 'uncacheable': 0}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'backend': self.backend.name,
+            'entries': len(self.backend),
+            'evictions': self.backend.evictions,
+            'in_flight': len(self._fills) + len(self._refreshing),
+            **self.counters,
+        }
+
+    def _store(self, rule: CacheRule, key: str, recorder: _Recorder) -> Optional[Entry]:
+        if not recorder.cacheable():
+            self.counters['uncacheable'] += 1
+            return None
+        now = time.time()
+        body = b''.join(recorder.chunks)
+        headers = recorder.headers
+        if not any(name.lower() == b'content-length' for name, _ in headers):
+            # A streamed response is replayed in one piece, with its length
+            headers = [*headers, (b'content-length', str(len(body)).encode())]
+        entry = Entry(key, recorder.status, headers, body, now, now + rule.ttl + rule.stale_while_revalidate)
+        self.backend.set(entry)
+        self.counters['stores'] += 1
+        return entry
+
+    async def _render(self, app, rule: CacheRule, key: str, scope, receive, send) -> Optional[Entry]:
+        recorder = _Recorder(send, self.max_body_bytes)
+        await app(scope, receive, recorder)
+        return self._store(rule, key, recorder)
+
+    async def _refresh(self, app, rule: CacheRule, key: str, scope):
+        async def receive():
+            if not request_sent:
+                request_sent.append(True)
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await asyncio.Event().wait()  # the background request never disconnects
+        request_sent: List[bool] = []
+        try:
+            await self._render(app, rule, key, dict(scope, method='GET'), receive, None)
+            self.counters['refreshes'] += 1
+        except Exception:
+            logger.exception(f"Refreshing the cached response of {rule.path} failed")
+        finally:
+            self._refreshing.discard(key)
+
+    async def serve(self, app, rule: CacheRule, scope, receive, send):
+        key = rule.key(scope)
+        head = scope['method'] == 'HEAD'
+        entry = self.backend.get(key)
+        if entry is not None:
+            age = time.time() - entry.created
+            if age < rule.ttl:
+                self.counters['hits'] += 1
+                await _send_entry(entry, age, b'HIT', head, send)
+                return
+            if age < rule.ttl + rule.stale_while_revalidate:
+                self.counters['stale_hits'] += 1
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    task = asyncio.create_task(self._refresh(app, rule, key, scope))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+                await _send_entry(entry, age, b'STALE', head, send)
+                return
+
+        fill = self._fills.get(key)
+        if fill is not None:
+            # Another request is rendering this response; wait for it instead of rendering it again
+            self.counters['coalesced'] += 1
+            entry = await asyncio.shield(fill)
+            if entry is not None:
+                await _send_entry(entry, time.time() - entry.created, b'HIT', head, send)
+            else:
+                await app(scope, receive, send)
+            return
+
+        self.counters['misses'] += 1
+        if head:
+            await app(scope, receive, send)  # the body of a HEAD response is not rendered, so it is not cached
+            return
+        fill = self._fills[key] = asyncio.get_running_loop().create_future()
+        entry = None
+        try:
+            entry = await self._render(app, rule, key, scope, receive, _with_cache_header(send, b'MISS'))
+        finally:
+            del self._fills[key]
+            fill.set_result(entry)
+
+
+def _with_cache_header(send, status: bytes):
+    async def send_with_header(message):
+        if message['type'] == 'http.response.start':
+            message = dict(message, headers=[*message.get('headers', []), (b'x-cache', status)])
+        await send(message)
+    return send_with_header
+
+
+async def _send_entry(entry: Entry, age: float, status: bytes, head: bool, send):
+    headers = [*entry.headers, (b'age', str(int(age)).encode()), (b'x-cache', status)]
+    await send({'type': 'http.response.start', 'status': entry.status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': b'' if head else entry.body})
+
+
+class ResponseCacheMiddleware:
+    """ASGI middleware serving the routes of the given rules from the response cache."""
+
+    def __init__(self, app, rules: Iterable[CacheRule], cache: Optional[ResponseCache] = None):
+        self.app = app
+        self.rules = {rule.path: rule for rule in rules}
+        self.cache = cache or get_response_cache()
+
+    async def __call__(self, scope, receive, send):
+        rule = self.rules.get(scope['path']) if scope['type'] == 'http' else None
+        if rule is None or scope['method'] not in ('GET', 'HEAD'):
+            await self.app(scope, receive, send)
+            return
+        await self.cache.serve(self.app, rule, scope, receive, send)
+
+
+def default_cache_dir() -> str:
+    """Shared memory if available, the temporary directory otherwise."""
+    base = '/dev/shm' if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK) else tempfile.gettempdir()
+    return os.path.join(base, f"{config.app_name.lower().replace(' ', '-')}-response-cache")
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache with the backend selected by `response_cache_backend`."""
+    global _cache
+    if _cache is None:
+        if config.response_cache_backend == 'disk':
+            backend = DiskBackend(config.response_cache_dir or default_cache_dir(), config.response_cache_max_entries)
+        else:
+            backend = MemoryBackend(config.response_cache_max_entries)
+        _cache = ResponseCache(backend)
+        logger.info(f"Response cache using the {backend.name} backend")
+    return _cache
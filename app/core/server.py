@@ -0,0 +1,365 @@
+"""
+Production server: gunicorn managing uvicorn workers.
+
+    python -m app.core.server                    # serve app:app
+    python -m app.core.server --bench            # throughput of each server option
+
+The number of workers is `workers`, or if 0 one per available CPU, capped by
+the memory available to the container divided by `worker_memory_mb`. The
+application is imported once in the gunicorn master before the workers are
+forked (`preload_app`), and the objects created by the import are moved out of
+the garbage collector's reach (`gc.freeze`), so the workers share those pages
+copy-on-write instead of each holding a copy. Workers use uvloop and the
+httptools parser when they are installed (`server_loop`, `server_http`), and
+keep-alive, listen backlog and graceful shutdown timeout come from the
+settings.
+
+Restarts are graceful: on SIGHUP gunicorn starts new workers and then stops the
+old ones, which finish their requests within `graceful_timeout`. With
+`worker_max_requests` each worker is replaced after that many requests (with
+jitter, so they are not all replaced at once). A preloaded application is not
+re-imported on SIGHUP; to deploy new code in place, send SIGUSR2 (starts a new
+master with the new code) and then SIGTERM to the old master.
+
+NiceGUI keeps the state of every connected page in the process that rendered
+it, so an application that includes NiceGUI runs a single worker. Across
+machines, `StickySessionMiddleware` pins a browser to the machine that served
+its page (on Fly.io, through the `fly-replay` header).
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from .config import config
+from .logging_config import get_logger
+
+try:
+    from gunicorn.app.base import BaseApplication
+    from uvicorn.workers import UvicornWorker
+except ImportError:  # gunicorn is only needed in production; `uvicorn app:app` works without it
+    BaseApplication = UvicornWorker = None
+
+logger = get_logger(__name__)
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+DEFAULT_APP = 'app:app'
+
+
+def available_cpus() -> int:
+    """CPUs this process may use, taking the container's CPU quota into account."""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cpus = min(cpus, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def available_memory_mb() -> Optional[float]:
+    """Memory limit of the container, or the memory of the machine (None if unknown)."""
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+            if value != 'max' and int(value) < 1 << 60:
+                return int(value) / (1 << 20)
+        except (OSError, ValueError):
+            pass
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemTotal:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def worker_count() -> int:
+    """The configured number of workers, or one per CPU as far as the memory allows."""
+    if config.workers > 0:
+        return config.workers
+    workers = available_cpus()
+    memory = available_memory_mb()
+    if memory and config.worker_memory_mb > 0:
+        workers = min(workers, int(memory // config.worker_memory_mb))
+    return max(workers, 1)
+
+
+def _installed(module: str) -> bool:
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+
+def event_loop() -> str:
+    """The event loop the workers use ('uvloop' or 'asyncio')."""
+    if config.server_loop == 'auto':
+        return 'uvloop' if _installed('uvloop') else 'asyncio'
+    return config.server_loop
+
+
+def http_parser() -> str:
+    """The HTTP implementation the workers use ('httptools' or 'h11')."""
+    if config.server_http == 'auto':
+        return 'httptools' if _installed('httptools') else 'h11'
+    return config.server_http
+
+
+if UvicornWorker is not None:
+    class Worker(UvicornWorker):
+        """Uvicorn worker with the event loop and HTTP parser chosen by the settings."""
+
+        CONFIG_KWARGS = {'loop': event_loop(), 'http': http_parser()}
+
+
+class StickySessionMiddleware:
+    """
+    ASGI middleware sending the requests of a browser to the machine that served its first page.
+
+    Responses set a cookie with the machine ID. A request carrying the ID of another machine is answered with
+    a `fly-replay` header, which makes the Fly.io proxy replay it on that machine. Without a machine ID
+    (`FLY_MACHINE_ID`, outside Fly.io) requests are passed through unchanged.
+    """
+
+    COOKIE = 'machine'
+
+    def __init__(self, app, machine_id: Optional[str] = None):
+        self.app = app
+        self.machine_id = machine_id if machine_id is not None else os.getenv('FLY_MACHINE_ID', '')
+        self._cookie = f'{self.COOKIE}={self.machine_id}; Path=/; HttpOnly; SameSite=Lax'.encode()
+
+    def _pinned_to(self, scope) -> Optional[str]:
+        for name, value in scope.get('headers', ()):
+            if name == b'cookie':
+                for part in value.decode('latin-1').split(';'):
+                    key, _, machine = part.strip().partition('=')
+                    if key == self.COOKIE:
+                        return machine
+        return None
+
+    async def __call__(self, scope, receive, send):
+        # Only HTTP: NiceGUI's socket connects with HTTP long-polling first, which pins it before any upgrade
+        if not self.machine_id or scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        pinned = self._pinned_to(scope)
+        if pinned and any(name == b'fly-replay-src' for name, _ in scope.get('headers', ())):
+            pinned = None  # replayed here although pinned elsewhere (that machine is gone): pin to this one
+        if pinned == self.machine_id:
+            await self.app(scope, receive, send)
+            return
+        if pinned:
+            await send({'type': 'http.response.start', 'status': 307,
+                        'headers': [(b'fly-replay', f'instance={pinned}'.encode()), (b'content-length', b'0')]})
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        async def send_with_cookie(message):
+            if message['type'] == 'http.response.start':
+                message = dict(message, headers=[*message.get('headers', []), (b'set-cookie', self._cookie)])
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+
+def _when_ready(server):
+    # Objects created by the import in the master are never freed; keep the collector from touching
+    # (and so copying) their pages in every worker
+    gc.collect()
+    gc.freeze()
+    # Known only once the application is imported; on later reloads `options` already caps the workers
+    if 'nicegui' in sys.modules and server.num_workers > 1:
+        logger.warning(f"The application includes NiceGUI, which keeps page state per process; "
+                       f"running 1 worker instead of {server.num_workers}")
+        server.num_workers = 1
+    logger.info(f"Serving {server.app.app_path} with {server.num_workers} workers "
+                f"({event_loop()}, {http_parser()}), keep-alive {config.keep_alive} s, backlog {config.backlog}")
+
+
+if BaseApplication is not None:
+    class Server(BaseApplication):
+        """Gunicorn application serving an ASGI application with the settings of `AppConfig`."""
+
+        def __init__(self, app_path: str = DEFAULT_APP, host: Optional[str] = None, port: Optional[int] = None):
+            self.app_path = app_path
+            self.bind = f'{host or os.getenv("HOST", config.host)}:{port or int(os.getenv("PORT", config.port))}'
+            super().__init__()
+
+        def options(self) -> Dict[str, Any]:
+            return {
+                'bind': self.bind,
+                'workers': 1 if 'nicegui' in sys.modules else worker_count(),  # see _when_ready
+                'worker_class': 'app.core.server.Worker',
+                'preload_app': True,
+                'keepalive': config.keep_alive,
+                'backlog': config.backlog,
+                'graceful_timeout': config.graceful_timeout,
+                'timeout': config.graceful_timeout * 2,
+                'max_requests': config.worker_max_requests,
+                'max_requests_jitter': config.worker_max_requests // 10,
+                'when_ready': _when_ready,
+            }
+
+        def load_config(self):
+            for key, value in self.options().items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from gunicorn.util import import_app
+            return import_app(self.app_path)
+
+
+def serve(app_path: str = DEFAULT_APP, host: Optional[str] = None, port: Optional[int] = None):
+    """Run the application with gunicorn and uvicorn workers (blocks until the server stops)."""
+    if BaseApplication is None:
+        raise RuntimeError("gunicorn is not installed; install it or run uvicorn directly")
+    sys.path.insert(0, PROJECT_DIR)
+    Server(app_path, host, port).run()
+
+
+# Server options compared by the benchmark, each adding one option to the previous. They are measured without the
+# NiceGUI portfolio, which would cap the server at one worker.
+BENCH_ENV = {'SERVE_PORTFOLIO': 'false', 'LOG_LEVEL': 'WARNING'}
+BENCH_VARIANTS = [
+    ('baseline (asyncio, h11, 1 worker)', {'SERVER_LOOP': 'asyncio', 'SERVER_HTTP': 'h11', 'WORKERS': '1'}),
+    ('+ uvloop', {'SERVER_LOOP': 'uvloop', 'SERVER_HTTP': 'h11', 'WORKERS': '1'}),
+    ('+ httptools', {'SERVER_LOOP': 'uvloop', 'SERVER_HTTP': 'httptools', 'WORKERS': '1'}),
+    ('+ workers', {'SERVER_LOOP': 'uvloop', 'SERVER_HTTP': 'httptools', 'WORKERS': '0'}),
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _worker_processes(pid: int) -> Optional[int]:
+    """Number of workers of a running gunicorn master (None where /proc is not available)."""
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return len(f.read().split())
+    except OSError:
+        return None
+
+
+async def _load(port: int, path: str, concurrency: int, duration: float) -> List[float]:
+    """Send requests over `concurrency` keep-alive connections for `duration` seconds; return their latencies."""
+    import asyncio
+
+    request = f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n'.encode()
+    latencies: List[float] = []
+    deadline = time.perf_counter() + duration
+
+    async def connection():
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        try:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                writer.write(request)
+                head = await reader.readuntil(b'\r\n\r\n')
+                length = 0
+                for line in head.split(b'\r\n'):
+                    if line.lower().startswith(b'content-length:'):
+                        length = int(line.split(b':')[1])
+                await reader.readexactly(length)
+                latencies.append(time.perf_counter() - started)
+        finally:
+            writer.close()
+
+    await asyncio.gather(*(connection() for _ in range(concurrency)))
+    return latencies
+
+
+def _measure(env: Dict[str, str], app_path: str, path: str, concurrency: int, duration: float) -> Dict[str, Any]:
+    import asyncio
+    import urllib.request
+
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'app.core.server', '--app', app_path, '--port', str(port)],
+        cwd=PROJECT_DIR, env={**os.environ, **BENCH_ENV, **env},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        started = time.perf_counter()
+        while True:
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{port}{path}', timeout=1).read()
+                break
+            except OSError:
+                if process.poll() is not None or time.perf_counter() - started > 60:
+                    raise RuntimeError(f"The server did not start (exit code {process.poll()})")
+                time.sleep(0.1)
+        asyncio.run(_load(port, path, concurrency, 1.0))  # warm up
+        workers = _worker_processes(process.pid)
+        latencies = asyncio.run(_load(port, path, concurrency, duration))
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=config.graceful_timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    latencies.sort()
+    return {
+        'workers': workers,
+        'requests_per_second': len(latencies) / duration,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+def benchmark(app_path: str, path: str, concurrency: int, duration: float):
+    """Print the throughput of each server option and its gain over the previous one."""
+    print(f"{app_path} {path}: {concurrency} connections, {duration:.0f} s per variant, "
+          f"{available_cpus()} CPUs, {worker_count()} workers when sized automatically\n")
+    print(f"{'variant':<36} {'workers':>7} {'req/s':>9} {'gain':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    previous = None
+    for name, env in BENCH_VARIANTS:
+        if env['SERVER_LOOP'] == 'uvloop' and not _installed('uvloop') or \
+                env['SERVER_HTTP'] == 'httptools' and not _installed('httptools'):
+            print(f"{name:<36} {'(not installed)':>9}")
+            continue
+        if env['WORKERS'] == '0' and worker_count() == 1:
+            print(f"{name:<36} {'(1 worker on this machine)':>9}")
+            continue
+        result = _measure(env, app_path, path, concurrency, duration)
+        rate = result['requests_per_second']
+        workers = result['workers']
+        gain = f"{(rate / previous - 1) * 100:+.0f}%" if previous else ''
+        print(f"{name:<36} {workers if workers is not None else '?':>7} {rate:>9.0f} {gain:>8} "
+              f"{result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f}")
+        if env['WORKERS'] == '0' and workers == 1:
+            print(f"{'':<36} (capped at 1 worker: the application includes NiceGUI)")
+        previous = rate
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the production server or benchmark its options.')
+    parser.add_argument('--app', default=DEFAULT_APP, help='ASGI application as module:attribute')
+    parser.add_argument('--host', default=None)
+    parser.add_argument('--port', type=int, default=None)
+    parser.add_argument('--bench', action='store_true', help='compare the throughput of the server options')
+    parser.add_argument('--path', default='/api/ping', help='path requested by the benchmark')
+    parser.add_argument('--concurrency', type=int, default=64, help='connections of the benchmark')
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds measured per variant')
+    arguments = parser.parse_args()
+    # Run through the imported module, whose logger and worker class gunicorn uses
+    from app.core import server
+    if arguments.bench:
+        server.benchmark(arguments.app, arguments.path, arguments.concurrency, arguments.duration)
+    else:
+        server.serve(arguments.app, arguments.host, arguments.port)
@@ -0,0 +1,165 @@
+"""
+Cold-start tracking.
+
+`StartupTimer` is a tiny ASGI middleware that logs how long after process start
+the first response was sent and warns if that exceeds `startup_budget_ms`.
+
+Run this module to profile a cold start from the outside:
+
+    python -m app.core.startup --target app     # the FastAPI app (uvicorn app:app)
+    python -m app.core.startup --target main    # the NiceGUI portfolio (main.py)
+
+It reports the slowest imports (from `python -X importtime`) grouped by top-level
+package and by module, then starts the server on a free port and measures the
+time until the first successful response. The exit code is 1 if the time to
+first response exceeds the startup budget, so the check can run in CI.
+"""
+import argparse
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+from .config import config
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+# How each target is imported and served
+TARGETS = {
+    'app': {
+        'module': 'app.application',
+        'command': [sys.executable, '-m', 'uvicorn', 'app:app', '--host', '127.0.0.1', '--port', '{port}'],
+        'path': '/api/ping',
+    },
+    'main': {
+        'module': 'main',
+        'command': [sys.executable, '-c',
+                    'import main; from nicegui import ui; ui.run(host="127.0.0.1", port={port}, reload=False, show=False)'],
+        'path': '/',
+    },
+}
+
+
+def _process_start_time() -> float:
+    """Wall-clock time at which the current process started (falls back to now)."""
+    try:
+        with open('/proc/self/stat') as f:
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - uptime + start_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return time.time()
+
+
+PROCESS_STARTED = _process_start_time()
+
+
+class StartupTimer:
+    """ASGI middleware logging the time from process start to the first response."""
+
+    def __init__(self, app, budget_ms: Optional[float] = None):
+        self.app = app
+        self.budget_ms = config.startup_budget_ms if budget_ms is None else budget_ms
+        self.first_response_ms: Optional[float] = None
+
+    async def __call__(self, scope, receive, send):
+        if self.first_response_ms is not None or scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        async def send_and_time(message):
+            if message['type'] == 'http.response.start' and self.first_response_ms is None:
+                self.first_response_ms = (time.time() - PROCESS_STARTED) * 1000
+                if self.budget_ms and self.first_response_ms > self.budget_ms:
+                    logger.warning(f"First response {self.first_response_ms:.0f} ms after process start, "
+                                   f"over the startup budget of {self.budget_ms:.0f} ms")
+                else:
+                    logger.info(f"First response {self.first_response_ms:.0f} ms after process start")
+            await send(message)
+
+        await self.app(scope, receive, send_and_time)
+
+
+def import_times(module: str) -> List[Tuple[str, int, int]]:
+    """Import a module in a fresh interpreter and return (module, self µs, cumulative µs) per import."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=PROJECT_DIR, capture_output=True, text=True, check=True,
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        match = re.match(r'import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)', line)
+        if match:
+            times.append((match.group(4), int(match.group(1)), int(match.group(2))))
+    return times
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def time_to_first_response(target: str, timeout: float = 60.0) -> float:
+    """Start a target server and return the seconds until its first successful response."""
+    port = _free_port()
+    command = [part.format(port=port) for part in TARGETS[target]['command']]
+    url = f"http://127.0.0.1:{port}{TARGETS[target]['path']}"
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=PROJECT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError, OSError):
+                if process.poll() is not None:
+                    raise RuntimeError(f"{target} exited with code {process.returncode} before responding")
+                time.sleep(0.01)
+        raise TimeoutError(f"{target} did not respond within {timeout:.0f} s")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def report(target: str, top: int) -> int:
+    times = import_times(TARGETS[target]['module'])
+    total = max(cumulative for _, _, cumulative in times) if times else 0
+    packages: Dict[str, int] = {}
+    for module, self_time, _ in times:
+        package = module.split('.')[0]
+        packages[package] = packages.get(package, 0) + self_time
+    print(f"Import of '{TARGETS[target]['module']}': {total / 1000:.0f} ms, {len(times)} modules\n")
+    print("Slowest packages (self time):")
+    for package, self_time in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {self_time / 1000:8.1f} ms  {package}")
+    print("\nSlowest modules (cumulative time):")
+    for module, _, cumulative in sorted(times, key=lambda item: item[2], reverse=True)[:top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {module}")
+
+    seconds = time_to_first_response(target)
+    budget = config.startup_budget_ms
+    verdict = 'over' if budget and seconds * 1000 > budget else 'within'
+    print(f"\nTime to first response: {seconds * 1000:.0f} ms ({verdict} the budget of {budget:.0f} ms)")
+    return 1 if verdict == 'over' else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Profile imports and time to first response of a cold start.')
+    parser.add_argument('--target', choices=sorted(TARGETS), default='app')
+    parser.add_argument('--top', type=int, default=15, help='number of packages and modules to list')
+    arguments = parser.parse_args()
+    sys.exit(report(arguments.target, arguments.top))
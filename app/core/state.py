@@ -0,0 +1,245 @@
+"""
+Observable shared state.
+
+A small key/value store for state shared between clients (such as the demo
+counter). Updates are atomic, interested code subscribes to keys, and
+subscribers are notified at most once per frame with the latest value, however
+many updates happened in between.
+
+The values live in a backend: in process memory by default, or in Redis
+(`state_backend_url = "redis://..."`) so that several workers share them.
+"""
+import asyncio
+import json
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .config import config
+from .logging_config import get_logger
+
+try:
+    import redis
+except ImportError:  # redis is optional; without it only the in-memory backend is available
+    redis = None
+
+logger = get_logger(__name__)
+
+# Subscribers are notified at most this often (seconds)
+FRAME_INTERVAL = 1 / 30
+
+
+class MemoryBackend:
+    """Process-local backend; updates are serialized by a lock."""
+
+    shared = False
+
+    def __init__(self):
+        self._values: Dict[str, Any] = {}
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._values.get(key, default)
+
+    def update(self, key: str, function: Callable[[Any], Any], default: Any = None) -> Any:
+        with self._lock:
+            value = function(self._values.get(key, default))
+            self._values[key] = value
+            self._versions[key] = self._versions.get(key, 0) + 1
+            return value
+
+    def increment(self, key: str, amount: int = 1) -> int:
+        return self.update(key, lambda value: value + amount, 0)
+
+    def versions(self, keys: Iterable[str]) -> Dict[str, int]:
+        return {key: self._versions.get(key, 0) for key in keys}
+
+
+class RedisBackend:
+    """Backend shared by all workers; values are stored as JSON next to a version counter."""
+
+    shared = True
+
+    def __init__(self, url: str, prefix: str = 'state:'):
+        if redis is None:
+            raise RuntimeError("The redis package is required for a Redis state backend")
+        self._redis = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def _keys(self, key: str) -> Tuple[str, str]:
+        return f'{self._prefix}{key}', f'{self._prefix}{key}:version'
+
+    def get(self, key: str, default: Any = None) -> Any:
+        raw = self._redis.get(self._keys(key)[0])
+        return default if raw is None else json.loads(raw)
+
+    def update(self, key: str, function: Callable[[Any], Any], default: Any = None) -> Any:
+        value_key, version_key = self._keys(key)
+        with self._redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(value_key)
+                    raw = pipe.get(value_key)
+                    value = function(default if raw is None else json.loads(raw))
+                    pipe.multi()
+                    pipe.set(value_key, json.dumps(value))
+                    pipe.incr(version_key)
+                    pipe.execute()
+                    return value
+                except redis.WatchError:
+                    continue
+
+    def increment(self, key: str, amount: int = 1) -> int:
+        value_key, version_key = self._keys(key)
+        with self._redis.pipeline() as pipe:
+            value, _ = pipe.incrby(value_key, amount).incr(version_key).execute()
+        return value
+
+    def versions(self, keys: Iterable[str]) -> Dict[str, int]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        raw = self._redis.mget([self._keys(key)[1] for key in keys])
+        return {key: int(version or 0) for key, version in zip(keys, raw)}
+
+
+class Subscription:
+    """A callback subscribed to a key; dropped once `alive()` returns False."""
+
+    __slots__ = ('key', 'callback', 'alive')
+
+    def __init__(self, key: str, callback: Callable[[Any], None], alive: Optional[Callable[[], bool]]):
+        self.key = key
+        self.callback = callback
+        self.alive = alive
+
+
+class StateStore:
+    """Atomic updates and coalesced, once-per-frame change notifications on top of a backend."""
+
+    def __init__(self, backend=None, frame_interval: float = FRAME_INTERVAL):
+        self.backend = backend or MemoryBackend()
+        self.frame_interval = frame_interval
+        self._subscriptions: Dict[str, List[Subscription]] = {}
+        self._seen_versions: Dict[str, int] = {}
+        self._changed: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the current value of a key."""
+        return self.backend.get(key, default)
+
+    def update(self, key: str, function: Callable[[Any], Any], default: Any = None) -> Any:
+        """Atomically replace the value of a key with `function(value)` and return the new value."""
+        value = self.backend.update(key, function, default)
+        self._notify()
+        return value
+
+    def set(self, key: str, value: Any) -> Any:
+        """Set the value of a key."""
+        return self.update(key, lambda _: value)
+
+    def increment(self, key: str, amount: int = 1) -> int:
+        """Atomically add `amount` to a numeric key and return the new value."""
+        value = self.backend.increment(key, amount)
+        self._notify()
+        return value
+
+    def subscribe(self,
+                  key: str,
+                  callback: Callable[[Any], None],
+                  alive: Optional[Callable[[], bool]] = None) -> Callable[[], None]:
+        """Call `callback(value)` once per frame in which the key changed.
+
+        Must be called from the event loop. Returns a function that cancels the subscription.
+
+        :param key: key to observe
+        :param callback: function receiving the latest value
+        :param alive: optional check; the subscription is dropped as soon as it returns False (e.g. a deleted element)
+        """
+        subscription = Subscription(key, callback, alive)
+        subscriptions = self._subscriptions.setdefault(key, [])
+        if not subscriptions:
+            self._seen_versions[key] = self.backend.versions([key])[key]
+        subscriptions.append(subscription)
+        self._start()
+        return lambda: self._unsubscribe(subscription)
+
+    def _unsubscribe(self, subscription: Subscription):
+        subscriptions = self._subscriptions.get(subscription.key, [])
+        if subscription in subscriptions:
+            subscriptions.remove(subscription)
+        if not subscriptions:
+            self._subscriptions.pop(subscription.key, None)
+            self._seen_versions.pop(subscription.key, None)
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+    def _start(self):
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._changed = asyncio.Event()
+            self._task = self._loop.create_task(self._broadcast_loop())
+
+    def _notify(self):
+        if self._changed is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._changed.set()
+        else:
+            self._loop.call_soon_threadsafe(self._changed.set)
+
+    def flush(self) -> int:
+        """Notify the subscribers of all keys that changed since the last flush; returns the number of calls."""
+        versions = self.backend.versions(self._subscriptions)
+        calls = 0
+        for key, version in versions.items():
+            if self._seen_versions.get(key) == version:
+                continue
+            self._seen_versions[key] = version
+            value = self.backend.get(key)
+            subscriptions = self._subscriptions[key]
+            for subscription in list(subscriptions):
+                if subscription.alive is not None and not subscription.alive():
+                    self._unsubscribe(subscription)
+                    continue
+                try:
+                    subscription.callback(value)
+                    calls += 1
+                except Exception:
+                    logger.exception(f"State subscriber for '{key}' failed")
+        return calls
+
+    async def _broadcast_loop(self):
+        while True:
+            if self.backend.shared:
+                # Other workers update the backend too, so it is polled once per frame
+                await asyncio.sleep(self.frame_interval)
+            else:
+                await self._changed.wait()
+                self._changed.clear()
+                # Updates arriving during the frame are coalesced into one notification
+                await asyncio.sleep(self.frame_interval)
+            if self._subscriptions:
+                try:
+                    self.flush()
+                except Exception:
+                    logger.exception("State broadcast failed")
+
+
+_store: Optional[StateStore] = None
+
+
+def get_state_store() -> StateStore:
+    """Return the process-wide state store, using the backend configured by `state_backend_url`."""
+    global _store
+    if _store is None:
+        url = config.state_backend_url
+        _store = StateStore(RedisBackend(url) if url else MemoryBackend())
+    return _store
@@ -0,0 +1,185 @@
+"""
+Jinja2 environment of the template routes.
+
+Compiled templates are kept in a bytecode cache on disk
+(`template_bytecode_dir`, by default `__jinjacache__` next to the templates),
+so a new worker loads the compiled code instead of parsing and compiling the
+sources again. Entries are keyed by template and checked against a checksum
+of the source, so an edited template is recompiled. Precompile all templates
+at build time with
+
+    python -m app.core.templating
+
+Outside debug mode templates are not checked for changes on every render.
+
+Expensive blocks that are the same for every request are cached as rendered
+fragments with the `cache` tag:
+
+    {% cache "footer" %}...{% endcache %}              kept until restart
+    {% cache "nav", 300 %}...{% endcache %}            re-rendered after 300 seconds
+    {% cache "nav", 300, user.lang %}...{% endcache %}  one fragment per further key
+
+Fragments are kept per worker in an LRU cache of `template_fragment_cache_size`
+entries (0 renders the blocks every time, as does debug mode so edits show up).
+
+The environment is async. `template_response` renders a template completely
+(`HTMLResponse`) or, for routes that ask for it, streams it: the output is sent
+in chunks of about `template_stream_chunk_size` bytes as it is rendered, and
+`{{ flush() }}` in a template sends everything rendered so far at once (used
+after the page header, so the browser can fetch the stylesheet and show the
+top of the page while the rest renders). The first chunk is rendered before
+the response starts, so errors in it still produce an error response; an error
+further down aborts the response, which is then not cached.
+"""
+import inspect
+import os
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+import jinja2
+from cachetools import LRUCache
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, Response, StreamingResponse
+
+from .config import config
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'templates')
+
+# Output of `{{ flush() }}`; removed from the page, it only marks where a streamed page is sent
+FLUSH = Markup('<!--flush-->')
+
+
+class FragmentCacheExtension(Extension):
+    """The `{% cache name[, ttl[, key...]] %}` tag caching a rendered block."""
+
+    tags = {'cache'}
+
+    def __init__(self, environment: jinja2.Environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=LRUCache(maxsize=max(config.template_fragment_cache_size, 1)))
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        if parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        else:
+            args.append(nodes.Const(0))
+        keys = []
+        while parser.stream.skip_if('comma'):
+            keys.append(parser.parse_expression())
+        args.append(nodes.Tuple(keys, 'load'))
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_cache', args), [], [], body).set_lineno(lineno)
+
+    def _cache(self, name: str, ttl: float, keys: tuple, caller):
+        if config.template_fragment_cache_size <= 0 or config.debug:
+            return caller()
+        key = (name, *keys)
+        cached = self.environment.fragment_cache.get(key)
+        if cached is not None and (not cached[0] or cached[0] > time.monotonic()):
+            return cached[1]
+        rendered = caller()
+        if inspect.isawaitable(rendered):  # async environment: store once rendered
+            return self._store_async(key, ttl, rendered)
+        self._store(key, ttl, rendered)
+        return rendered
+
+    async def _store_async(self, key: tuple, ttl: float, rendered):
+        rendered = await rendered
+        self._store(key, ttl, rendered)
+        return rendered
+
+    def _store(self, key: tuple, ttl: float, rendered: str):
+        self.environment.fragment_cache[key] = (time.monotonic() + ttl if ttl else 0, rendered)
+
+
+def bytecode_dir() -> str:
+    return config.template_bytecode_dir or os.path.join(TEMPLATES_DIR, '__jinjacache__')
+
+
+def create_environment(directory: str = TEMPLATES_DIR) -> jinja2.Environment:
+    """The Jinja2 environment with the bytecode cache and the fragment cache tag."""
+    cache_dir = bytecode_dir()
+    bytecode_cache: Optional[jinja2.FileSystemBytecodeCache] = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        bytecode_cache = jinja2.FileSystemBytecodeCache(cache_dir)
+    except OSError as e:
+        logger.warning(f"Template bytecode cache disabled, cannot use {cache_dir}: {e}")
+    environment = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(directory),
+        autoescape=True,
+        bytecode_cache=bytecode_cache,
+        auto_reload=config.debug,
+        extensions=[FragmentCacheExtension],
+        enable_async=True,
+    )
+    environment.globals['flush'] = lambda: FLUSH
+    return environment
+
+
+async def _render_chunks(template: jinja2.Template, context: Dict[str, Any], chunk_size: int) -> AsyncIterator[bytes]:
+    parts = []
+    size = 0
+    async for part in template.generate_async(context):
+        if part == FLUSH:
+            if parts:
+                yield ''.join(parts).encode()
+                parts, size = [], 0
+            continue
+        parts.append(part)
+        size += len(part)
+        if size >= chunk_size:
+            yield ''.join(parts).encode()
+            parts, size = [], 0
+    if parts:
+        yield ''.join(parts).encode()
+
+
+async def _continue_stream(first: bytes, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    yield first
+    async for chunk in chunks:
+        yield chunk
+
+
+async def template_response(templates, request: Request, name: str, context: Dict[str, Any],
+                            stream: bool = False, status_code: int = 200) -> Response:
+    """
+    Render a template of a `Jinja2Templates` instance into a response.
+
+    :param stream: send the page in chunks while it renders instead of rendering it completely first
+    """
+    context = {'request': request, **context}
+    for processor in templates.context_processors:
+        context.update(processor(request))
+    template = templates.get_template(name)
+    if not (stream and config.template_streaming):
+        html = await template.render_async(context)
+        return HTMLResponse(html.replace(FLUSH, ''), status_code=status_code)
+    chunks = _render_chunks(template, context, config.template_stream_chunk_size)
+    first = await anext(chunks, b'')
+    return StreamingResponse(_continue_stream(first, chunks), status_code=status_code, media_type='text/html')
+
+
+def precompile(environment: Optional[jinja2.Environment] = None) -> int:
+    """Compile every template into the bytecode cache; return the number of templates."""
+    environment = environment or create_environment()
+    names = environment.list_templates(filter_func=lambda name: '__jinjacache__' not in name)
+    for name in names:
+        environment.get_template(name)
+    return len(names)
+
+
+if __name__ == '__main__':
+    # Compile through the imported module: the extension is referenced by its module path in the bytecode
+    from app.core import templating
+    started = time.perf_counter()
+    count = templating.precompile()
+    print(f"Precompiled {count} templates into {bytecode_dir()} in {(time.perf_counter() - started) * 1000:.0f} ms")
@@ -1 +1,4 @@
-# Frontend UI package
\ No newline at end of file
+# Frontend UI package
+from fastapi import APIRouter
+
+router = APIRouter()
@@ -0,0 +1,186 @@
+"""
+Memory accounting and idle eviction for NiceGUI clients.
+
+Every browser tab on a live page owns a server-side client holding its whole
+element tree. The monitor reports how many clients are alive, how many
+elements they hold and roughly how many bytes those take. It periodically
+evicts clients that have been idle for too long, and the least recently used
+ones when there are more than allowed.
+
+Evicted tabs are told to drop their websocket and to reload on the next
+interaction (or when they become visible again), which transparently builds a
+fresh client for the same URL.
+"""
+import asyncio
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from nicegui import Client, app, background_tasks
+
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Sent to a tab right before its client is deleted
+EVICT_JAVASCRIPT = '''
+(() => {
+    window.socket.off("disconnect");
+    window.socket.disconnect();
+    const reload = () => window.location.reload();
+    document.addEventListener("visibilitychange", () => { if (document.visibilityState === "visible") reload(); });
+    ["pointerdown", "keydown"].forEach(type => document.addEventListener(type, reload, {once: true, capture: true}));
+})();
+'''
+
+# Time given to the outbox to deliver EVICT_JAVASCRIPT before the client is deleted
+EVICT_GRACE_PERIOD = 0.5
+
+_last_activity: Dict[str, float] = {}
+
+
+def _track_activity():
+    """Record handshakes and UI events as client activity (installed once)."""
+    if getattr(Client.handle_event, '_tracks_activity', False):
+        return
+    handle_event = Client.handle_event
+
+    def handle_event_with_activity(client: Client, msg: Dict) -> None:
+        _last_activity[client.id] = time.time()
+        handle_event(client, msg)
+
+    handle_event_with_activity._tracks_activity = True
+    Client.handle_event = handle_event_with_activity
+    app.on_connect(lambda client: _last_activity.__setitem__(client.id, time.time()))
+
+
+def _deep_size(value: Any) -> int:
+    """Approximate size of plain data (strings, numbers, lists, dicts) in bytes."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_deep_size(key) + _deep_size(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(_deep_size(item) for item in value)
+    return size
+
+
+def element_size(element) -> int:
+    """Approximate memory held by a single element: the object, its props, classes, style and text."""
+    return (
+        sys.getsizeof(element) + sys.getsizeof(element.__dict__)
+        + _deep_size(element._props) + _deep_size(element._classes) + _deep_size(element._style)
+        + _deep_size(element._text) + sys.getsizeof(element._event_listeners)
+    )
+
+
+def client_size(client: Client) -> int:
+    """Approximate memory held by a client's element tree in bytes."""
+    return sys.getsizeof(client) + sum(element_size(element) for element in list(client.elements.values()))
+
+
+class ClientMonitor:
+    """Reports per-client memory use and evicts idle or least recently used clients."""
+
+    def __init__(self, *, idle_timeout: float, max_clients: int, sweep_interval: float = 30.0):
+        """
+        :param idle_timeout: seconds without interaction after which a client is evicted (0 disables)
+        :param max_clients: maximum number of live clients; the least recently used are evicted (0 disables)
+        :param sweep_interval: seconds between two eviction sweeps
+        """
+        self.idle_timeout = idle_timeout
+        self.max_clients = max_clients
+        self.sweep_interval = sweep_interval
+        self.evicted = {'idle': 0, 'lru': 0}
+        self._task: Optional[asyncio.Task] = None
+        _track_activity()
+
+    def start(self):
+        """Start the periodic sweep (call on app startup)."""
+        if self._task is None:
+            self._task = background_tasks.create(self._loop(), name='client monitor')
+
+    @staticmethod
+    def clients() -> List[Client]:
+        """All per-tab clients (the shared auto-index client is not counted)."""
+        return [client for client in list(Client.instances.values()) if not client.shared]
+
+    @staticmethod
+    def last_activity(client: Client) -> float:
+        return _last_activity.get(client.id, client.created)
+
+    def stats(self, details: bool = False) -> Dict[str, Any]:
+        """Return client count, element and byte totals and eviction counters.
+
+        :param details: also list every client with its path, element count, size and idle time
+        """
+        now = time.time()
+        clients = []
+        for client in self.clients():
+            clients.append({
+                'id': client.id,
+                'path': client.page.path,
+                'connected': client.has_socket_connection,
+                'elements': len(client.elements),
+                'bytes': client_size(client),
+                'idle_s': round(now - self.last_activity(client), 1),
+            })
+        count = len(clients)
+        elements = sum(client['elements'] for client in clients)
+        total_bytes = sum(client['bytes'] for client in clients)
+        stats = {
+            'clients': count,
+            'elements': elements,
+            'bytes': total_bytes,
+            'elements_per_client': round(elements / count, 1) if count else 0,
+            'bytes_per_client': round(total_bytes / count) if count else 0,
+            'evicted': dict(self.evicted),
+        }
+        if details:
+            stats['per_client'] = sorted(clients, key=lambda client: client['bytes'], reverse=True)
+        return stats
+
+    def select_evictions(self, now: Optional[float] = None) -> Dict[str, List[Client]]:
+        """Pick the clients to evict: idle ones first, then the least recently used above the limit."""
+        now = time.time() if now is None else now
+        clients = sorted(self.clients(), key=self.last_activity)
+        idle = []
+        if self.idle_timeout > 0:
+            idle = [client for client in clients if now - self.last_activity(client) > self.idle_timeout]
+        remaining = [client for client in clients if client not in idle]
+        lru = []
+        if self.max_clients > 0 and len(remaining) > self.max_clients:
+            lru = remaining[:len(remaining) - self.max_clients]
+        return {'idle': idle, 'lru': lru}
+
+    async def sweep(self) -> int:
+        """Evict clients according to the policy and return how many were evicted."""
+        evictions = self.select_evictions()
+        victims = [client for clients in evictions.values() for client in clients]
+        if not victims:
+            return 0
+        for client in victims:
+            if client.has_socket_connection:
+                client.run_javascript(EVICT_JAVASCRIPT)
+        await asyncio.sleep(EVICT_GRACE_PERIOD)
+        for reason, clients in evictions.items():
+            for client in clients:
+                _last_activity.pop(client.id, None)
+                if client.id in Client.instances:
+                    client.delete()
+                    self.evicted[reason] += 1
+        logger.info(
+            f"Evicted {len(evictions['idle'])} idle and {len(evictions['lru'])} least recently used clients; "
+            f"{len(self.clients())} remain"
+        )
+        return len(victims)
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.sweep()
+                for client_id in [client_id for client_id in _last_activity if client_id not in Client.instances]:
+                    del _last_activity[client_id]
+            except Exception:
+                # Keep sweeping even if a single sweep fails
+                logger.exception("Client eviction sweep failed")
+            await asyncio.sleep(self.sweep_interval)
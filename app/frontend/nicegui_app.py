@@ -1,38 +1,40 @@
-from nicegui import ui, app
-import logging
+from nicegui import app, context, ui
 import asyncio
 from datetime import datetime
+from typing import List, Optional
 import os
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
-logger = logging.getLogger(__name__)
-
-# Initialize counter for demo
-count = 0
-
-# Custom CSS for enhanced styling
-ui.add_head_html("""
-<style>
-    .hero-gradient {
-        background: linear-gradient(135deg, #6366F1 0%, #8B5CF6 100%);
-    }
-    .feature-card:hover {
-        transform: translateY(-5px);
-        box-shadow: 0 10px 25px -5px rgba(0, 0, 0, 0.1), 0 10px 10px -5px rgba(0, 0, 0, 0.04);
-    }
-    .animate-pulse {
-        animation: pulse 2s cubic-bezier(0.4, 0, 0.6, 1) infinite;
-    }
-    @keyframes pulse {
-        0%, 100% { opacity: 1; }
-        50% { opacity: .7; }
-    }
-</style>
-""")
+import numpy as np
+from fastapi import HTTPException, Query
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+
+from app.core.assets import URL_PREFIX, asset_url, get_asset_manifest
+from app.api.health import router as health_router
+from app.core.config import config
+from app.core.logging_config import RequestIdMiddleware, get_logger
+from app.core.probes import InFlightMiddleware, get_probes
+from app.core.state import get_state_store
+from app.frontend.client_monitor import ClientMonitor
+from app.frontend.series_chart import SeriesChart
+from app.services.timeseries import find_series, get_series, series_names
+
+# Logs go through the app logging pipeline
+logger = get_logger(__name__)
+
+# Upper bound on the points a single series query returns
+MAX_QUERY_POINTS = 10_000
+
+# Upper bounds on the points one request appends and on the points a series holds after appends through the API
+MAX_APPEND_POINTS = 10_000
+MAX_SERIES_POINTS = 1_000_000
+
+# Shared demo state (the counter is the same for every client)
+store = get_state_store()
+
+# Custom CSS for enhanced styling, served as a fingerprinted, cacheable stylesheet
+app.mount(URL_PREFIX, get_asset_manifest())
+ui.add_head_html(f'<link rel="stylesheet" href="{asset_url("demo.css")}">', shared=True)
 
 # Define the main page with enhanced UI
 @ui.page('/')
@@ -50,7 +52,7 @@ def main_page():
             ui.button('Learn More', on_click=lambda: ui.navigate('#features')).props('outline color=white push')
     
     # Features section
-    with ui.column().classes('w-full max-w-6xl mx-auto p-8').id('features'):
+    with ui.column().classes('w-full max-w-6xl mx-auto p-8').props('id=features'):
         ui.label('Key Features').classes('text-3xl font-bold text-center mb-8')
         
         with ui.grid(columns=3).classes('gap-6'):
@@ -77,32 +79,30 @@ def main_page():
             # Counter demo with improved styling
             with ui.row().classes('items-center justify-center mb-6'):
                 ui.label('Counter:').classes('mr-2')
-                label = ui.label(str(count)).classes('text-2xl font-bold px-4 py-2 bg-gray-200 rounded')
+                label = ui.label(str(store.get('counter', 0))).classes('text-2xl font-bold px-4 py-2 bg-gray-200 rounded')
+                # Every client's label follows the shared counter, updated at most once per frame
+                unsubscribe = store.subscribe('counter', lambda value: label.set_text(str(value)),
+                                              alive=lambda: not label.is_deleted)
+                context.get_client().on_disconnect(unsubscribe)
                 
                 def increment():
-                    global count
-                    count += 1
-                    label.text = str(count)
-                    logger.info(f"Counter incremented to {count}")
+                    logger.debug(f"Counter incremented to {store.increment('counter')}")
                 
                 def decrement():
-                    global count
-                    count -= 1
-                    label.text = str(count)
-                    logger.info(f"Counter decremented to {count}")
+                    logger.debug(f"Counter decremented to {store.increment('counter', -1)}")
                 
                 ui.button('−', on_click=decrement).props('round color=red').classes('text-xl')
                 ui.button('+', on_click=increment).props('round color=green').classes('text-xl')
             
             # Color picker demo
             ui.label('Color Picker Demo').classes('font-bold mt-4')
-            color = ui.color_picker('Choose a color', value='#6366F1')
+            color = ui.color_input('Choose a color', value='#6366F1')
             
             with ui.row().classes('items-center mt-2'):
                 ui.label('Selected color:')
-                with ui.element('div').classes('w-8 h-8 rounded border border-gray-300').bind_style_from(color, 'background-color'):
-                    pass
-                ui.label().bind_text_from(color)
+                swatch = ui.element('div').classes('w-8 h-8 rounded border border-gray-300').style(f'background-color: {color.value}')
+                color.on_value_change(lambda e: swatch.style(f'background-color: {e.value}'))
+                ui.label().bind_text_from(color, 'value')
     
     # Call to action section
     with ui.column().classes('w-full bg-blue-900 text-white p-8 text-center'):
@@ -115,24 +115,66 @@ def main_page():
         ui.label(f'© {datetime.now().year} Project Base. All rights reserved.')
         ui.label('Built with Python and NiceGUI').classes('text-sm text-gray-400 mt-1')
         with ui.card().classes('w-full mt-4'):
-            ui.label('Sample Chart').classes('text-xl')
-            chart = ui.chart({
-                'title': {'text': 'Sample Data'},
-                'xAxis': {'categories': ['Jan', 'Feb', 'Mar', 'Apr', 'May']},
-                'series': [{
-                    'name': 'Data Series 1',
-                    'data': [29, 71, 106, 129, 144]
-                }, {
-                    'name': 'Data Series 2',
-                    'data': [80, 120, 105, 110, 95]
-                }]
-            }).classes('h-64')
+            ui.label('Training Metrics').classes('text-xl')
+            # Streams new points in batches and downsamples on the server, however long the run gets
+            SeriesChart([get_series('train_loss'), get_series('val_loss')], title='Loss').chart.classes('h-64')
+
+
+async def simulate_training(steps: int = 300_000, batch: int = 500):
+    """Append a synthetic training run to the demo metric series."""
+    train, validation = get_series('train_loss'), get_series('val_loss')
+    rng = np.random.default_rng()
+    for start in range(len(train), steps, batch):
+        step = np.arange(start, start + batch, dtype=np.float64)
+        train.append(step, 2.5 * np.exp(-step / 60_000) + 0.3 + rng.normal(0, 0.05, batch))
+        validation.append(step[-1], 2.5 * np.exp(-step[-1] / 60_000) + 0.35 + rng.normal(0, 0.02))
+        await asyncio.sleep(0.05)
+
+app.on_startup(simulate_training)
+
+
+class SeriesPoints(BaseModel):
+    x: List[float] = Field(max_length=MAX_APPEND_POINTS)
+    y: List[float] = Field(max_length=MAX_APPEND_POINTS)
+
+# Health, liveness and readiness probes shared with the other apps
+probes = get_probes()
+probes.add_gauge('clients', lambda: len(ClientMonitor.clients()), config.ready_max_clients)
+app.include_router(health_router, prefix='/api')
+app.on_startup(probes.start)
+app.add_middleware(InFlightMiddleware)
+app.add_middleware(RequestIdMiddleware)
 
 # API endpoints can be added with FastAPI
-@app.get('/api/health')
-def health_check():
-    """Health check endpoint."""
-    return {'status': 'ok'}
+
+@app.get('/api/series')
+def list_series():
+    """Names and lengths of the metric series."""
+    return {name: len(get_series(name)) for name in series_names()}
+
+@app.get('/api/series/{name}')
+def query_series(name: str, start: Optional[float] = None, end: Optional[float] = None,
+                 points: Optional[int] = Query(None, ge=3, le=MAX_QUERY_POINTS)):
+    """Points of a series within an optional x range, downsampled to at most `points` points."""
+    series = find_series(name)
+    if series is None:
+        return JSONResponse(status_code=404, content={'detail': f"Series '{name}' not found"})
+    x, y = series.query(start, end, points or config.chart_max_points)
+    return {'name': name, 'length': len(series), 'x': x.tolist(), 'y': y.tolist()}
+
+@app.post('/api/series/{name}')
+def append_series(name: str, points: SeriesPoints):
+    """Append points to an existing series (x values must not decrease)."""
+    series = find_series(name)
+    if series is None:
+        raise HTTPException(status_code=404, detail=f"Series '{name}' not found")
+    if len(series) + len(points.x) > MAX_SERIES_POINTS:
+        raise HTTPException(status_code=413, detail=f"Series '{name}' is limited to {MAX_SERIES_POINTS} points")
+    try:
+        series.append(points.x, points.y)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {'name': name, 'length': len(series)}
 
 # Configure app
 app.title = 'NiceGUI Application'
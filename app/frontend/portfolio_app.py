@@ -1,101 +1,133 @@
 """
 ML Engineer Portfolio - Frontend Application
 """
-from nicegui import ui, app
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.middleware.gzip import GZipMiddleware
+from nicegui import app, run, ui
+from app.api.admin import require_admin, router as admin_router
+from app.api.health import router as health_router
+from app.core import compression
+from app.core.assets import URL_PREFIX, get_asset_manifest
 from app.core.config import config
+from app.core.content import get_content
+from app.core.logging_config import RequestIdMiddleware
+from app.core.metrics import (
+    PAGE_BUILD_DURATION, REGISTRY, Gauge, MetricsMiddleware, metrics_response, register_process_gauges, timed,
+)
+from app.core.probes import InFlightMiddleware, get_probes
+from app.core.profiling import ProfilingMiddleware
+from app.core.server import StickySessionMiddleware
+from app.core.startup import StartupTimer
+from app.frontend.client_monitor import ClientMonitor
+from app.frontend.section_cache import SectionCache
+from app.frontend.socket_metrics import count_socket_messages
+from app.frontend.static_pages import StaticPages, StaticPageMiddleware
+from app.frontend.windowed_list import WindowedList
+from app.services.images import build_project_images, responsive_image
+from app.services.search import get_search_index
+from app.services.tag_index import get_tag_index
+from typing import Optional
+from urllib.parse import quote
 import datetime
 
 class PortfolioApp:
     """ML Engineer Portfolio Application."""
     
-    def __init__(self):
-        """Initialize the portfolio application."""
+    def __init__(self, standalone: bool = True):
+        """
+        Initialize the portfolio application.
+
+        :param standalone: serve the portfolio on its own (`ui.run`); otherwise it is mounted into the FastAPI
+            application (see `mount_portfolio`), which provides the static files, probes, metrics, admin API and
+            middleware
+        """
+        self.standalone = standalone
+        self.sections = SectionCache()
+        self.clients = ClientMonitor(
+            idle_timeout=config.client_idle_timeout,
+            max_clients=config.client_max_count,
+            sweep_interval=config.client_sweep_interval,
+        )
         self.setup_routes()
         self.setup_theme()
+        app.on_startup(self.warm_up)
+        app.on_startup(self.clients.start)
+        if config.prerender_pages:
+            self.setup_static_pages()
+        self.setup_compression()
+        self.setup_probes()
+        self.setup_metrics()
+        if standalone:
+            self.setup_profiling()
+            app.add_middleware(RequestIdMiddleware)
+            app.add_middleware(StartupTimer)
+            # Keep a browser on the machine holding its page state when several machines run
+            app.add_middleware(StickySessionMiddleware)
+    
+    async def warm_up(self):
+        """Build the search index and image variants in the background so they do not delay startup."""
+        await run.io_bound(get_search_index)
+        await run.io_bound(build_project_images)
     
     def setup_theme(self):
         """Configure application theme and styling."""
         # Set up dark/light mode
-        app.add_static_files('/static', 'app/static')
+        assets = get_asset_manifest()
+        if self.standalone:
+            app.add_static_files('/static', 'app/static')
+            app.mount(URL_PREFIX, assets)
         
-        # Add custom CSS
+        # Theme colors come from the config; the rest of the theme is a fingerprinted, cacheable stylesheet.
+        # Shared, so every page and the pre-rendered snapshots get it.
         ui.add_head_html(f'''
         <style>
             :root {{
                 --primary-color: {config.theme_color};
                 --secondary-color: {config.secondary_color};
             }}
-            
-            .section-title {{
-                font-size: 2rem;
-                font-weight: 700;
-                margin-bottom: 1.5rem;
-                color: var(--primary-color);
-            }}
-            
-            .card-hover:hover {{
-                transform: translateY(-5px);
-                transition: transform 0.3s ease;
-                box-shadow: 0 10px 15px -3px rgba(0, 0, 0, 0.1), 0 4px 6px -2px rgba(0, 0, 0, 0.05);
-            }}
-            
-            .skill-tag {{
-                background-color: var(--primary-color);
-                color: white;
-                padding: 0.25rem 0.75rem;
-                border-radius: 9999px;
-                font-size: 0.875rem;
-                margin-right: 0.5rem;
-                margin-bottom: 0.5rem;
-                display: inline-block;
-            }}
-            
-            .tech-tag {{
-                background-color: var(--secondary-color);
-                color: white;
-                padding: 0.15rem 0.5rem;
-                border-radius: 9999px;
-                font-size: 0.75rem;
-                margin-right: 0.25rem;
-                margin-bottom: 0.25rem;
-                display: inline-block;
-            }}
-            
-            .timeline-item {{
-                position: relative;
-                padding-left: 2rem;
-                padding-bottom: 2rem;
-                border-left: 2px solid var(--primary-color);
-            }}
-            
-            .timeline-item::before {{
-                content: '';
-                position: absolute;
-                left: -0.5rem;
-                top: 0;
-                width: 1rem;
-                height: 1rem;
-                border-radius: 50%;
-                background-color: var(--primary-color);
-            }}
-            
-            .publication-card {{
-                border-left: 4px solid var(--primary-color);
-                padding-left: 1rem;
-                margin-bottom: 1.5rem;
-            }}
-            
-            @media (max-width: 768px) {{
-                .responsive-col {{
-                    flex-direction: column !important;
-                }}
-                
-                .responsive-col > * {{
-                    width: 100% !important;
-                }}
-            }}
         </style>
-        ''')
+        <link rel="stylesheet" href="{assets.url('theme.css')}">
+        ''', shared=True)
+    
+    def setup_static_pages(self):
+        """Serve pre-rendered HTML snapshots of the pages until a visitor interacts."""
+        self.static_pages = StaticPages({
+            '/': self.create_home_layout,
+            '/projects': self.create_projects_layout,
+            '/publications': self.create_publications_layout,
+            '/experience': self.create_experience_layout,
+        })
+        app.add_middleware(StaticPageMiddleware, pages=self.static_pages)
+    
+    def setup_compression(self):
+        """Compress pages and API responses (including the pre-rendered pages) with brotli, zstd or gzip."""
+        # Replaces NiceGUI's own gzip middleware, which sits inside the static page middleware
+        app.user_middleware[:] = [m for m in app.user_middleware if m.cls is not GZipMiddleware]
+        if self.standalone:
+            app.add_middleware(compression.CompressionMiddleware)
+    
+    def setup_probes(self):
+        """Serve the liveness and readiness probes; readiness also limits the number of live clients."""
+        probes = get_probes()
+        probes.add_gauge('clients', lambda: len(self.clients.clients()), config.ready_max_clients)
+        if self.standalone:
+            app.include_router(health_router, prefix='/api')
+            app.on_startup(probes.start)
+            app.add_middleware(InFlightMiddleware)
+    
+    def setup_metrics(self):
+        """Record request, page build and websocket metrics and serve them at /metrics."""
+        REGISTRY.register(Gauge('nicegui_clients', 'Live NiceGUI clients.', lambda: len(self.clients.clients())))
+        count_socket_messages()
+        if self.standalone:
+            register_process_gauges()
+            app.add_middleware(MetricsMiddleware, router=app.router)
+            app.add_api_route('/metrics', metrics_response, include_in_schema=False)
+    
+    def setup_profiling(self):
+        """Profile sampled requests when switched on through the admin API."""
+        app.include_router(admin_router, prefix='/api')
+        app.add_middleware(ProfilingMiddleware)
     
     def setup_routes(self):
         """Set up application routes."""
@@ -105,9 +137,9 @@ class PortfolioApp:
             self.create_home_layout()
         
         @ui.page('/projects')
-        def projects_page():
-            """Render the projects page."""
-            self.create_projects_layout()
+        def projects_page(tag: Optional[str] = None):
+            """Render the projects page, optionally filtered by a technology."""
+            self.create_projects_layout(tag)
         
         @ui.page('/publications')
         def publications_page():
@@ -118,26 +150,79 @@ class PortfolioApp:
         def experience_page():
             """Render the experience page."""
             self.create_experience_layout()
+        
+        # Client IDs are enough to attach to a visitor's session, and the size estimate walks every element
+        self.stats_router = APIRouter(prefix='/api/stats', dependencies=[Depends(require_admin)])
+        
+        @self.stats_router.get('/sections')
+        def section_stats():
+            """Section build cache counters."""
+            return self.sections.stats()
+        
+        @self.stats_router.get('/clients')
+        def client_stats(details: bool = False):
+            """Live client count, elements and approximate bytes per client, eviction counters."""
+            return self.clients.stats(details)
+        
+        if self.standalone:
+            @self.stats_router.get('/compression')
+            def compression_stats():
+                """Compressed bytes and CPU time per encoding."""
+                return compression.stats()
+            
+            app.include_router(self.stats_router)
     
     def create_navigation(self):
         """Create the navigation menu."""
         with ui.header().classes('flex justify-between items-center p-4 bg-gray-800 text-white'):
             ui.label(config.developer_name).classes('text-xl font-bold')
+            self.create_search_box()
             
-            with ui.row().classes('gap-4'):
-                ui.button('Home', on_click=lambda: ui.navigate.to('/')).props('flat color=white')
-                ui.button('Projects', on_click=lambda: ui.navigate.to('/projects')).props('flat color=white')
-                ui.button('Publications', on_click=lambda: ui.navigate.to('/publications')).props('flat color=white')
-                ui.button('Experience', on_click=lambda: ui.navigate.to('/experience')).props('flat color=white')
+            with ui.row().classes('gap-4 items-center'):
+                self.sections.section('navigation', (), self._build_navigation_links).classes('flex gap-4')
                 
                 # Dark/Light mode toggle
                 dark = ui.dark_mode()
                 ui.button(on_click=lambda: dark.toggle(), icon='dark_mode').props('flat color=white')
     
+    def create_search_box(self):
+        """Create the search-as-you-type box of the navigation menu."""
+        def update_results(e):
+            results.clear()
+            # On the event loop: never wait for an index update running in the background
+            matches = get_search_index(block=False).search(e.value or '', limit=8)
+            with results:
+                for match in matches:
+                    ui.menu_item(f'{match.title} ({match.kind})', on_click=lambda url=match.url: ui.navigate.to(url))
+            if matches:
+                results.open()
+            else:
+                results.close()
+        
+        with ui.input(placeholder='Search', on_change=update_results).props('dense dark standout clearable').classes('w-64'):
+            results = ui.menu().props('no-parent-event fit')
+    
+    def _build_navigation_links(self):
+        # Plain links, so navigation works without a server round-trip
+        ui.button('Home').props('flat color=white href=/')
+        ui.button('Projects').props('flat color=white href=/projects')
+        ui.button('Publications').props('flat color=white href=/publications')
+        ui.button('Experience').props('flat color=white href=/experience')
+    
     def create_footer(self):
         """Create the footer section."""
         current_year = datetime.datetime.now().year
         with ui.footer().classes('p-4 bg-gray-800 text-white text-center'):
+            self.sections.section(
+                'footer',
+                ('developer_name', 'github_url', 'linkedin_url', 'twitter_url', 'kaggle_url', 'google_scholar_url'),
+                self._build_footer_content,
+                extra=current_year,
+            ).classes('w-full')
+    
+    def _build_footer_content(self):
+        current_year = datetime.datetime.now().year
+        with ui.column().classes('w-full items-center'):
             ui.label(f'© {current_year} {config.developer_name}. All rights reserved.').classes('text-sm')
             
             with ui.row().classes('justify-center gap-4 mt-2'):
@@ -152,6 +237,7 @@ class PortfolioApp:
                 if config.google_scholar_url:
                     ui.link('Google Scholar', config.google_scholar_url).classes('text-white hover:text-blue-300')
     
+    @timed(PAGE_BUILD_DURATION, 'home')
     def create_home_layout(self):
         """Create the home page layout."""
         self.create_navigation()
@@ -165,8 +251,8 @@ class PortfolioApp:
                     ui.label(config.developer_bio).classes('text-lg mb-6')
                     
                     with ui.row().classes('gap-4'):
-                        ui.button('View Projects', on_click=lambda: ui.navigate.to('/projects')).props('color=primary')
-                        ui.button('Contact Me', on_click=lambda: ui.open(f'mailto:{config.developer_email}')).props('outline')
+                        ui.button('View Projects').props('color=primary href=/projects')
+                        ui.button('Contact Me').props(f'outline href="mailto:{config.developer_email}"')
                 
                 with ui.column().classes('w-1/2 flex justify-center'):
                     # Placeholder for profile image - replace with actual image path
@@ -174,63 +260,84 @@ class PortfolioApp:
             
             # Skills Section
             ui.label('Skills & Expertise').classes('section-title mt-12')
-            
-            with ui.grid(columns=2).classes('gap-6'):
-                for category, skills in config.skills.items():
-                    with ui.card().classes('card-hover'):
-                        ui.label(category).classes('text-xl font-bold mb-4')
-                        with ui.element('div').classes('flex flex-wrap'):
-                            for skill in skills:
-                                ui.element('span').classes('skill-tag').text(skill)
+            self.sections.section('home_skills', ('skills', 'projects'), self._build_skills_grid).classes('w-full')
             
             # Featured Projects Section
             ui.label('Featured Projects').classes('section-title mt-12')
+            self.sections.section('home_projects', ('projects',), self._build_featured_projects).classes('w-full')
             
-            with ui.grid(columns=3).classes('gap-6'):
-                # Display only the first 3 projects on the home page
-                for project in config.projects[:3]:
-                    with ui.card().classes('card-hover'):
-                        # Project image
-                        ui.image(f"https://via.placeholder.com/600x400?text={project['title']}").classes('w-full h-48 object-cover')
-                        
-                        with ui.card_section():
-                            ui.label(project['title']).classes('text-xl font-bold mb-2')
-                            ui.label(project['description']).classes('mb-4 text-sm')
-                            
-                            with ui.element('div').classes('flex flex-wrap mb-4'):
-                                for tech in project['technologies'][:4]:  # Limit to 4 technologies
-                                    ui.element('span').classes('tech-tag').text(tech)
-                            
-                            with ui.row().classes('justify-between'):
-                                if project['github_url']:
-                                    ui.link('GitHub', project['github_url']).classes('text-blue-600')
-                                if project['demo_url']:
-                                    ui.link('Demo', project['demo_url']).classes('text-blue-600')
-            
-            ui.button('View All Projects', on_click=lambda: ui.navigate.to('/projects')).classes('mt-6 mx-auto').props('outline')
+            ui.button('View All Projects').classes('mt-6 mx-auto').props('outline href=/projects')
             
             # Brief Experience Section
             ui.label('Experience').classes('section-title mt-12')
+            self.sections.section('home_experience', ('experience',), self._build_recent_experience).classes('w-full')
             
-            with ui.column().classes('space-y-6'):
-                # Show only the most recent experience
-                for experience in config.experience[:2]:
-                    with ui.card().classes('timeline-item'):
-                        ui.label(experience['title']).classes('text-xl font-bold')
-                        ui.label(f"{experience['company']} • {experience['location']}").classes('text-lg text-blue-600')
-                        
-                        end_date = experience['end_date'] if experience['end_date'] else 'Present'
-                        ui.label(f"{experience['start_date']} - {end_date}").classes('text-sm text-gray-600 mb-2')
-                        
-                        ui.label(experience['description']).classes('text-sm')
-            
-            ui.button('View Full Experience', on_click=lambda: ui.navigate.to('/experience')).classes('mt-6 mx-auto').props('outline')
+            ui.button('View Full Experience').classes('mt-6 mx-auto').props('outline href=/experience')
         
         self.create_footer()
     
-    def create_projects_layout(self):
+    def _build_skills_grid(self):
+        index = get_tag_index()
+        with ui.grid(columns=2).classes('gap-6'):
+            for category, skills in get_content().skills.items():
+                with ui.card().classes('card-hover'):
+                    ui.label(category).classes('text-xl font-bold mb-4')
+                    with ui.element('div').classes('flex flex-wrap'):
+                        for skill in skills:
+                            if index.projects_with(skill):
+                                # Skills used in projects link to the filtered projects page
+                                ui.link(skill, f'/projects?tag={quote(skill)}').classes('skill-tag no-underline')
+                            else:
+                                ui.label(skill).classes('skill-tag')
+    
+    def _build_featured_projects(self):
+        with ui.grid(columns=3).classes('gap-6'):
+            # Display only the first 3 projects on the home page
+            for project in get_content().projects[:3]:
+                with ui.card().classes('card-hover'):
+                    # Project image
+                    self._build_project_image(project, '600x400', '(max-width: 768px) 100vw, 33vw').classes('w-full h-48 object-cover')
+                    
+                    with ui.card_section():
+                        ui.label(project.title).classes('text-xl font-bold mb-2')
+                        ui.label(project.description).classes('mb-4 text-sm')
+                        
+                        with ui.element('div').classes('flex flex-wrap mb-4'):
+                            for tech in project.technologies[:4]:  # Limit to 4 technologies
+                                ui.label(tech).classes('tech-tag')
+                        
+                        with ui.row().classes('justify-between'):
+                            if project.github_url:
+                                ui.link('GitHub', project.github_url).classes('text-blue-600')
+                            if project.demo_url:
+                                ui.link('Demo', project.demo_url).classes('text-blue-600')
+    
+    def _build_project_image(self, project, placeholder_size, sizes):
+        """Create a lazily loaded, responsive project image (or a placeholder if it has no variants)."""
+        image = responsive_image(project.image, sizes)
+        if image is None:
+            return ui.image(f"https://via.placeholder.com/{placeholder_size}?text={project.title}")
+        return ui.image(image['src']).props(f'srcset="{image["srcset"]}" sizes="{image["sizes"]}" loading=lazy')
+    
+    def _build_recent_experience(self):
+        with ui.column().classes('space-y-6'):
+            # Show only the most recent experience
+            for experience in get_content().experience[:2]:
+                with ui.card().classes('timeline-item'):
+                    ui.label(experience.title).classes('text-xl font-bold')
+                    ui.label(f"{experience.company} • {experience.location}").classes('text-lg text-blue-600')
+                    
+                    end_date = experience.end_date if experience.end_date else 'Present'
+                    ui.label(f"{experience.start_date} - {end_date}").classes('text-sm text-gray-600 mb-2')
+                    
+                    ui.label(experience.description).classes('text-sm')
+    
+    @timed(PAGE_BUILD_DURATION, 'projects')
+    def create_projects_layout(self, tag: Optional[str] = None):
         """Create the projects page layout."""
         self.create_navigation()
+        content = get_content()
+        index = get_tag_index()
         
         with ui.column().classes('w-full max-w-6xl mx-auto p-4'):
             ui.label('ML Projects').classes('section-title mt-8')
@@ -238,37 +345,55 @@ class PortfolioApp:
             # Project filters
             with ui.row().classes('mb-6 gap-4'):
                 ui.label('Filter by:').classes('self-center')
-                ui.button('All', on_click=lambda: ui.notify('Filter: All')).props('outline')
-                ui.button('Computer Vision', on_click=lambda: ui.notify('Filter: Computer Vision')).props('outline')
-                ui.button('NLP', on_click=lambda: ui.notify('Filter: NLP')).props('outline')
-                ui.button('Time Series', on_click=lambda: ui.notify('Filter: Time Series')).props('outline')
+                ui.button('All', on_click=lambda: show(None, range(len(content.projects)))).props('outline')
+                for name in config.project_filters:
+                    ui.button(name, on_click=lambda name=name: show(name, index.projects_for_filter(name))).props('outline')
+            summary = ui.label().classes('text-sm text-gray-600')
             
-            # Projects grid
-            with ui.grid(columns=2).classes('gap-8'):
-                for project in config.projects:
-                    with ui.card().classes('card-hover'):
-                        # Project image
-                        ui.image(f"https://via.placeholder.com/800x450?text={project['title']}").classes('w-full h-56 object-cover')
-                        
-                        with ui.card_section():
-                            ui.label(project['title']).classes('text-2xl font-bold mb-2')
-                            ui.label(project['description']).classes('mb-4')
-                            
-                            ui.label('Technologies:').classes('font-semibold mt-4 mb-2')
-                            with ui.element('div').classes('flex flex-wrap mb-4'):
-                                for tech in project['technologies']:
-                                    ui.element('span').classes('tech-tag').text(tech)
-                            
-                            with ui.row().classes('justify-start gap-4 mt-4'):
-                                if project['github_url']:
-                                    ui.button('GitHub', on_click=lambda url=project['github_url']: ui.open(url)).props('outline')
-                                if project['demo_url']:
-                                    ui.button('Live Demo', on_click=lambda url=project['demo_url']: ui.open(url)).props('color=primary')
-                                if project['paper_url']:
-                                    ui.button('Research Paper', on_click=lambda url=project['paper_url']: ui.open(url)).props('outline color=secondary')
+            # Projects grid, built one page at a time
+            projects = WindowedList(
+                content.projects,
+                self._build_project_card,
+                lambda: ui.grid(columns=2).classes('gap-8 w-full'),
+                page_size=config.list_page_size,
+                max_pages=config.list_max_pages,
+            )
+            
+            def show(name, positions):
+                # Only the cards on the first page of the new selection are touched
+                projects.set_items([content.projects[position] for position in positions])
+                summary.text = f'{len(positions)} projects' + (f' matching {name}' if name else '')
+            
+            if tag:
+                show(tag, index.projects_with(tag))
+            else:
+                summary.text = f'{len(content.projects)} projects'
         
         self.create_footer()
     
+    def _build_project_card(self, project):
+        with ui.card().classes('card-hover'):
+            # Project image
+            self._build_project_image(project, '800x450', '(max-width: 768px) 100vw, 50vw').classes('w-full h-56 object-cover')
+            
+            with ui.card_section():
+                ui.label(project.title).classes('text-2xl font-bold mb-2')
+                ui.label(project.description).classes('mb-4')
+                
+                ui.label('Technologies:').classes('font-semibold mt-4 mb-2')
+                with ui.element('div').classes('flex flex-wrap mb-4'):
+                    for tech in project.technologies:
+                        ui.label(tech).classes('tech-tag')
+                
+                with ui.row().classes('justify-start gap-4 mt-4'):
+                    if project.github_url:
+                        ui.button('GitHub').props(f'outline href="{project.github_url}"')
+                    if project.demo_url:
+                        ui.button('Live Demo').props(f'color=primary href="{project.demo_url}"')
+                    if project.paper_url:
+                        ui.button('Research Paper').props(f'outline color=secondary href="{project.paper_url}"')
+    
+    @timed(PAGE_BUILD_DURATION, 'publications')
     def create_publications_layout(self):
         """Create the publications page layout."""
         self.create_navigation()
@@ -276,33 +401,43 @@ class PortfolioApp:
         with ui.column().classes('w-full max-w-6xl mx-auto p-4'):
             ui.label('Publications & Research').classes('section-title mt-8')
             
-            with ui.column().classes('space-y-8'):
-                for publication in config.publications:
-                    with ui.card().classes('publication-card'):
-                        ui.label(publication['title']).classes('text-xl font-bold mb-2')
-                        ui.label(publication['authors']).classes('text-blue-600 mb-1')
-                        ui.label(f"{publication['conference']} • {publication['year']}").classes('text-sm text-gray-600 mb-4')
-                        
-                        ui.button('Read Paper', on_click=lambda url=publication['url']: ui.open(url)).props('outline')
+            WindowedList(
+                get_content().publications,
+                self._build_publication_card,
+                lambda: ui.column().classes('space-y-8 w-full'),
+                page_size=config.list_page_size,
+                max_pages=config.list_max_pages,
+            )
             
             # Research interests section
             ui.label('Research Interests').classes('section-title mt-12')
-            
-            with ui.grid(columns=3).classes('gap-6'):
-                with ui.card().classes('card-hover'):
-                    ui.label('Computer Vision').classes('text-xl font-bold mb-2')
-                    ui.label('Medical imaging analysis, object detection, and image segmentation using deep learning approaches.').classes('text-sm')
-                
-                with ui.card().classes('card-hover'):
-                    ui.label('Natural Language Processing').classes('text-xl font-bold mb-2')
-                    ui.label('Transformer architectures, few-shot learning, and efficient fine-tuning methods for language models.').classes('text-sm')
-                
-                with ui.card().classes('card-hover'):
-                    ui.label('ML Systems').classes('text-xl font-bold mb-2')
-                    ui.label('Scalable machine learning systems, model optimization, and efficient deployment strategies.').classes('text-sm')
+            self.sections.section('research_interests', (), self._build_research_interests).classes('w-full')
         
         self.create_footer()
     
+    def _build_publication_card(self, publication):
+        with ui.card().classes('publication-card'):
+            ui.label(publication.title).classes('text-xl font-bold mb-2')
+            ui.label(publication.authors).classes('text-blue-600 mb-1')
+            ui.label(f"{publication.conference} • {publication.year}").classes('text-sm text-gray-600 mb-4')
+            
+            ui.button('Read Paper').props(f'outline href="{publication.url}"')
+    
+    def _build_research_interests(self):
+        with ui.grid(columns=3).classes('gap-6'):
+            with ui.card().classes('card-hover'):
+                ui.label('Computer Vision').classes('text-xl font-bold mb-2')
+                ui.label('Medical imaging analysis, object detection, and image segmentation using deep learning approaches.').classes('text-sm')
+            
+            with ui.card().classes('card-hover'):
+                ui.label('Natural Language Processing').classes('text-xl font-bold mb-2')
+                ui.label('Transformer architectures, few-shot learning, and efficient fine-tuning methods for language models.').classes('text-sm')
+            
+            with ui.card().classes('card-hover'):
+                ui.label('ML Systems').classes('text-xl font-bold mb-2')
+                ui.label('Scalable machine learning systems, model optimization, and efficient deployment strategies.').classes('text-sm')
+    
+    @timed(PAGE_BUILD_DURATION, 'experience')
     def create_experience_layout(self):
         """Create the experience page layout."""
         self.create_navigation()
@@ -310,47 +445,79 @@ class PortfolioApp:
         with ui.column().classes('w-full max-w-6xl mx-auto p-4'):
             # Work Experience Section
             ui.label('Work Experience').classes('section-title mt-8')
-            
-            with ui.column().classes('space-y-8'):
-                for experience in config.experience:
-                    with ui.card().classes('timeline-item'):
-                        ui.label(experience['title']).classes('text-xl font-bold')
-                        ui.label(f"{experience['company']} • {experience['location']}").classes('text-lg text-blue-600')
-                        
-                        end_date = experience['end_date'] if experience['end_date'] else 'Present'
-                        ui.label(f"{experience['start_date']} - {end_date}").classes('text-sm text-gray-600 mb-2')
-                        
-                        ui.label(experience['description']).classes('text-md')
+            self.sections.section('experience', ('experience',), self._build_experience_timeline).classes('w-full')
             
             # Education Section
             ui.label('Education').classes('section-title mt-12')
-            
-            with ui.column().classes('space-y-8'):
-                for education in config.education:
-                    with ui.card().classes('timeline-item'):
-                        ui.label(education['degree']).classes('text-xl font-bold')
-                        ui.label(f"{education['institution']} • {education['location']}").classes('text-lg text-blue-600')
-                        
-                        ui.label(f"{education['start_year']} - {education['end_year']}").classes('text-sm text-gray-600 mb-2')
-                        
-                        ui.label(education['description']).classes('text-md')
+            self.sections.section('education', ('education',), self._build_education_timeline).classes('w-full')
             
             # Certifications Section
             ui.label('Certifications').classes('section-title mt-12')
-            
-            with ui.grid(columns=2).classes('gap-6'):
-                with ui.card().classes('card-hover'):
-                    ui.label('TensorFlow Developer Certificate').classes('text-xl font-bold mb-2')
-                    ui.label('Google • 2022').classes('text-blue-600 mb-4')
-                    ui.label('Demonstrated proficiency in building and training neural networks using TensorFlow.').classes('text-sm')
-                
-                with ui.card().classes('card-hover'):
-                    ui.label('AWS Machine Learning Specialty').classes('text-xl font-bold mb-2')
-                    ui.label('Amazon Web Services • 2021').classes('text-blue-600 mb-4')
-                    ui.label('Expertise in designing, implementing, and deploying ML solutions on AWS.').classes('text-sm')
+            self.sections.section('certifications', (), self._build_certifications).classes('w-full')
         
         self.create_footer()
+    
+    def _build_experience_timeline(self):
+        with ui.column().classes('space-y-8'):
+            for experience in get_content().experience:
+                with ui.card().classes('timeline-item'):
+                    ui.label(experience.title).classes('text-xl font-bold')
+                    ui.label(f"{experience.company} • {experience.location}").classes('text-lg text-blue-600')
+                    
+                    end_date = experience.end_date if experience.end_date else 'Present'
+                    ui.label(f"{experience.start_date} - {end_date}").classes('text-sm text-gray-600 mb-2')
+                    
+                    ui.label(experience.description).classes('text-md')
+    
+    def _build_education_timeline(self):
+        with ui.column().classes('space-y-8'):
+            for education in get_content().education:
+                with ui.card().classes('timeline-item'):
+                    ui.label(education.degree).classes('text-xl font-bold')
+                    ui.label(f"{education.institution} • {education.location}").classes('text-lg text-blue-600')
+                    
+                    ui.label(f"{education.start_year} - {education.end_year}").classes('text-sm text-gray-600 mb-2')
+                    
+                    ui.label(education.description).classes('text-md')
+    
+    def _build_certifications(self):
+        with ui.grid(columns=2).classes('gap-6'):
+            with ui.card().classes('card-hover'):
+                ui.label('TensorFlow Developer Certificate').classes('text-xl font-bold mb-2')
+                ui.label('Google • 2022').classes('text-blue-600 mb-4')
+                ui.label('Demonstrated proficiency in building and training neural networks using TensorFlow.').classes('text-sm')
+            
+            with ui.card().classes('card-hover'):
+                ui.label('AWS Machine Learning Specialty').classes('text-xl font-bold mb-2')
+                ui.label('Amazon Web Services • 2021').classes('text-blue-600 mb-4')
+                ui.label('Expertise in designing, implementing, and deploying ML solutions on AWS.').classes('text-sm')
 
 def create_portfolio_app():
     """Create and return the portfolio application."""
-    return PortfolioApp()
\ No newline at end of file
+    return PortfolioApp()
+
+
+def mount_portfolio(fastapi_app) -> PortfolioApp:
+    """
+    Serve the portfolio from a FastAPI application, in the same process and event loop.
+
+    NiceGUI is mounted at `/` behind the application's own routes, so call this after all routes are added;
+    requests pass through the application's middleware before they reach NiceGUI. Unknown paths under `/api`
+    do not reach it: they are answered with the application's JSON 404 (and counted in the error table).
+    """
+    portfolio = PortfolioApp(standalone=False)
+    fastapi_app.include_router(portfolio.stats_router)
+    
+    @fastapi_app.api_route('/api/{path:path}', methods=['GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'],
+                           include_in_schema=False)
+    async def api_not_found(path: str):
+        raise HTTPException(status_code=404, detail='Not Found')
+    
+    ui.run_with(
+        fastapi_app,
+        title=f"{config.developer_name} - Machine Learning Engineer",
+        favicon="🧠",
+        dark=config.dark_mode,
+        show_welcome_message=False,
+    )
+    return portfolio
\ No newline at end of file
@@ -1,7 +1,8 @@
 from fastapi import Request
 from fastapi.responses import HTMLResponse
 from . import router
-from .. import templates
+from ..application import get_templates
+from ..core.templating import template_response
 import os
 from datetime import datetime
 
@@ -11,8 +12,9 @@ async def index(request: Request):
     import logging
     logger = logging.getLogger(__name__)
 
+    templates = get_templates()
     if not templates:
-        error_msg = "Templates support is not configured. Check app/__init__.py."
+        error_msg = "Templates support is not configured. Check app/application.py."
         logger.error(error_msg)
         # Consider raising an HTTPException or returning a more structured error
         return HTMLResponse(
@@ -24,11 +26,11 @@ async def index(request: Request):
         # The existence of 'templates' object implies it's configured.
         # FastAPI/Starlette's Jinja2Templates will raise an internal error if the specific template is not found.
         # This will be caught by the generic exception handler.
-        logger.info(f"Attempting to render index.html")
-        return templates.TemplateResponse("index.html", {
-            "request": request,
+        # Streamed: the head and page header are sent before the rest of the page is rendered
+        logger.debug(f"Attempting to render index.html")
+        return await template_response(templates, request, "index.html", {
             "current_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        })
+        }, stream=True)
     except Exception as e:
         # This will catch errors if index.html is missing or if there's a rendering error within the template itself.
         # The generic error handler in error_handling.py should ideally log this.
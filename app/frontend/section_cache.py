@@ -0,0 +1,70 @@
+"""
+Shared build cache for static portfolio sections.
+
+Sections such as the skills grid or the footer only depend on a handful of
+config fields. They are built once, serialized to HTML and reused by every
+client as a single `ui.html` element instead of hundreds of cards and labels.
+
+Serialized sections are plain HTML: event handlers and the behaviour of Quasar
+components are gone. Only sections without interactive elements can be
+cached; building a section that registers an event handler raises an error.
+"""
+import time
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+from nicegui import ui
+
+from app.core.content import content_version
+from app.core.logging_config import get_logger
+from app.frontend.static_pages import render_element, throwaway_client
+
+logger = get_logger(__name__)
+
+
+class SectionCache:
+    """Section-level HTML cache keyed by a hash of the config fields a section uses."""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[str, str]] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def get_html(self, name: str, fields: Iterable[str], build: Callable[[], None], extra: Any = None) -> str:
+        """Return the cached HTML of a section, building it if its config fields changed.
+
+        :param name: unique section name
+        :param fields: config fields the section is built from
+        :param build: function creating the section's NiceGUI elements
+        :param extra: additional value the section depends on (e.g. the current year)
+        """
+        key = f'{content_version(tuple(fields))}:{extra}'
+        stats = self._stats.setdefault(name, {'hits': 0, 'misses': 0, 'build_ms': 0.0})
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == key:
+            stats['hits'] += 1
+            return entry[1]
+
+        started = time.perf_counter()
+        with throwaway_client() as client:
+            build()
+            interactive = sorted({type(element).__name__ for element in client.elements.values()
+                                  if element._event_listeners})
+            if interactive:
+                raise ValueError(f"Section '{name}' cannot be cached, it has event handlers ({', '.join(interactive)})")
+            fragment = ''.join(render_element(child) for child in client.content)
+        stats['misses'] += 1
+        stats['build_ms'] = (time.perf_counter() - started) * 1000
+        self._entries[name] = (key, fragment)
+        logger.debug(f"Built section '{name}' in {stats['build_ms']:.1f} ms")
+        return fragment
+
+    def section(self, name: str, fields: Iterable[str], build: Callable[[], None], extra: Any = None) -> ui.html:
+        """Add a cached section to the current page as a single element.
+
+        The section is shown as static HTML, so `build` must not create interactive elements (event handlers,
+        components that need Quasar's JavaScript such as menus or expansions); links with `href` are fine.
+        """
+        return ui.html(self.get_html(name, fields, build, extra))
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Return hit/miss counters and the last build time (ms) per section."""
+        return {name: dict(values) for name, values in self._stats.items()}
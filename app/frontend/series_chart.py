@@ -0,0 +1,138 @@
+"""
+Live line chart for large, growing metric series.
+
+The chart never holds more than about twice its point budget. New points are
+pushed in batches on a timer, and only the new points are sent: the browser
+appends them to the lines it shows. Once the shown points exceed the budget,
+the series is downsampled again on the server and the whole lines are sent. Zooming (mouse wheel or slider)
+queries the zoomed x range at full budget, so details reappear when zooming in.
+"""
+import json
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from nicegui import ui
+from nicegui.events import GenericEventArguments
+
+from app.core.config import config
+from app.services.timeseries import Series
+
+
+class _Trace:
+    """Points of one series currently shown by the chart."""
+
+    def __init__(self, series: Series):
+        self.series = series
+        self.data: List[Tuple[float, float]] = []
+        self.shown_length = 0  # raw points of the series covered by `data`
+
+
+class SeriesChart:
+    """ECharts line chart streaming appended points and downsampling them to a point budget."""
+
+    def __init__(self,
+                 series: Sequence[Series],
+                 *,
+                 title: str = '',
+                 points: Optional[int] = None,
+                 interval: Optional[float] = None):
+        """
+        :param series: series to plot, one line each
+        :param title: chart title
+        :param points: point budget per line, roughly the chart width in pixels (default: `chart_max_points`)
+        :param interval: seconds between two pushes of new points (default: `chart_push_interval`)
+        """
+        self.points = points or config.chart_max_points
+        self.traces = [_Trace(s) for s in series]
+        self.zoom: Optional[Tuple[float, float]] = None  # x range while zoomed in
+        self.axis_extent: Optional[Tuple[float, float]] = None  # x axis range last sent to the browser
+        self.chart = ui.echart({
+            'title': {'text': title},
+            'animation': False,
+            'tooltip': {'trigger': 'axis'},
+            'legend': {'top': 'bottom'},
+            'xAxis': {'type': 'value', 'scale': True},
+            'yAxis': {'type': 'value', 'scale': True},
+            'dataZoom': [{'type': 'inside', 'filterMode': 'none'}, {'type': 'slider', 'filterMode': 'none'}],
+            'series': [
+                {'name': trace.series.name, 'type': 'line', 'showSymbol': False, 'sampling': 'none', 'data': []}
+                for trace in self.traces
+            ],
+        })
+        self.chart.on('chart:datazoom', self._handle_zoom, ['start', 'end', 'batch'], throttle=0.1)
+        self.timer = ui.timer(interval or config.chart_push_interval, self.push)
+
+    def _extent(self) -> Optional[Tuple[float, float]]:
+        extents = [extent for extent in (trace.series.extent() for trace in self.traces) if extent]
+        if not extents:
+            return None
+        return min(extent[0] for extent in extents), max(extent[1] for extent in extents)
+
+    def _send(self, extent: Optional[Tuple[float, float]]):
+        update: Dict = {'series': [{'data': trace.data} for trace in self.traces]}
+        if extent:
+            # A fixed axis extent keeps the zoom percentages meaningful while data is replaced
+            update['xAxis'] = {'min': extent[0], 'max': extent[1]}
+            self.axis_extent = extent
+        for options, trace in zip(self.chart.options['series'], self.traces):
+            options['data'] = trace.data
+        self.chart.run_chart_method('setOption', update)
+
+    def _append(self, tails: List[List[Tuple[float, float]]], extent: Optional[Tuple[float, float]]):
+        # Only the new points go over the socket; the browser appends them to the data of its lines
+        x_axis = {'min': extent[0], 'max': extent[1]} if extent else {}
+        self.axis_extent = extent or self.axis_extent
+        for options, trace in zip(self.chart.options['series'], self.traces):
+            options['data'] = trace.data  # kept in sync for a full update of the element
+        self.chart.client.run_javascript(f'''
+            const chart = getElement({self.chart.id}).chart;
+            const series = chart.getOption().series;
+            {json.dumps(tails)}.forEach((tail, i) => series[i].data.push(...tail));
+            chart.setOption({{series: series.map(s => ({{data: s.data}})), xAxis: {json.dumps(x_axis)}}});
+        ''')
+
+    def push(self, resend: bool = False):
+        """Send the points appended since the last push (called by the timer).
+
+        :param resend: send the whole lines, e.g. after the data shown by the browser was replaced by a zoom
+        """
+        if self.zoom is not None:
+            return
+        tails: List[List[Tuple[float, float]]] = []
+        for trace in self.traces:
+            length = len(trace.series)
+            tail: List[Tuple[float, float]] = []
+            if length != trace.shown_length:
+                if len(trace.data) + length - trace.shown_length > 2 * self.points:
+                    x, y = trace.series.query(points=self.points)
+                    trace.data = list(zip(x.tolist(), y.tolist()))
+                    resend = True  # downsampled again: the points shown so far are replaced
+                else:
+                    x, y = trace.series.points_since(trace.shown_length)
+                    tail = list(zip(x.tolist(), y.tolist()))
+                    trace.data.extend(tail)
+                trace.shown_length = length
+            tails.append(tail)
+        if resend:
+            self._send(self._extent())
+        elif any(tails):
+            self._append(tails, self._extent())
+
+    def _handle_zoom(self, event: GenericEventArguments):
+        # Slider zooms report start/end directly, mouse wheel zooms in a batch
+        zoom = (event.args.get('batch') or [event.args])[0]
+        start, end = zoom.get('start'), zoom.get('end')
+        extent = self.axis_extent
+        if start is None or end is None or extent is None:
+            return
+        if start <= 0 and end >= 100:
+            self.zoom = None
+            for trace in self.traces:
+                trace.data, trace.shown_length = [], 0
+            self.push(resend=True)
+            return
+        width = extent[1] - extent[0]
+        self.zoom = (extent[0] + width * start / 100, extent[0] + width * end / 100)
+        for trace in self.traces:
+            x, y = trace.series.query(*self.zoom, points=self.points)
+            trace.data = list(zip(x.tolist(), y.tolist()))
+        self._send(None)
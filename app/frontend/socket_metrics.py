@@ -0,0 +1,30 @@
+"""
+Socket.IO message counting for the NiceGUI websocket.
+
+Wraps the event dispatch and `emit` of NiceGUI's Socket.IO server so every
+message from and to the browsers is counted in `websocket_messages_total`.
+"""
+from nicegui import core
+
+from app.core.metrics import WEBSOCKET_MESSAGES
+
+
+def count_socket_messages():
+    """Count incoming and outgoing Socket.IO messages (idempotent)."""
+    sio = core.sio
+    if getattr(sio, '_messages_counted', False):
+        return
+    incoming, outgoing = WEBSOCKET_MESSAGES.labels('in'), WEBSOCKET_MESSAGES.labels('out')
+    trigger_event, emit = sio._trigger_event, sio.emit
+
+    async def counted_trigger_event(event, namespace, *args):
+        incoming.inc()
+        return await trigger_event(event, namespace, *args)
+
+    async def counted_emit(event, data=None, *args, **kwargs):
+        outgoing.inc()
+        return await emit(event, data, *args, **kwargs)
+
+    sio._trigger_event = counted_trigger_event
+    sio.emit = counted_emit
+    sio._messages_counted = True
@@ -0,0 +1,245 @@
+"""
+Pre-rendered static HTML for the portfolio pages.
+
+Each page layout is built once per content version in a throwaway NiceGUI
+client and serialized to plain HTML. Visitors are served that HTML over
+normal HTTP without a server-side client or websocket; the live NiceGUI page
+is only loaded once they interact with something that needs it.
+"""
+import hashlib
+import html
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from nicegui import Client
+from nicegui.element import Element
+from nicegui.page import page
+from nicegui.version import __version__ as nicegui_version
+from starlette.responses import HTMLResponse, Response
+
+from app.core.config import config
+from app.core.content import content_version
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Query parameter that requests the live NiceGUI page; any query string bypasses the snapshots
+LIVE_QUERY_PARAM = 'live'
+
+# Quasar components rendered as plain HTML tags with their base CSS classes
+_QUASAR_TAGS: Dict[str, Tuple[str, str]] = {
+    'q-layout': ('div', ''),
+    'q-page-container': ('div', ''),
+    'q-page': ('main', ''),
+    'q-header': ('header', ''),
+    'q-footer': ('footer', ''),
+    'q-card': ('div', 'q-card'),
+    'q-card-section': ('div', 'q-card__section q-card__section--vert'),
+}
+
+_UPGRADE_SCRIPT = """
+<script>
+  document.addEventListener('click', (event) => {
+    const target = event.target.closest('[data-live]');
+    if (!target) return;
+    event.preventDefault();
+    const url = new URL(window.location.href);
+    url.searchParams.set('%s', '1');
+    window.location.replace(url);
+  });
+</script>
+""" % LIVE_QUERY_PARAM
+
+
+def _attrs(attrs: Dict[str, Optional[str]]) -> str:
+    parts = []
+    for name, value in attrs.items():
+        if value is None:
+            continue
+        parts.append(f' {name}="{html.escape(value, quote=True)}"' if value != '' else f' {name}')
+    return ''.join(parts)
+
+
+def _style(element: Element) -> Optional[str]:
+    if not element._style:
+        return None
+    return ';'.join(f'{key}:{value}' for key, value in element._style.items())
+
+
+def _classes(*groups) -> Optional[str]:
+    classes = ' '.join(c for group in groups for c in (group.split() if isinstance(group, str) else group) if c)
+    return classes or None
+
+
+def _render_button(element: Element) -> str:
+    props = element._props
+    if props.get('flat'):
+        variant = 'q-btn--flat'
+        color = f"text-{props.get('color', 'primary')}"
+    elif props.get('outline'):
+        variant = 'q-btn--outline'
+        color = f"text-{props['color']}" if 'color' in props else ''
+    else:
+        variant = 'q-btn--standard'
+        color = f"bg-{props.get('color', 'primary')} text-white"
+    classes = _classes('q-btn q-btn-item non-selectable no-outline q-btn--rectangle', variant, color, element._classes)
+    content = ''
+    if props.get('icon'):
+        content += f'<i class="q-icon notranslate material-icons" aria-hidden="true">{html.escape(props["icon"])}</i>'
+    if props.get('label'):
+        content += html.escape(str(props['label']))
+    inner = f'<span class="q-focus-helper"></span><span class="q-btn__content text-center col items-center q-anchor--skip justify-center row">{content}</span>'
+    if props.get('href'):
+        attrs = {'class': classes, 'style': _style(element), 'href': props['href'], 'target': props.get('target')}
+        return f'<a{_attrs(attrs)}>{inner}</a>'
+    # Buttons without a plain link need server-side handlers, so they upgrade to the live page
+    attrs = {'class': classes, 'style': _style(element), 'type': 'button', 'data-live': ''}
+    return f'<button{_attrs(attrs)}>{inner}</button>'
+
+
+def render_element(element: Element) -> str:
+    """Serialize a NiceGUI element tree to static HTML."""
+    tag = element.tag
+    text = html.escape(element._text) if element._text is not None else ''
+    children = ''.join(render_element(child) for child in element)
+
+    if tag == 'q-btn':
+        return _render_button(element)
+    if tag == 'nicegui-image':
+        attrs = {
+            'src': element._props.get('src'),
+            'srcset': element._props.get('srcset'),
+            'sizes': element._props.get('sizes'),
+            'class': _classes(element._classes),
+            'style': _style(element),
+            'loading': 'lazy',
+            'decoding': 'async',
+            'alt': '',
+        }
+        return f'<img{_attrs(attrs)}>'
+    if tag == 'nicegui-link':
+        attrs = {
+            'href': element._props.get('href'),
+            'target': element._props.get('target'),
+            'class': _classes(element._classes),
+            'style': _style(element),
+        }
+        return f'<a{_attrs(attrs)}>{text}{children}</a>'
+    if tag == 'nicegui-input':
+        # Typing needs the server, so focusing an input upgrades to the live page
+        attrs = {
+            'type': 'text',
+            'placeholder': element._props.get('placeholder'),
+            'class': _classes('q-field__native', element._classes),
+            'style': _style(element),
+            'data-live': '',
+        }
+        return f'<input{_attrs(attrs)}>'
+    if tag == 'q-menu':
+        return ''
+    if tag in _QUASAR_TAGS:
+        html_tag, base_classes = _QUASAR_TAGS[tag]
+    elif element.component is not None:
+        # Custom Vue components (dark mode, charts, ...) have no static representation
+        return children
+    else:
+        html_tag, base_classes = tag, ''
+    if 'innerHTML' in element._props:
+        # ui.html elements, e.g. cached sections, already carry serialized markup
+        children = element._props['innerHTML'] + children
+    attrs = {'class': _classes(base_classes, element._classes), 'style': _style(element)}
+    return f'<{html_tag}{_attrs(attrs)}>{text}{children}</{html_tag}>'
+
+
+@contextmanager
+def throwaway_client() -> Iterator[Client]:
+    """Yield a NiceGUI client that only exists to build elements for serialization."""
+    client = Client(page(''))
+    try:
+        with client:
+            yield client
+    finally:
+        client.delete()
+
+
+def render_fragment(builder: Callable[[], None]) -> str:
+    """Build elements with the given builder and return them as an HTML fragment."""
+    with throwaway_client() as client:
+        builder()
+        return ''.join(render_element(child) for child in client.content)
+
+
+class StaticPages:
+    """Cache of pre-rendered page snapshots, keyed by path and content version."""
+
+    def __init__(self, builders: Dict[str, Callable[[], None]]):
+        self.builders = builders
+        self._snapshots: Dict[str, Tuple[str, str, bytes]] = {}  # path -> (content version, etag, html)
+
+    def render(self, path: str) -> bytes:
+        """Build the page for the given path and return it as a full HTML document."""
+        started = time.perf_counter()
+        with throwaway_client() as client:
+            self.builders[path]()
+            body = render_element(client.layout)
+            head_html = client.head_html
+        prefix = f'/_nicegui/{nicegui_version}/static'
+        body_classes = 'body--dark dark' if config.dark_mode else 'body--light'
+        document = f'''<!DOCTYPE html>
+<html>
+  <head>
+    <title>{html.escape(config.developer_name)} - {html.escape(config.developer_title)}</title>
+    <meta name="viewport" content="width=device-width, initial-scale=1" />
+    <link href="{prefix}/nicegui.css" rel="stylesheet" type="text/css" />
+    <link href="{prefix}/fonts.css" rel="stylesheet" type="text/css" />
+    <link href="{prefix}/quasar.prod.css" rel="stylesheet" type="text/css" />
+    <script src="{prefix}/tailwindcss.min.js"></script>
+    {head_html}
+  </head>
+  <body class="desktop no-touch {body_classes}">
+    {body}
+    {_UPGRADE_SCRIPT}
+  </body>
+</html>'''
+        logger.info(f"Pre-rendered {path} in {(time.perf_counter() - started) * 1000:.1f} ms")
+        return document.encode('utf-8')
+
+    def get(self, path: str) -> Tuple[str, bytes]:
+        """Return (etag, html) for a path, rendering it if the content changed.
+
+        The ETag is a hash of the page itself, so it differs between pages and changes with any change of the page.
+        """
+        version = content_version()
+        snapshot = self._snapshots.get(path)
+        if snapshot is None or snapshot[0] != version:
+            body = self.render(path)
+            snapshot = (version, f'"{hashlib.sha1(body).hexdigest()[:20]}"', body)
+            self._snapshots[path] = snapshot
+        return snapshot[1], snapshot[2]
+
+
+class StaticPageMiddleware:
+    """ASGI middleware serving pre-rendered pages before NiceGUI creates a client."""
+
+    def __init__(self, app, pages: StaticPages):
+        self.app = app
+        self.pages = pages
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope['type'] == 'http'
+            and scope['method'] in ('GET', 'HEAD')
+            and scope['path'] in self.pages.builders
+            and not scope['query_string']
+        ):
+            etag, body = self.pages.get(scope['path'])
+            headers = {'Cache-Control': 'no-cache', 'ETag': etag}
+            if_none_match = dict(scope['headers']).get(b'if-none-match', b'').decode('latin-1')
+            if etag in if_none_match:
+                response = Response(status_code=304, headers=headers)
+            else:
+                response = HTMLResponse(body, headers=headers)
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -0,0 +1,104 @@
+"""
+Windowed rendering for long portfolio lists.
+
+Only a slice of the list is built when the page loads. More items are built
+on demand, and items that scroll out of the window are deleted again, so the
+number of live elements per client stays bounded no matter how long the list is.
+"""
+from collections import deque
+from typing import Any, Callable, Deque, Sequence, Tuple
+
+from nicegui import ui
+from nicegui.element import Element
+
+
+class WindowedList:
+    """Cursor-paginated list keeping at most `page_size * max_pages` items alive."""
+
+    def __init__(self,
+                 items: Sequence[Any],
+                 render_item: Callable[[Any], None],
+                 container: Callable[[], Element],
+                 *,
+                 page_size: int,
+                 max_pages: int):
+        """
+        :param items: all items of the list
+        :param render_item: function building the elements of a single item
+        :param container: function creating the element the items are placed in (e.g. a grid)
+        :param page_size: number of items built per page
+        :param max_pages: number of pages kept alive at the same time
+        """
+        self.items = items
+        self.render_item = render_item
+        self.page_size = max(1, page_size)
+        self.max_items = self.page_size * max(1, max_pages)
+        self.start = 0
+        self.end = 0
+        self._rendered: Deque[Tuple[Any, Element]] = deque()
+
+        self.previous_button = ui.button('Show earlier', on_click=self.load_previous).props('outline').classes('mx-auto')
+        self.container = container()
+        self.next_button = ui.button('Load more', on_click=self.load_more).props('outline').classes('mx-auto')
+        self.load_more()
+
+    def _build(self, item: Any) -> Element:
+        with self.container:
+            with ui.element('div') as wrapper:
+                self.render_item(item)
+        return wrapper
+
+    def _update_buttons(self):
+        self.previous_button.set_visibility(self.start > 0)
+        self.next_button.set_visibility(self.end < len(self.items))
+
+    def load_more(self):
+        """Append the next page and drop items from the top if the window is full."""
+        end = min(self.end + self.page_size, len(self.items))
+        for item in self.items[self.end:end]:
+            self._rendered.append((item, self._build(item)))
+        self.end = end
+        while len(self._rendered) > self.max_items:
+            self._rendered.popleft()[1].delete()
+            self.start += 1
+        self._update_buttons()
+
+    def load_previous(self):
+        """Prepend the previous page and drop items from the bottom if the window is full."""
+        start = max(self.start - self.page_size, 0)
+        for index, item in enumerate(self.items[start:self.start]):
+            wrapper = self._build(item)
+            wrapper.move(target_index=index)
+            self._rendered.insert(index, (item, wrapper))
+        self.start = start
+        while len(self._rendered) > self.max_items:
+            self._rendered.pop()[1].delete()
+            self.end -= 1
+        self._update_buttons()
+
+    def set_items(self, items: Sequence[Any]):
+        """Replace the list content and show its first page.
+
+        Items that are already built and stay on the first page are kept and
+        reordered, so only the cards that actually change are created or deleted.
+        """
+        first_page = items[:self.page_size]
+        keep = {id(item) for item in first_page}
+        existing = {}
+        while self._rendered:
+            item, wrapper = self._rendered.pop()
+            if id(item) in keep:
+                existing[id(item)] = wrapper
+            else:
+                wrapper.delete()
+        for index, item in enumerate(first_page):
+            wrapper = existing.get(id(item))
+            if wrapper is None:
+                wrapper = self._build(item)
+            if self.container.default_slot.children.index(wrapper) != index:
+                wrapper.move(target_index=index)
+            self._rendered.append((item, wrapper))
+        self.items = items
+        self.start = 0
+        self.end = len(first_page)
+        self._update_buttons()
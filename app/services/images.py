@@ -0,0 +1,140 @@
+"""
+Responsive image pipeline for project images.
+
+Source images referenced by the projects' `image` field are resized into a few width
+variants, encoded as WebP and written under `app/static/img` with
+content-hashed filenames. A manifest remembers the source hash of every image,
+so images that did not change are skipped on the next run.
+
+Run it as part of the build with `python -m app.services.images`; the portfolio
+app also runs it on startup, which is cheap when nothing changed.
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from app.core.content import get_content
+from app.core.logging_config import get_logger
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it project cards keep their placeholders
+    Image = None
+
+logger = get_logger(__name__)
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static')
+OUTPUT_DIR = os.path.join(STATIC_DIR, 'img')
+MANIFEST_PATH = os.path.join(OUTPUT_DIR, 'manifest.json')
+URL_PREFIX = '/static/img'
+
+# Variant name -> target width in pixels
+VARIANTS = {'thumb': 320, 'card': 640, 'full': 1280}
+WEBP_QUALITY = 80
+
+_manifest: Optional[Dict[str, dict]] = None
+
+
+def _source_path(name: str) -> Optional[str]:
+    for directory in (os.path.join(STATIC_DIR, 'images'), STATIC_DIR):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def _make_variants(name: str, path: str, source_hash: str) -> Tuple[str, dict]:
+    """Write all variants of one image (runs in a worker process)."""
+    stem = os.path.splitext(os.path.basename(name))[0]
+    variants = {}
+    with Image.open(path) as image:
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+        for variant, width in VARIANTS.items():
+            width = min(width, image.width)
+            height = round(image.height * width / image.width)
+            filename = f'{stem}.{variant}.{source_hash[:10]}.webp'
+            image.resize((width, height), Image.LANCZOS).save(
+                os.path.join(OUTPUT_DIR, filename), 'WEBP', quality=WEBP_QUALITY, method=6,
+            )
+            variants[variant] = {'url': f'{URL_PREFIX}/{filename}', 'width': width, 'height': height}
+    return name, {'hash': source_hash, 'variants': variants}
+
+
+def _load_manifest() -> Dict[str, dict]:
+    try:
+        with open(MANIFEST_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _is_current(entry: Optional[dict], source_hash: str) -> bool:
+    if not entry or entry.get('hash') != source_hash:
+        return False
+    return all(
+        os.path.isfile(os.path.join(OUTPUT_DIR, os.path.basename(variant['url'])))
+        for variant in entry['variants'].values()
+    )
+
+
+def build_project_images(max_workers: Optional[int] = None) -> Dict[str, dict]:
+    """Generate image variants for all project images that changed since the last run."""
+    global _manifest
+    manifest = _load_manifest()
+    if Image is None:
+        logger.warning("Pillow is not installed; skipping project image variants.")
+        _manifest = manifest
+        return manifest
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    jobs: List[Tuple[str, str, str]] = []
+    names = {project.image for project in get_content().projects if project.image}
+    for name in sorted(names):
+        path = _source_path(name)
+        if path is None:
+            continue
+        source_hash = _file_hash(path)
+        if not _is_current(manifest.get(name), source_hash):
+            jobs.append((name, path, source_hash))
+
+    if jobs:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            for name, entry in pool.map(_make_variants, *zip(*jobs)):
+                manifest[name] = entry
+        for name in [name for name in manifest if name not in names]:
+            del manifest[name]
+        with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+    logger.info(f"Project images: {len(jobs)} rebuilt, {len(names) - len(jobs)} up to date or missing")
+    _manifest = manifest
+    return manifest
+
+
+def responsive_image(name: Optional[str], sizes: str) -> Optional[Dict[str, str]]:
+    """Return `src`, `srcset` and `sizes` for a processed image, or None if it has no variants."""
+    global _manifest
+    if _manifest is None:
+        _manifest = _load_manifest()
+    entry = _manifest.get(name) if name else None
+    if entry is None:
+        return None
+    variants = entry['variants']
+    return {
+        'src': variants['card']['url'],
+        'srcset': ', '.join(f"{variant['url']} {variant['width']}w" for variant in variants.values()),
+        'sizes': sizes,
+    }
+
+
+if __name__ == '__main__':
+    build_project_images()
@@ -0,0 +1,240 @@
+"""
+In-memory full-text search over the portfolio content.
+
+Documents are indexed into an inverted index (term -> {doc id: term frequency})
+and ranked with BM25. The last query term is also matched as a prefix, which
+makes the index usable for search-as-you-type. Updating the index only
+re-tokenizes documents whose text changed, and happens on a copy that replaces
+the index once it is complete, so searches never see a partial update.
+"""
+import bisect
+import hashlib
+import heapq
+import math
+import re
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from app.core.content import content_version, get_content
+
+# Config fields the search documents are built from
+SEARCH_FIELDS = ("projects", "publications", "experience", "education")
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Upper bound on the number of index terms a single prefix expands to
+MAX_PREFIX_EXPANSIONS = 50
+
+# Only the highest-impact postings of each query token are scored, which keeps
+# very common terms and short prefixes from dominating query time
+MAX_SCORED_POSTINGS = 1000
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lower-case word tokens."""
+    return _TOKEN_PATTERN.findall(text.casefold())
+
+
+class Document(NamedTuple):
+    id: str
+    kind: str
+    title: str
+    text: str
+    url: str
+
+
+class SearchResult(NamedTuple):
+    id: str
+    kind: str
+    title: str
+    url: str
+    score: float
+
+
+class SearchIndex:
+    """Inverted index with BM25 ranking, prefix matching and incremental updates."""
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._terms: List[str] = []  # sorted, for prefix lookups
+        self._documents: Dict[str, Document] = {}
+        self._lengths: Dict[str, int] = {}
+        self._hashes: Dict[str, str] = {}
+        self._total_length = 0
+        self._weights: Dict[str, List[Tuple[str, float]]] = {}  # per-term BM25 contributions, highest first
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def copy(self) -> 'SearchIndex':
+        """An independent copy, to be updated while this index keeps answering searches."""
+        index = SearchIndex()
+        index._postings = {term: dict(postings) for term, postings in self._postings.items()}
+        index._terms = list(self._terms)
+        index._documents = dict(self._documents)
+        index._lengths = dict(self._lengths)
+        index._hashes = dict(self._hashes)
+        index._total_length = self._total_length
+        index._weights = dict(self._weights)  # the weight lists are replaced, never changed
+        return index
+
+    def _add(self, document: Document, digest: str):
+        tokens = tokenize(f"{document.title} {document.text}")
+        frequencies: Dict[str, int] = {}
+        for token in tokens:
+            frequencies[token] = frequencies.get(token, 0) + 1
+        for term, frequency in frequencies.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                bisect.insort(self._terms, term)
+            postings[document.id] = frequency
+        self._documents[document.id] = document
+        self._lengths[document.id] = len(tokens)
+        self._hashes[document.id] = digest
+        self._total_length += len(tokens)
+
+    def _remove(self, doc_id: str):
+        document = self._documents.pop(doc_id)
+        for term in set(tokenize(f"{document.title} {document.text}")):
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect.bisect_left(self._terms, term)]
+        self._total_length -= self._lengths.pop(doc_id)
+        del self._hashes[doc_id]
+
+    def update(self, documents: Iterable[Document]) -> Tuple[int, int]:
+        """Synchronize the index with the given documents.
+
+        Only new or changed documents are (re-)indexed and documents that are no
+        longer present are removed. Returns the number of indexed and removed documents.
+        """
+        seen = set()
+        indexed = 0
+        for document in documents:
+            seen.add(document.id)
+            digest = hashlib.sha1(f"{document.kind}\0{document.title}\0{document.text}\0{document.url}".encode("utf-8")).hexdigest()
+            if self._hashes.get(document.id) == digest:
+                continue
+            if document.id in self._documents:
+                self._remove(document.id)
+            self._add(document, digest)
+            indexed += 1
+        stale = [doc_id for doc_id in self._documents if doc_id not in seen]
+        for doc_id in stale:
+            self._remove(doc_id)
+        if indexed or stale:
+            self._weights.clear()
+        return indexed, len(stale)
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self._terms, prefix)
+        terms = []
+        for term in self._terms[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def _term_weights(self, term: str) -> List[Tuple[str, float]]:
+        weights = self._weights.get(term)
+        if weights is None:
+            postings = self._postings.get(term)
+            if not postings:
+                return []
+            count = len(self._documents)
+            average_length = self._total_length / count or 1.0
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            weights = []
+            for doc_id, frequency in postings.items():
+                norm = K1 * (1 - B + B * self._lengths[doc_id] / average_length)
+                weights.append((doc_id, idf * frequency * (K1 + 1) / (frequency + norm)))
+            weights.sort(key=lambda item: item[1], reverse=True)
+            self._weights[term] = weights
+        return weights
+
+    def search(self, query: str, limit: int = 10, prefix: bool = True) -> List[SearchResult]:
+        """Return the best matching documents for a query, ranked by BM25.
+
+        :param query: search text
+        :param limit: maximum number of results
+        :param prefix: whether the last query term also matches as a prefix
+        """
+        tokens = tokenize(query)
+        if not tokens or not self._documents:
+            return []
+        scores: Dict[str, float] = {}
+        for position, token in enumerate(tokens):
+            is_last = position == len(tokens) - 1
+            terms = self._expand_prefix(token) if prefix and is_last else [token]
+            # Expanded prefixes share the posting budget of the token they came from
+            budget = max(MAX_SCORED_POSTINGS // max(len(terms), 1), 10)
+            for term in terms:
+                for doc_id, weight in self._term_weights(term)[:budget]:
+                    scores[doc_id] = scores.get(doc_id, 0.0) + weight
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [
+            SearchResult(doc_id, self._documents[doc_id].kind, self._documents[doc_id].title, self._documents[doc_id].url, round(score, 4))
+            for doc_id, score in best
+        ]
+
+
+def build_documents() -> List[Document]:
+    """Build search documents from the portfolio content."""
+    content = get_content()
+    documents = []
+    for position, project in enumerate(content.projects):
+        documents.append(Document(
+            f"project:{position}", "project", project.title,
+            f"{project.description} {' '.join(project.technologies)}",
+            "/projects",
+        ))
+    for position, publication in enumerate(content.publications):
+        documents.append(Document(
+            f"publication:{position}", "publication", publication.title,
+            f"{publication.authors} {publication.conference} {publication.year}",
+            publication.url or "/publications",
+        ))
+    for position, experience in enumerate(content.experience):
+        documents.append(Document(
+            f"experience:{position}", "experience", experience.title,
+            f"{experience.company} {experience.location} {experience.description}",
+            "/experience",
+        ))
+    for position, education in enumerate(content.education):
+        documents.append(Document(
+            f"education:{position}", "education", education.degree,
+            f"{education.institution} {education.location} {education.description}",
+            "/experience",
+        ))
+    return documents
+
+
+_index = SearchIndex()
+_index_version: Optional[str] = None
+_index_lock = threading.Lock()  # held by the thread updating the index
+
+
+def get_search_index(block: bool = True) -> SearchIndex:
+    """Return the search index, incrementally updating it if the content changed.
+
+    :param block: wait for an update running in another thread; code on the event loop passes False and gets
+        the previous index meanwhile
+    """
+    global _index, _index_version
+    version = content_version(SEARCH_FIELDS)
+    if version != _index_version and _index_lock.acquire(blocking=block):
+        try:
+            if version != _index_version:
+                index = _index.copy()
+                index.update(build_documents())
+                _index, _index_version = index, version
+        finally:
+            _index_lock.release()
+    return _index
@@ -0,0 +1,60 @@
+"""
+Inverted index from technology and skill tags to project positions.
+"""
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+from app.core.config import config
+from app.core.content import Project, content_version, get_content
+
+# Config fields the index is built from
+INDEX_FIELDS = ("projects", "skills", "project_filters")
+
+
+def _normalize(tag: str) -> str:
+    return tag.strip().casefold()
+
+
+class TagIndex:
+    """Maps tags, skill categories and project filters to sorted project positions."""
+
+    def __init__(self, projects: Sequence[Project], skills: Mapping[str, Sequence[str]], filters: Dict[str, List[str]]):
+        postings: Dict[str, List[int]] = {}
+        for position, project in enumerate(projects):
+            for tech in project.technologies:
+                positions = postings.setdefault(_normalize(tech), [])
+                if not positions or positions[-1] != position:
+                    positions.append(position)
+        self._by_tag: Dict[str, Tuple[int, ...]] = {tag: tuple(positions) for tag, positions in postings.items()}
+        self._by_category = {category: self._union(tags) for category, tags in skills.items()}
+        self._by_filter = {name: self._union(tags) for name, tags in filters.items()}
+
+    def _union(self, tags: Sequence[str]) -> Tuple[int, ...]:
+        positions = set()
+        for tag in tags:
+            positions.update(self._by_tag.get(_normalize(tag), ()))
+        return tuple(sorted(positions))
+
+    def projects_with(self, tag: str) -> Tuple[int, ...]:
+        """Positions of the projects using the given technology or skill."""
+        return self._by_tag.get(_normalize(tag), ())
+
+    def projects_in_category(self, category: str) -> Tuple[int, ...]:
+        """Positions of the projects using any skill of the given skill category."""
+        return self._by_category.get(category, ())
+
+    def projects_for_filter(self, name: str) -> Tuple[int, ...]:
+        """Positions of the projects matched by a named project filter."""
+        return self._by_filter.get(name, ())
+
+
+_index: Optional[Tuple[str, TagIndex]] = None
+
+
+def get_tag_index() -> TagIndex:
+    """Return the tag index for the current content, rebuilding it only when the content changed."""
+    global _index
+    version = content_version(INDEX_FIELDS)
+    if _index is None or _index[0] != version:
+        content = get_content()
+        _index = (version, TagIndex(content.projects, content.skills, config.project_filters))
+    return _index[1]
@@ -0,0 +1,139 @@
+"""
+Append-only metric series with server-side downsampling.
+
+Series hold their points in growable NumPy arrays. Queries over the whole
+series or an x range are reduced to a point budget (typically the chart width
+in pixels) with Largest-Triangle-Three-Buckets, which keeps peaks, dips and
+the overall shape while the payload stays bounded however long the series grows.
+"""
+import threading
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from app.core.config import config
+
+Points = Tuple[np.ndarray, np.ndarray]
+Values = Union[float, List[float], np.ndarray]
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> Points:
+    """Downsample a series to `threshold` points with Largest-Triangle-Three-Buckets.
+
+    The first and last points are kept. The points in between are split into
+    `threshold - 2` buckets and from each bucket the point forming the largest
+    triangle with the previously selected point and the average of the next
+    bucket is selected.
+    """
+    length = len(x)
+    if threshold >= length:
+        return x, y
+    if threshold < 3:
+        # Too few points for buckets: keep the first and the last point, as far as the budget allows
+        keep = np.array([0, length - 1][:max(threshold, 0)], dtype=np.int64)
+        return x[keep], y[keep]
+    bucket_size = (length - 2) / (threshold - 2)
+    bounds = (np.arange(threshold - 1) * bucket_size).astype(np.int64) + 1
+    bounds[-1] = length - 1
+    starts = bounds[:-1]
+    counts = np.diff(bounds)
+    # Average of every bucket; the anchor of the last bucket is the last point
+    next_x = np.append(np.add.reduceat(x[:length - 1], starts)[1:] / counts[1:], x[-1])
+    next_y = np.append(np.add.reduceat(y[:length - 1], starts)[1:] / counts[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = length - 1
+    anchor = 0
+    for bucket in range(threshold - 2):
+        start, end = bounds[bucket], bounds[bucket + 1]
+        anchor_x, anchor_y = x[anchor], y[anchor]
+        areas = np.abs(
+            (anchor_x - next_x[bucket]) * (y[start:end] - anchor_y)
+            - (anchor_x - x[start:end]) * (next_y[bucket] - anchor_y)
+        )
+        anchor = start + int(areas.argmax())
+        selected[bucket + 1] = anchor
+    return x[selected], y[selected]
+
+
+class Series:
+    """Append-only series of (x, y) points with non-decreasing x."""
+
+    def __init__(self, name: str, capacity: int = 1024):
+        self.name = name
+        self._x = np.empty(capacity, dtype=np.float64)
+        self._y = np.empty(capacity, dtype=np.float64)
+        self._length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._length
+
+    def _snapshot(self) -> Points:
+        # Appends never touch points below the current length, so views stay valid
+        with self._lock:
+            return self._x[:self._length], self._y[:self._length]
+
+    def append(self, x: Values, y: Values):
+        """Append one or more points; x values must not decrease."""
+        x = np.atleast_1d(np.asarray(x, dtype=np.float64))
+        y = np.atleast_1d(np.asarray(y, dtype=np.float64))
+        if x.shape != y.shape or x.ndim != 1:
+            raise ValueError("x and y must be scalars or 1-d sequences of the same length")
+        if not len(x):
+            return
+        with self._lock:
+            last = self._x[self._length - 1] if self._length else -np.inf
+            if x[0] < last or np.any(np.diff(x) < 0):
+                raise ValueError(f"x values of series '{self.name}' must not decrease")
+            end = self._length + len(x)
+            if end > len(self._x):
+                capacity = max(end, 2 * len(self._x))
+                self._x = np.concatenate([self._x[:self._length], np.empty(capacity - self._length)])
+                self._y = np.concatenate([self._y[:self._length], np.empty(capacity - self._length)])
+            self._x[self._length:end] = x
+            self._y[self._length:end] = y
+            self._length = end
+
+    def extent(self) -> Optional[Tuple[float, float]]:
+        """Smallest and largest x value, or None if the series is empty."""
+        x, _ = self._snapshot()
+        return (float(x[0]), float(x[-1])) if len(x) else None
+
+    def points_since(self, index: int) -> Points:
+        """Raw points appended after the first `index` points."""
+        x, y = self._snapshot()
+        return x[index:], y[index:]
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None, points: Optional[int] = None) -> Points:
+        """Points with `start <= x <= end`, downsampled to at most `points` points.
+
+        One point on each side of the range is included, so lines reach the edges of a zoomed chart.
+        """
+        x, y = self._snapshot()
+        first = 0 if start is None else max(int(np.searchsorted(x, start, side='left')) - 1, 0)
+        last = len(x) if end is None else min(int(np.searchsorted(x, end, side='right')) + 1, len(x))
+        return lttb(x[first:last], y[first:last], points or config.chart_max_points)
+
+
+_series: Dict[str, Series] = {}
+_series_lock = threading.Lock()
+
+
+def get_series(name: str) -> Series:
+    """Return the series with the given name, creating it if needed."""
+    series = _series.get(name)
+    if series is None:
+        with _series_lock:
+            series = _series.setdefault(name, Series(name))
+    return series
+
+
+def find_series(name: str) -> Optional[Series]:
+    """Return an existing series or None."""
+    return _series.get(name)
+
+
+def series_names() -> List[str]:
+    return sorted(_series)
@@ -1,25 +1,30 @@
 """
 Alternative entry point for the ML Engineer Portfolio application.
-This file provides more configuration options and can be used for production deployment.
+This file serves the API, the Jinja pages and the portfolio from one process and can be used for production deployment.
 """
 import os
 import uvicorn
 from app.core.config import config
+from app.core.server import serve
 
 def run_app():
-    """Run the application using uvicorn directly."""
+    """Run the application: with uvicorn's auto-reload in debug mode, with the production server otherwise."""
     # Get port from environment or use default
     port = int(os.getenv("PORT", config.port))
     host = os.getenv("HOST", config.host)
     
+    if not config.debug:
+        serve("app:app", host=host, port=port)
+        return
+    
     # Run with uvicorn
     uvicorn.run(
-        "main:app",
+        "app:app",
         host=host,
         port=port,
-        reload=config.debug,
-        log_level="info" if not config.debug else "debug"
+        reload=True,
+        log_level="debug"
     )
 
 if __name__ == "__main__":
-    run_app()
\ No newline at end of file
+    run_app()